@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from datetime import datetime, timedelta
 from satellite_tle import SatelliteTle
 from inview_calculator import InviewCalculator
+from sgp4_batch_propagator import Sgp4BatchPropagator
 from pytz import UTC
 
 ###############################################################################
@@ -32,6 +33,7 @@ class AngularSeparationReportGenerator:
         self.__debug = False
         self.__trace = False
         self.__out = sys.stdout
+        self.__propagator = Sgp4BatchPropagator([satellite_of_interest_tle] + other_satellite_tle_list)
 
     # Member functions
     def generate_report(self):
@@ -70,17 +72,21 @@ class AngularSeparationReportGenerator:
         end_time = self.__tz.localize(
             datetime(day_year, day_month, day_day, 23, 59, 59))
         
+        # Propagate all of the satellites at once
+        ephemerides = self.__propagator.compute_ephemerides(start_time, end_time)
+        base_ephemeris = ephemerides[0]
+
         # Get the InviewCalculator and compute the inviews
         base_ic = InviewCalculator(self.__ground_station, self.__satellite_of_interest)
         base_inviews = []
-        base_inviews = base_ic.compute_inviews(start_time, end_time)
+        base_inviews = base_ic.compute_inviews_from_ephemeris(start_time, end_time, base_ephemeris)
         if (self.__debug):
             self.__out.write("Inviews for satellite of interest %s\n" % self.__satellite_of_interest.get_satellite_number()) # debug
             base_ic.print_inviews(base_inviews)
-        for sat in self.__other_satellite_tle_list:
+        for (sat, other_ephemeris) in zip(self.__other_satellite_tle_list, ephemerides[1:]):
             other_ic = InviewCalculator(self.__ground_station, sat)
             other_inviews = []
-            other_inviews = other_ic.compute_inviews(start_time, end_time)
+            other_inviews = other_ic.compute_inviews_from_ephemeris(start_time, end_time, other_ephemeris)
             if (self.__debug):
                 self.__out.write("Inviews for other satellite %s\n" % sat.get_satellite_number()) # debug
                 other_ic.print_inviews(other_inviews)
@@ -91,8 +97,8 @@ class AngularSeparationReportGenerator:
             for civ in combined_inviews:
                 if (self.__debug):
                     self.__out.write("Start:  %s, end:  %s\n" % (civ[0], civ[1]))
-                base_azel = base_ic.compute_azels(civ[0], civ[1], 15)
-                other_azel = other_ic.compute_azels(civ[0], civ[1], 15)
+                base_azel = base_ic.compute_azels_from_ephemeris(civ[0], civ[1], 15, base_ephemeris)
+                other_azel = other_ic.compute_azels_from_ephemeris(civ[0], civ[1], 15, other_ephemeris)
                 for i in range(len(base_azel)):
                     base_unit = [math.cos(D2R*base_azel[i][1])*math.cos(D2R*base_azel[i][2]), 
                             math.sin(D2R*base_azel[i][1])*math.cos(D2R*base_azel[i][2]), 
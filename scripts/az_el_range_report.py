@@ -1,10 +1,10 @@
 import sys
 import os
 import math
-from datetime import datetime, timedelta
-from datetime import datetime, timedelta
+from datetime import datetime
 from satellite_tle import SatelliteTle
 from inview_calculator import InviewCalculator
+from report_days import ReportDays
 from pytz import UTC
 import matplotlib
 matplotlib.use("Agg")
@@ -22,21 +22,27 @@ class AzElRangeReportGenerator:
     """Class to create an azimuth, elevation(, and range) report for a given ground station and a given satellite for a specific time period """
     # Constructor
     def __init__(self, base_output_dir, ground_station, gs_number, satellite_of_interest_tle, tz, \
-                 aer_days = 0, time_step_seconds = 15):
+                 aer_days = 0, time_step_seconds = 15, *, inviews = None, report_days = None):
         # days:  0=today, -1=yesterday, 1 = tomorrow, etc.
-        """Constructor"""
+        """Constructor:  inviews are the inviews (in UTC) already computed over (at least) the AER days, e.g. by a report covering them (default is to compute them), report_days are the ReportDays of that report, whose today is used for the AER days (default is now)"""
         self.__base_output_dir = base_output_dir
         self.__ground_station = ground_station
         self.__gs_number = gs_number
         self.__satellite_of_interest = satellite_of_interest_tle
         self.__tz = tz
-        self.__report_timezone = tz.tzname(datetime.now())
+        today = datetime.now()
+        if (report_days is not None):
+            today = report_days.get_day_date(0)
+        self.__report_timezone = tz.tzname(today)
         self.__aer_days = aer_days
         self.__time_step_seconds = time_step_seconds # depends on the caller to guard from stupidity
+        self.__inviews = inviews
+        self.__report_days = ReportDays(tz, 0, aer_days - 1, today)
+        self.__day_inviews = {} # inviews split into the AER days
+        self.__inview_calculator = None
         self.__debug = False
         self.__trace = False
         self.__out = sys.stdout
-        today = datetime.now()
         self.__datestr = "%4.4d-%2.2d-%2.2d" % (today.year, today.month, today.day)
         self.__directory = "%s/%s" % (self.__base_output_dir, self.__datestr)
         #sys.stderr.write("Generating report in directory: %s\n" % directory)
@@ -53,6 +59,14 @@ class AzElRangeReportGenerator:
                     sys.stderr.write("Error making directory %s: %s" % (directory, e))
                     raise e
 
+            # Compute the inviews over all of the AER days at once (unless given), then split them into the days
+            self.__inview_calculator = InviewCalculator(self.__ground_station, self.__satellite_of_interest)
+            inviews = self.__inviews
+            if (inviews is None):
+                inviews = self.__inview_calculator.compute_inviews(self.__report_days.get_start_time(), \
+                                                                   self.__report_days.get_end_time())
+            self.__day_inviews = self.__report_days.split_periods(inviews)
+
             for i in range(0, self.__aer_days):
                 filename = "%s/aer-day%d-gs%d-sat%s.html" % (self.__directory, i, self.__gs_number, self.__satellite_of_interest.get_satellite_number())
                 #sys.stderr.write("Generating report: %s\n" % filename)
@@ -64,20 +78,9 @@ class AzElRangeReportGenerator:
 
         speed_of_light = 300000 # km/s
         # ALL TIMES ARE IN THE TIMEZONE self.__tz !!
-        # Determine the time range for the requested day
-        day_date = datetime.now() + timedelta(days=day)
-        day_year = day_date.year
-        day_month = day_date.month
-        day_day = day_date.day
-        start_time = self.__tz.localize(
-            datetime(day_year, day_month, day_day, 0, 0, 0))
-        end_time = self.__tz.localize(
-            datetime(day_year, day_month, day_day, 23, 59, 59))
-        
-        # Get the InviewCalculator and compute the inviews
-        base_ic = InviewCalculator(self.__ground_station, self.__satellite_of_interest)
-        base_inviews = []
-        base_inviews = base_ic.compute_inviews(start_time, end_time)
+        # The inviews were computed over all of the AER days at once (see generate_report)
+        base_ic = self.__inview_calculator
+        base_inviews = self.__day_inviews[day]
 
         if (self.__ground_station.get_name() != ""):
             station_name = self.__ground_station.get_name()
@@ -91,7 +94,7 @@ class AzElRangeReportGenerator:
         self.__out.write("  </head>\n")
         self.__out.write("  <body>\n")
 
-        report_date = datetime.now() + timedelta(days=day)
+        report_date = self.__report_days.get_day_date(day)
         title = "Azimuth, Elevation, Range Report from Ground Station %s to Satellite %s for Day %s (%04d-%02d-%02d)" % \
                 (station_name, self.__satellite_of_interest.get_satellite_name(), day, \
                  report_date.year, report_date.month, report_date.day)
@@ -107,7 +110,7 @@ class AzElRangeReportGenerator:
             start_time = iv[0].astimezone(self.__tz)
             end_time = iv[1].astimezone(self.__tz)
             i = i + 1
-            self.__out.write("    <li>Goto: <a href=\"#inview%d\">Inview #%d (%s to %s)</a></li>\n" % (i, i, start_time, end_time))
+            self.__out.write("    <li>Goto: <a href=\"#inview%d\">Inview #%d (%s to %s)%s</a></li>\n" % (i, i, start_time, end_time, ReportDays.split_text(iv[3])))
         self.__out.write("    </ul>\n")
 
         i = 0
@@ -123,9 +126,11 @@ class AzElRangeReportGenerator:
             tx_freq = self.__satellite_of_interest.get_transmit_frequency()
             if (tx_freq is not None):
                 sat_string = sat_string + " (Transmit Frequency %8.3f)" % (tx_freq)
-            self.__out.write("    <h3><a name=\"inview%d\">%s to %s inview #%d (%s to %s)</a></h3>\n" % \
-                    (i, station_name, sat_string, i, start_time, end_time))
-            azels = base_ic.compute_azels(iv[0], iv[1], self.__time_step_seconds)
+            self.__out.write("    <h3><a name=\"inview%d\">%s to %s inview #%d (%s to %s)%s</a></h3>\n" % \
+                    (i, station_name, sat_string, i, start_time, end_time, ReportDays.split_text(iv[3])))
+            # Range rates (and so Doppler shifts) come from the relative velocity, exact at every time
+            records = base_ic.compute_azel_array(iv[0], iv[1], self.__time_step_seconds)
+            azels = base_ic.azels_from_array(records)
             self.__out.write("    <table border='1'><tr><td>\n")
             self.__out.write("    <pre><code>\n")
             out_string = "      Time (%-19s, Azimuth, Elevation, Range(km), Rng Rt(km/s)" % (str(self.__tz) + ")")
@@ -134,33 +139,19 @@ class AzElRangeReportGenerator:
             if (tx_freq is not None):
                 out_string = out_string + ",  Recv Freq"
             self.__out.write("%s\n" % out_string)
-            prev_rng = None
-            for azel in azels:
-                if (prev_rng is None):
-                    rr_string = "--------"
-                    if (rx_freq is not None):
-                        tx_string = ",   --------"
-                    else:
-                        tx_string = ""
-                    if (tx_freq is not None):
-                        rx_string = ",   --------"
-                    else:
-                        rx_string = ""
+            for (azel, range_rate) in zip(azels, records['range_rate'].tolist()):
+                rr_string = "%8.5f" % range_rate
+                if (rx_freq is not None):
+                    freq = rx_freq * (1 + range_rate / speed_of_light)
+                    tx_string = ",   %8.3f" % freq
+                else:
+                    tx_string = ""
+                if (tx_freq is not None):
+                    freq = tx_freq * (1 - range_rate / speed_of_light)
+                    rx_string = ",   %8.3f" % freq
                 else:
-                    range_rate = (azel[3] - prev_rng) / self.__time_step_seconds
-                    rr_string = "%8.5f" % range_rate
-                    if (rx_freq is not None):
-                        freq = rx_freq * (1 + range_rate / speed_of_light)
-                        tx_string = ",   %8.3f" % freq
-                    else:
-                        tx_string = ""
-                    if (tx_freq is not None):
-                        freq = tx_freq * (1 - range_rate / speed_of_light)
-                        rx_string = ",   %8.3f" % freq
-                    else:
-                        rx_string = ""
+                    rx_string = ""
                 self.__out.write("      %s, %7.2f,    %6.2f,   %7.1f,     %8.8s%s%s\n" % (azel[0].astimezone(self.__tz), azel[1], azel[2], azel[3], rr_string, tx_string, rx_string)) # convert to specified time zone
-                prev_rng = azel[3]
             self.__out.write("    </pre></code>\n")
             self.__out.write("    </td><td>")
             self.__out.write("    <b><p id=\"time%d\" align=\"center\"></p></b>\n" % i)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+from datetime import datetime
+import geomag
+import aacgmv2
+from satellite_tle import SatelliteTle
+from geomagnetic_field import GeomagneticField
+
+###############################################################################
+# Script to compare the accuracy and speed of the geomagnetic_field module's
+# modes with the original row by row computation (geomag's GeoMag and
+# aacgmv2's get_aacgm_coord for each row of the MAG table) along a day of
+# the STF-1 first contact golden TLE's track:
+#  - exact:  must agree with the row by row computation to well within the
+#    precision the MAG table is printed with
+#  - grid:  timed computing the grid of the date and again using it (as
+#    every other satellite and table on the same date does)
+# For each field the largest and the 99th percentile differences are
+# printed (magnetic coordinates are NaN where AACGM-v2 is undefined, near
+# the magnetic equator... only rows where both are defined are compared).
+#
+# Syntax:  benchmark_geomagnetic_field.py [golden TLE file] [time step seconds]
+###############################################################################
+
+def main():
+    """Main function... makes 'forward declarations' of helper functions unnecessary"""
+    tle_file = "../config/first_contact_20181219_golden.tle"
+    if (len(sys.argv) > 1):
+        tle_file = sys.argv[1]
+    time_step_seconds = 10
+    if (len(sys.argv) > 2):
+        time_step_seconds = float(sys.argv[2])
+    st = SatelliteTle(43852, tle_file=tle_file) # STF-1
+    (seconds, lon, lat, alt) = st.compute_lonlatalt_arrays(start_time, start_time.replace(hour=23, minute=59, second=59), time_step_seconds)
+    times = np.datetime64(0, 'us') + np.round(seconds * 1e6).astype(np.int64).astype('timedelta64[us]')
+    print("%d points (%s second steps from %s)" % (len(times), time_step_seconds, start_time))
+
+    start = time.time()
+    rows = compute_rows(times, lon, lat, alt)
+    row_seconds = time.time() - start
+    print("Row by row:  %.3f seconds" % row_seconds)
+
+    failures = 0
+    start = time.time()
+    exact = GeomagneticField(GeomagneticField.ExactMode).compute(times, lon, lat, alt)
+    exact_seconds = time.time() - start
+    print("Exact:  %.3f seconds (%.1f times faster)" % (exact_seconds, row_seconds / exact_seconds))
+    for (name, values, row_values) in zip(GeomagneticField.FieldNames, exact, rows):
+        (largest, percentile) = differences(name, values, row_values)
+        passed = (largest <= tolerances[name])
+        if (not passed):
+            failures = failures + 1
+        print("  %s %-20s largest %.6f, 99%% %.6f" % ("ok  " if passed else "FAIL", name, largest, percentile))
+
+    grid_field = GeomagneticField(GeomagneticField.GridMode)
+    start = time.time()
+    grid_field.compute(times, lon, lat, alt)
+    first_seconds = time.time() - start
+    start = time.time()
+    grid = grid_field.compute(times, lon, lat, alt)
+    grid_seconds = time.time() - start
+    print("Grid:  %.3f seconds computing the grid, then %.3f seconds (%.1f times faster)" % \
+          (first_seconds, grid_seconds, row_seconds / grid_seconds))
+    for (name, values, row_values) in zip(GeomagneticField.FieldNames, grid, rows):
+        (largest, percentile) = differences(name, values, row_values)
+        print("       %-20s largest %.6f, 99%% %.6f" % (name, largest, percentile))
+
+    if (failures > 0):
+        print("%d FAILURES" % failures)
+        sys.exit(1)
+    print("The exact geomagnetic field agrees with the row by row computation")
+
+def compute_rows(times, lon, lat, alt):
+    """Function to compute the geomagnetic data row by row, as the MAG table originally was"""
+    gm = geomag.geomag.GeoMag()
+    rows = []
+    for (i, time) in enumerate(times.astype(datetime)):
+        mag = gm.GeoMag(lat[i], lon[i], alt[i] * km_to_feet, time.date())
+        try:
+            aacgm = aacgmv2.get_aacgm_coord(lat[i], lon[i], alt[i], time)
+        except ValueError:
+            aacgm = (np.nan, np.nan, np.nan) # undefined
+        rows.append([mag.dec, mag.dip, mag.ti, mag.bh, mag.bx, mag.by, mag.bz, aacgm[0], aacgm[1], aacgm[2]])
+    return np.array(rows, dtype=np.float64).T
+
+def differences(name, values, row_values):
+    """Function to get the largest and 99th percentile absolute differences (angles wrapped) where both are defined"""
+    difference = values - row_values
+    if (name in ['declination', 'magnetic_longitude']):
+        difference = (difference + 180.0) % 360.0 - 180.0
+    elif (name == 'magnetic_local_time'):
+        difference = (difference + 12.0) % 24.0 - 12.0
+    difference = np.abs(difference[np.isfinite(difference)])
+    if (len(difference) == 0):
+        return (0.0, 0.0)
+    return (np.max(difference), np.percentile(difference, 99))
+
+# Constants
+start_time = datetime(2018, 12, 20)
+km_to_feet = 3280.84
+tolerances = {'declination':0.001, 'inclination':0.001, 'total_intensity':0.01, 'horizontal':0.01, 'north':0.01, \
+              'east':0.01, 'vertical':0.01, 'magnetic_latitude':0.001, 'magnetic_longitude':0.001, \
+              'magnetic_local_time':0.0001} # well within the printed precision
+
+# Python idiom to eliminate the need for forward declarations
+if __name__=="__main__":
+   main()
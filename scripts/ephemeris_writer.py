@@ -0,0 +1,242 @@
+import sys
+import json
+import zipfile
+from math import ceil
+from datetime import datetime, timedelta
+from pytz import UTC
+import numpy as np
+from inview_calculator import InviewCalculator
+from reference_frames import ReferenceFrames
+
+###############################################################################
+# Python module to compute tables of satellite ephemeris products (ECI and
+# ECEF ephemerides, lon/lat/alts, az/el/ranges from a ground station, and
+# geomagnetic data) for any number of satellites and write them as they
+# are computed:  the table times are computed in chunks of a bounded number
+# of points (one vectorized propagation each) and every chunk is written
+# before the next one is computed, so month long one second tables for
+# several satellites take no more memory than one chunk.
+#
+# Output formats:
+#  - text:  the tables get_satellite_ephemerides.py has always printed
+#  - csv:  a header line, then satellite number, ISO 8601 UTC time, values
+#  - ndjson:  one JSON object per line (newline delimited JSON)
+#  - npy:  one NumPy structured array (satellite_number, time in UTC epoch
+#    seconds, values) of every satellite's table, written as it grows
+#  - npz:  one NumPy structured array per satellite (named by satellite
+#    number) in a zip file, e.g. np.load(file)['43852']
+#
+# Here are some reference URLs:
+# https://numpy.org/doc/stable/reference/generated/numpy.lib.format.html
+# https://github.com/ndjson/ndjson-spec
+###############################################################################
+
+class EphemerisWriterException(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+class EphemerisWriter:
+    """Class to compute tables of satellite ephemeris products in bounded size chunks and stream them to a file (or stdout)"""
+    # Constructor
+    def __init__(self, output_format=None, chunk_points=86400, mag_mode=None):
+        """Constructor:  output_format is one of Formats (default TextFormat), chunk_points is the most table points computed (and held) at once, mag_mode is how MagProduct is computed (a GeomagneticField mode, default exact)"""
+        if (output_format is None):
+            output_format = self.TextFormat
+        if (output_format not in self.Formats):
+            raise EphemerisWriterException('Unknown output format %s (should be one of %s)' % (output_format, ", ".join(self.Formats)))
+        self.__output_format = output_format
+        self.__chunk_points = max(1, int(chunk_points))
+        self.__mag_mode = mag_mode
+        self.__geomagnetic_field = None # created the first time MagProduct is computed
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'Ephemeris Writer:\n' \
+              'output format=%s, chunk points=%d' % \
+              (self.__output_format, self.__chunk_points)
+        return out
+
+    def get_output_format(self):
+        return self.__output_format
+
+    def get_chunk_points(self):
+        return self.__chunk_points
+
+    def get_record_type(self, product):
+        """Method to get the NumPy structured array type of the records of a product (satellite_number, time in UTC epoch seconds, then the product's values)"""
+        return np.dtype([('satellite_number', np.int32), ('time', np.float64)] + \
+                        [(name, np.float64) for name in self.__products[product][0]])
+
+    def write(self, output, product, satellite_tle_list, in_start_time, in_end_time, time_step_seconds, ground_station=None):
+        """Method to compute a product's table (one of Products) for each satellite (SatelliteTle) at every time step from the start time through the end time (like SatelliteTle.compute_ephemeris_table) and write it to output, a file name (None for stdout, which the npy and npz formats cannot use).  AerProduct needs the ground_station (GroundStation)."""
+        if (product not in self.Products):
+            raise EphemerisWriterException('Unknown product %s (should be one of %s)' % (product, ", ".join(self.Products)))
+        if (product == self.AerProduct) and (ground_station is None):
+            raise EphemerisWriterException('The %s product needs a ground station' % product)
+        if (output is None) and (self.__output_format in [self.NpyFormat, self.NpzFormat]):
+            raise EphemerisWriterException('The %s format needs an output file' % self.__output_format)
+        try:
+            delta = timedelta(seconds=time_step_seconds)
+        except:
+            delta = timedelta(seconds=60)
+        chunks = self.split_table_times(in_start_time, in_end_time, delta.total_seconds(), self.__chunk_points)
+        if (self.__output_format == self.NpyFormat):
+            self.__write_npy(output, product, satellite_tle_list, chunks, delta, ground_station)
+        elif (self.__output_format == self.NpzFormat):
+            self.__write_npz(output, product, satellite_tle_list, chunks, delta, ground_station)
+        elif (output is None):
+            self.__write_lines(sys.stdout, product, satellite_tle_list, chunks, delta, ground_station)
+        else:
+            with open(output, "w") as out:
+                self.__write_lines(out, product, satellite_tle_list, chunks, delta, ground_station)
+
+    def __compute_chunks(self, product, st, chunks, delta, ground_station):
+        """Private method to compute a satellite's table one chunk at a time (a generator of structured arrays of get_record_type)"""
+        seconds = delta.total_seconds()
+        for (chunk_start, chunk_end, count) in chunks:
+            if (product in [self.EciProduct, self.EcefProduct]):
+                (times, pos, vel) = st.compute_ephemeris_arrays(chunk_start, chunk_end, seconds)
+                if (product == self.EcefProduct):
+                    (pos, vel) = [state.T for state in ReferenceFrames.eci_to_ecef(self.__datetime64(times), pos.T, vel.T)]
+                values = [pos[:, 0], pos[:, 1], pos[:, 2], vel[:, 0], vel[:, 1], vel[:, 2]]
+            elif (product == self.LlaProduct):
+                (times, lon, lat, alt) = st.compute_lonlatalt_arrays(chunk_start, chunk_end, seconds)
+                values = [lat, lon, alt]
+            elif (product == self.AerProduct):
+                azels = InviewCalculator(ground_station, st).compute_azel_array(chunk_start, chunk_end, seconds)
+                times = (azels['time'] - np.datetime64(0, 'us')) / np.timedelta64(1, 's')
+                values = [azels[name] for name in self.__products[product][0]]
+            else:
+                (times, lon, lat, alt) = st.compute_lonlatalt_arrays(chunk_start, chunk_end, seconds)
+                values = [lat, lon, alt] + self.__compute_mag(times, lon, lat, alt)
+            records = np.zeros(len(times), dtype=self.get_record_type(product))
+            records['satellite_number'] = int(st.get_satellite_number())
+            records['time'] = times
+            for (name, value) in zip(self.__products[product][0], values):
+                records[name] = value
+            yield records
+
+    def __compute_mag(self, times, lon, lat, alt):
+        """Private method to compute the geomagnetic data (see MagProduct) at the lon/lat/alts and UTC epoch seconds times, all at once"""
+        if (self.__geomagnetic_field is None):
+            # The geomagnetic libraries are only needed (so only imported) for this product
+            from geomagnetic_field import GeomagneticField
+            self.__geomagnetic_field = GeomagneticField(self.__mag_mode)
+        return self.__geomagnetic_field.compute(self.__datetime64(times), lon, lat, alt)
+
+    def __write_lines(self, out, product, satellite_tle_list, chunks, delta, ground_station):
+        """Private method to write the tables in a line oriented format (text, csv, ndjson)"""
+        (names, text_header, text_row, text_tz) = self.__products[product]
+        text_values = text_row.count('%') # the text rows may leave out the last values
+        if (self.__output_format == self.CsvFormat):
+            out.write("satellite_number,time,%s\n" % ",".join(names))
+        for st in satellite_tle_list:
+            if (self.__output_format == self.TextFormat):
+                title = product.upper()
+                if (len(satellite_tle_list) > 1):
+                    title = "%s (Satellite Number: %s)" % (title, st.get_satellite_number())
+                out.write("===== %s =====\n%s\n" % (title, text_header))
+            for records in self.__compute_chunks(product, st, chunks, delta, ground_station):
+                times = self.__datetime64(records['time'])
+                if (self.__output_format == self.TextFormat):
+                    lines = [("%s, " + text_row) % ((time.replace(tzinfo=text_tz),) + tuple(record)[2:2 + text_values]) \
+                             for (time, record) in zip(times.astype(datetime), records.tolist())]
+                elif (self.__output_format == self.CsvFormat):
+                    lines = ["%d,%sZ,%s" % (record[0], time, ",".join([repr(value) for value in record[2:]])) \
+                             for (time, record) in zip(np.datetime_as_string(times), records.tolist())]
+                else:
+                    lines = [json.dumps(dict([('satellite_number', record[0]), ('time', time + "Z")] + \
+                                             [(name, self.__json_value(value)) for (name, value) in zip(names, record[2:])])) \
+                             for (time, record) in zip(np.datetime_as_string(times), records.tolist())]
+                if (len(lines) > 0):
+                    out.write("\n".join(lines) + "\n")
+                out.flush()
+
+    def __write_npy(self, output, product, satellite_tle_list, chunks, delta, ground_station):
+        """Private method to write every satellite's table as one .npy array, chunk by chunk"""
+        npoints = sum([count for (chunk_start, chunk_end, count) in chunks]) * len(satellite_tle_list)
+        with open(output, "wb") as out:
+            self.__write_array_header(out, product, npoints)
+            for st in satellite_tle_list:
+                for records in self.__compute_chunks(product, st, chunks, delta, ground_station):
+                    out.write(records.tobytes())
+
+    def __write_npz(self, output, product, satellite_tle_list, chunks, delta, ground_station):
+        """Private method to write each satellite's table as an array (named by satellite number) in a .npz file, chunk by chunk"""
+        npoints = sum([count for (chunk_start, chunk_end, count) in chunks])
+        with zipfile.ZipFile(output, "w", allowZip64=True) as npz:
+            for st in satellite_tle_list:
+                with npz.open("%s.npy" % st.get_satellite_number(), "w", force_zip64=True) as out:
+                    self.__write_array_header(out, product, npoints)
+                    for records in self.__compute_chunks(product, st, chunks, delta, ground_station):
+                        out.write(records.tobytes())
+
+    def __write_array_header(self, out, product, npoints):
+        np.lib.format.write_array_header_1_0(out, {'descr':np.lib.format.dtype_to_descr(self.get_record_type(product)), \
+                                                   'fortran_order':False, 'shape':(npoints,)})
+
+    def __json_value(self, value):
+        """Private method to make a value JSON friendly (NaN, e.g. after a satellite decays, is null)"""
+        if (value != value):
+            return None
+        return value
+
+    def __datetime64(self, times):
+        """Private method to convert UTC epoch seconds to naive UTC numpy datetime64"""
+        return np.datetime64(0, 'us') + np.round(np.asarray(times) * 1e6).astype(np.int64).astype('timedelta64[us]')
+
+    # Class Methods
+    @classmethod
+    def split_table_times(cls, in_start_time, in_end_time, time_step_seconds, chunk_points):
+        """Method to split the times of a table (every time step from the start time while before the end time plus a time step, like SatelliteTle.compute_ephemeris_table) into chunks of at most chunk_points times.  Returns a list of (chunk start, chunk end, number of times) with naive UTC datetimes."""
+        start_time = cls.__time_to_naiveUTC(in_start_time)
+        end_time = cls.__time_to_naiveUTC(in_end_time)
+        delta = timedelta(seconds=time_step_seconds)
+        npoints = max(0, int(ceil((end_time + delta - start_time).total_seconds() / delta.total_seconds())))
+        chunks = []
+        for first in range(0, npoints, chunk_points):
+            count = min(chunk_points, npoints - first)
+            chunks.append((start_time + first * delta, start_time + (first + count - 1) * delta, count))
+        return chunks
+
+    @staticmethod
+    def __time_to_naiveUTC(in_time):
+        """Private method to convert (if necessary) a time (potentially with timezone) to a naive time that is UTC."""
+        if (in_time.tzinfo is not None):
+            temp = in_time.astimezone(UTC)
+            in_time = datetime(temp.year, temp.month, temp.day, temp.hour, temp.minute, temp.second)
+        return in_time
+
+    # Class member constants
+    TextFormat = "text"
+    CsvFormat = "csv"
+    NdjsonFormat = "ndjson"
+    NpyFormat = "npy"
+    NpzFormat = "npz"
+    Formats = [TextFormat, CsvFormat, NdjsonFormat, NpyFormat, NpzFormat]
+    EciProduct = "eci"
+    EcefProduct = "ecef"
+    LlaProduct = "lla"
+    AerProduct = "aer"
+    MagProduct = "mag"
+    Products = [EciProduct, EcefProduct, LlaProduct, AerProduct, MagProduct]
+    __ephemeris_text_header = "Time, X,Y,Z in km, VX,VY,VZ in km/s (%s Coordinates)"
+    __ephemeris_text_row = "%16.8f,%16.8f,%16.8f, %13.9f,%13.9f,%13.9f"
+    # (value names, text header, text row format, text time zone) by product... the text rows only have the values their
+    # format has (the AER text table keeps its original columns, the range rate is only in the other formats), with naive
+    # UTC times unless the text time zone is given (the AER text table has always had aware UTC times)
+    __products = {EciProduct:(['x', 'y', 'z', 'vx', 'vy', 'vz'], __ephemeris_text_header % "ECI", __ephemeris_text_row, None), \
+                  EcefProduct:(['x', 'y', 'z', 'vx', 'vy', 'vz'], __ephemeris_text_header % "ECEF", __ephemeris_text_row, None), \
+                  LlaProduct:(['latitude', 'longitude', 'altitude'], \
+                              "Time, lat,lon,alt (geodetic degrees, km above WGS-84 ellipsoid)", "%6.2f,%8.2f,%9.2f", None), \
+                  AerProduct:(['azimuth', 'elevation', 'range', 'range_rate'], \
+                              "Time, azimuth (degrees), elevation (degrees), range (km)", "%6.2f,%8.2f,%9.2f", UTC), \
+                  MagProduct:(['latitude', 'longitude', 'altitude', 'declination', 'inclination', 'total_intensity', \
+                               'horizontal', 'north', 'east', 'vertical', 'magnetic_latitude', 'magnetic_longitude', \
+                               'magnetic_local_time'], \
+                              "Time (UTC), geodetic latitude (degrees), geodetic longitude (degrees), alt (km above WGS-84 ellipsoid), magnetic declination (degrees), inclination (degrees), total intensity (nT), horizontal (nT), north (nT), east (nT), vertical (nT), magnetic latitude (degrees), magnetic longitude (degrees), magnetic local time (hours)", \
+                              "%6.2f, %8.2f, %9.2f, %6.2f, %8.2f, %7.1f, %7.1f, %7.1f, %7.1f, %7.1f, %6.2f, %8.2f, %5.2f", None)}
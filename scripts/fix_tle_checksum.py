@@ -16,13 +16,17 @@ def checksum(line):
 def fix(line):
     return line[:68] + str(checksum(line[:68]))
 
-# Assumes at least 3 lines - line 1 is sat #/sat name/anything, line 2 is TLE line 1, line 3 is TLE line 2, and the rest of the lines are anything you want
-lines = sys.stdin.readlines()[:]
-sys.stdout.write(lines[0])
-sys.stdout.write(fix(lines[1]))
-sys.stdout.write("\n")
-sys.stdout.write(fix(lines[2]))
-sys.stdout.write("\n")
-for i in range(3, len(lines)):
-  sys.stdout.write(lines[i])
+def main():
+    # Assumes at least 3 lines - line 1 is sat #/sat name/anything, line 2 is TLE line 1, line 3 is TLE line 2, and the rest of the lines are anything you want
+    lines = sys.stdin.readlines()[:]
+    sys.stdout.write(lines[0])
+    sys.stdout.write(fix(lines[1]))
+    sys.stdout.write("\n")
+    sys.stdout.write(fix(lines[2]))
+    sys.stdout.write("\n")
+    for i in range(3, len(lines)):
+      sys.stdout.write(lines[i])
 
+# Python idiom to eliminate the need for forward declarations
+if __name__=="__main__":
+   main()
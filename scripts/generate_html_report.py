@@ -2,10 +2,15 @@
 import sys
 import json
 import tempfile
+from multiprocessing.pool import ThreadPool
 from pytz import timezone
 from configuration import Configuration
 from satellite_tle import SatelliteTle
+from tle_fetcher import TleFetcher
 from ground_station import GroundStation
+from ground_station_schedule_directory import GroundStationScheduleDirectory
+from ground_station_tracking_schedule import GroundStationTrackingSchedule
+from report_days import ReportDays
 from satellite_html_report_generator import SatelliteHtmlReportGenerator
 from ground_station_html_report_generator import GroundStationHtmlReportGenerator
 from angular_separation_report import AngularSeparationReportGenerator
@@ -23,6 +28,9 @@ def main():
     with open(conf_file) as json_data_file:
         data = json.load(json_data_file)
 
+    # All of the satellites in the report share the (cached) TLE downloads
+    TleFetcher.set_default(TleFetcher.from_config(data))
+
     base_output_dir = Configuration.get_config_directory(data.get('base_output_directory',tempfile.gettempdir()))
     tz = Configuration.get_config_timezone(data.get('timezone','US/Eastern'))
     inviews = Configuration.get_config_boolean(data.get('inviews','false'))
@@ -32,6 +40,8 @@ def main():
     end_day = Configuration.get_config_int(data.get('end_day','0'), -180, 180, 0)
     time_step_seconds = Configuration.get_config_float(data.get('time_step_seconds','15'), 1, 600, 15)
 
+    prefetch(contacts, tz, start_day, end_day, data)
+
     if (data['report_type'] == "Satellite HTML"):
         create_satellite_html_report(base_output_dir, tz, inviews, contacts, insun, start_day, end_day, time_step_seconds, data)
     elif (data['report_type'] == "Ground Station HTML"):
@@ -47,6 +57,44 @@ def main():
     else:
         sys.stderr.write("Unsupported report type:  %s.\n" % data['report_type'])
  
+def prefetch(contacts, tz, start_day, end_day, data):
+    """Function to fetch every TLE URL and (for contacts) load the latest schedule workbook of every contact schedule directory for every report day in the configuration in parallel, before generating the report"""
+    satellites = collect_entries(satellite_keys, data)
+    tle_urls = [sat.get('url') for sat in satellites if (sat.get('url', None) is not None)]
+    schedule_directories = []
+    if (contacts):
+        for gs in collect_entries(ground_station_keys, data):
+            schedule_directory = GroundStationScheduleDirectory.for_directory(gs.get('contact_schedule_directory', None))
+            if (schedule_directory not in schedule_directories):
+                schedule_directories.append(schedule_directory)
+    report_days = ReportDays(tz, start_day, end_day)
+    dates = [report_days.get_day_period(day)[0].date() for day in report_days.get_days()]
+
+    # One thread fetches the TLE URLs (in parallel threads of its own) while the others index the schedule
+    # directories and then load the schedule workbooks the report reads
+    pool = ThreadPool(prefetch_threads)
+    try:
+        tle_result = pool.apply_async(TleFetcher.get_default().prefetch, (tle_urls,))
+        schedule_files = []
+        for fnames in pool.map(lambda schedule_directory: schedule_directory.get_latest_schedule_full_filenames_for_dates(dates), \
+                               schedule_directories):
+            schedule_files.extend([fname for fname in fnames if (fname not in schedule_files)])
+        pool.map(lambda fname: GroundStationTrackingSchedule.for_file(fname).load(), schedule_files)
+        tle_result.get()
+    finally:
+        pool.close()
+        pool.join()
+
+def collect_entries(keys, data):
+    """Function to collect the configuration entries (dictionaries) under any of the keys, each a single entry or a list of them"""
+    entries = []
+    for key in keys:
+        if (isinstance(data.get(key, None), list)):
+            entries.extend(data[key])
+        elif (isinstance(data.get(key, None), dict)):
+            entries.append(data[key])
+    return entries
+
 def create_satellite_html_report(base_output_dir, tz, inviews, contacts, insun, start_day, end_day, time_step_seconds, data):
     
     sat_tle = SatelliteTle.from_config(data.get('satellite',[]))
@@ -94,7 +142,9 @@ def create_az_el_range_report(base_output_dir, tz, start_day, end_day, data):
     sat_of_interest = SatelliteTle.from_config(data.get('satellite',[]))
     # sys.stderr.write(sat_of_interest.__repr__() + "\n") # debug
     time_step_seconds = Configuration.get_config_float(data.get('time_step_seconds','15'), 1, 600, 15)
-    aerg = AzElRangeReportGenerator(base_output_dir, ground_station, 0, sat_of_interest, tz, start_day, end_day, time_step_seconds)
+    # The AER days run from today (day 0) through the end day
+    aerg = AzElRangeReportGenerator(base_output_dir, ground_station, 0, sat_of_interest, tz, \
+                                    aer_days = max(0, end_day + 1), time_step_seconds = time_step_seconds)
     aerg.generate_report()
 
 def create_angular_separation_report(base_output_dir, tz, start_day, end_day, data):
@@ -109,6 +159,11 @@ def create_angular_separation_report(base_output_dir, tz, start_day, end_day, da
     asrg = AngularSeparationReportGenerator(base_output_dir, ground_station, sat_of_interest, other_sats, tz, start_day, end_day)
     asrg.generate_report()
 
+# Constants
+satellite_keys = ['satellite', 'satellites', 'satellite_of_interest', 'other_satellites'] # configuration keys of satellite entries
+ground_station_keys = ['ground_station', 'ground_stations'] # configuration keys of ground station entries
+prefetch_threads = 8
+
 # Python idiom to eliminate the need for forward declarations
 if __name__=="__main__":
    main()
@@ -0,0 +1,278 @@
+from datetime import datetime
+import numpy as np
+import geomag
+import aacgmv2
+
+###############################################################################
+# Python module to compute geomagnetic data along a satellite's track for
+# whole arrays of times and positions at once:  the magnetic field from the
+# World Magnetic Model (the model and coefficients of the geomag module) and
+# the altitude adjusted corrected geomagnetic (AACGM-v2) latitude, longitude
+# and magnetic local time (the aacgmv2 module).  There are two modes:
+#  - exact:  the geomag module's spherical harmonic expansion evaluated for
+#    all of the positions of a date at once (the geomag module only does
+#    one position a call) and the aacgmv2 module's array conversions, for
+#    all of the positions in each hour at once (the aacgmv2 module converts
+#    an array of positions for one time... the AACGM coefficients change by
+#    less than 0.001 degrees in an hour)
+#  - grid:  the same computations done once per date on a latitude,
+#    longitude, altitude grid (kept process wide for the other satellites and
+#    tables of the same date) and interpolated (trilinear) along the track...
+#    computing a grid takes seconds, so this is faster for long tables at
+#    small time steps (e.g. several satellites at one second steps), less
+#    accurate (see benchmark_geomagnetic_field.py), and the magnetic
+#    coordinates are unreliable within a grid cell or two of where AACGM-v2
+#    is undefined
+# The magnetic local time is computed exactly from the magnetic longitude
+# in both modes.  AACGM-v2 is undefined near the magnetic equator (more so
+# at higher altitudes), where the magnetic coordinates are NaN.
+#
+# Here are some reference URLs:
+# https://www.ncei.noaa.gov/products/world-magnetic-model
+# https://pypi.org/project/geomag/
+# https://aacgmv2.readthedocs.io/
+# http://superdarn.thayer.dartmouth.edu/aacgm.html
+###############################################################################
+
+class GeomagneticFieldException(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+class GeomagneticField:
+    """Class to compute the geomagnetic field and magnetic coordinates at arrays of times and positions"""
+    # Constructor
+    def __init__(self, mode=None, grid_degrees=1.0, grid_km=50.0):
+        """Constructor:  mode is ExactMode (the default) or GridMode, grid_degrees and grid_km are the latitude/longitude and altitude spacing of the GridMode grid"""
+        if (mode is None):
+            mode = self.ExactMode
+        if (mode not in self.Modes):
+            raise GeomagneticFieldException('Unknown geomagnetic field mode %s (should be one of %s)' % (mode, ", ".join(self.Modes)))
+        self.__mode = mode
+        self.__grid_degrees = float(grid_degrees)
+        self.__grid_km = float(grid_km)
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'Geomagnetic Field:\n' \
+              'mode=%s, grid=%s degrees, %s km' % \
+              (self.__mode, self.__grid_degrees, self.__grid_km)
+        return out
+
+    def get_mode(self):
+        return self.__mode
+
+    def compute(self, utc_times, lon, lat, alt):
+        """Method to compute the geomagnetic data at *naive* UTC times (numpy datetime64 array) and longitudes, latitudes (degrees, geodetic) and altitudes (km above the WGS-84 ellipsoid).  Returns a list of arrays in the order of FieldNames:  declination, inclination (degrees), total intensity, horizontal, north, east, vertical (nT), magnetic latitude, magnetic longitude (degrees), magnetic local time (hours)."""
+        times = np.asarray(utc_times, dtype='datetime64[us]')
+        (lon, lat, alt) = [np.asarray(values, dtype=np.float64) for values in (lon, lat, alt)]
+        (north, east, vertical) = [np.zeros(len(times)) for i in range(3)]
+        (mlat, mlon) = [np.zeros(len(times)) for i in range(2)]
+        dates = times.astype('datetime64[D]')
+        for date in np.unique(dates):
+            on_date = (dates == date)
+            if (self.__mode == self.GridMode):
+                fields = self.__interpolate(self.__get_grid(date, np.min(alt[on_date]), np.max(alt[on_date])), \
+                                            lat[on_date], lon[on_date], alt[on_date])
+                (north[on_date], east[on_date], vertical[on_date]) = fields[0:3] * self.__dipole_falloff(alt[on_date])
+                mlat[on_date] = fields[3]
+                mlon[on_date] = np.rad2deg(np.arctan2(fields[5], fields[4]))
+            else:
+                (north[on_date], east[on_date], vertical[on_date]) = \
+                        self.compute_field(date, lat[on_date], lon[on_date], alt[on_date])
+                hours = times[on_date].astype('datetime64[h]')
+                (date_mlat, date_mlon) = (np.zeros(len(hours)), np.zeros(len(hours)))
+                for hour in np.unique(hours):
+                    in_hour = (hours == hour)
+                    (date_mlat[in_hour], date_mlon[in_hour]) = \
+                            self.compute_magnetic_coordinates(hour, lat[on_date][in_hour], lon[on_date][in_hour], alt[on_date][in_hour])
+                (mlat[on_date], mlon[on_date]) = (date_mlat, date_mlon)
+        horizontal = np.sqrt(north * north + east * east)
+        total_intensity = np.sqrt(horizontal * horizontal + vertical * vertical)
+        declination = np.rad2deg(np.arctan2(east, north))
+        inclination = np.rad2deg(np.arctan2(vertical, horizontal))
+        return [declination, inclination, total_intensity, horizontal, north, east, vertical, \
+                mlat, mlon, self.compute_magnetic_local_times(times, mlon)]
+
+    def __get_grid(self, date, alt_low, alt_high):
+        """Private method to get the grid of a date covering the altitudes (computing it only the first time it is used, or again covering more altitudes if needed).  Returns (latitudes, longitudes, altitudes, values) with values a number of latitudes x number of longitudes x number of altitudes x 6 array of north, east, vertical, magnetic latitude, cosine and sine of magnetic longitude."""
+        key = (date, self.__grid_degrees, self.__grid_km)
+        levels = [int(np.floor(alt_low / self.__grid_km)), int(np.ceil(alt_high / self.__grid_km))]
+        grid = self.__grids.get(key, None)
+        if (grid is not None):
+            grid_levels = [int(round(grid[2][0] / self.__grid_km)), int(round(grid[2][-1] / self.__grid_km))]
+            if (grid_levels[0] <= levels[0]) and (levels[1] <= grid_levels[1]):
+                return grid
+            levels = [min(levels[0], grid_levels[0]), max(levels[1], grid_levels[1])]
+            del self.__grids[key]
+        lats = np.linspace(-90.0, 90.0, int(round(180.0 / self.__grid_degrees)) + 1)
+        lons = np.linspace(-180.0, 180.0, int(round(360.0 / self.__grid_degrees)) + 1)
+        alts = np.arange(levels[0], max(levels[1], levels[0] + 1) + 1) * self.__grid_km
+        (grid_lat, grid_lon, grid_alt) = [values.ravel() for values in np.meshgrid(lats, lons, alts, indexing='ij')]
+        (north, east, vertical) = self.compute_field(date, grid_lat, grid_lon, grid_alt)
+        # The magnetic coordinates for the middle of the date
+        (mlat, mlon) = self.compute_magnetic_coordinates(date + np.timedelta64(12, 'h'), grid_lat, grid_lon, grid_alt)
+        # The field falls off like a dipole's (1/r^3), which is taken out before interpolating
+        falloff = self.__dipole_falloff(grid_alt)
+        values = np.stack([north / falloff, east / falloff, vertical / falloff, mlat, np.cos(np.deg2rad(mlon)), np.sin(np.deg2rad(mlon))], axis=-1)
+        values = values.reshape((len(lats), len(lons), len(alts), 6))
+        values.flags.writeable = False
+        if (len(self.__grids) >= self.__maximum_grids):
+            del self.__grids[next(iter(self.__grids))] # forget the oldest grid
+        self.__grids[key] = (lats, lons, alts, values)
+        return self.__grids[key]
+
+    def __interpolate(self, grid, lat, lon, alt):
+        """Private method to interpolate (trilinear) the values of a grid (see __get_grid) at latitudes, longitudes and altitudes.  Returns a 6 x number of positions array."""
+        (lats, lons, alts, values) = grid
+        (i, lat_weight) = self.__cell(lats, lat)
+        (j, lon_weight) = self.__cell(lons, lon)
+        (k, alt_weight) = self.__cell(alts, alt)
+        result = 0.0
+        for (di, wi) in [(0, 1.0 - lat_weight), (1, lat_weight)]:
+            for (dj, wj) in [(0, 1.0 - lon_weight), (1, lon_weight)]:
+                for (dk, wk) in [(0, 1.0 - alt_weight), (1, alt_weight)]:
+                    result = result + values[i + di, j + dj, k + dk] * (wi * wj * wk)[:, np.newaxis]
+        return result.T
+
+    def __dipole_falloff(self, alt):
+        """Private method to get how much weaker a dipole field is at altitudes (km) than at the earth's surface"""
+        return (self.__earth_radius / (self.__earth_radius + alt)) ** 3
+
+    def __cell(self, axis, values):
+        """Private method to find the grid cells (index of the lower grid point) of values along an evenly spaced axis and the weights of the upper grid points"""
+        position = (values - axis[0]) / (axis[1] - axis[0])
+        index = np.clip(np.floor(position).astype(np.int64), 0, len(axis) - 2)
+        return (index, position - index)
+
+    # Class Methods
+    @classmethod
+    def compute_field(cls, date, lat, lon, alt):
+        """Method to compute the magnetic field north, east, and vertical (down) components (nT) on a date (numpy datetime64 or date) at latitudes, longitudes (degrees, geodetic) and altitudes (km above the WGS-84 ellipsoid)... the geomag module's GeoMag computation (World Magnetic Model) for arrays of positions"""
+        gm = cls.__get_geomag()
+        date = np.datetime64(date, 'D').astype(datetime)
+        dt = date.year + ((date - date.replace(month=1, day=1)).days / 365.0) - gm.epoch
+        maxord = gm.maxord
+        # Convert from geodetic to spherical coordinates
+        rlat = np.deg2rad(lat)
+        rlon = np.deg2rad(lon)
+        srlat = np.sin(rlat)
+        crlat = np.cos(rlat)
+        srlat2 = srlat * srlat
+        crlat2 = crlat * crlat
+        q = np.sqrt(gm.a2 - gm.c2 * srlat2)
+        q1 = alt * q
+        q2 = ((q1 + gm.a2) / (q1 + gm.b2)) * ((q1 + gm.a2) / (q1 + gm.b2))
+        ct = srlat / np.sqrt(q2 * crlat2 + srlat2)
+        st = np.sqrt(1.0 - (ct * ct))
+        r2 = (alt * alt) + 2.0 * q1 + (gm.a4 - gm.c4 * srlat2) / (q * q)
+        r = np.sqrt(r2)
+        d = np.sqrt(gm.a2 * crlat2 + gm.b2 * srlat2)
+        ca = (alt + d) / r
+        sa = gm.c2 * crlat * srlat / (r * d)
+        sp = [np.zeros_like(rlon), np.sin(rlon)]
+        cp = [np.ones_like(rlon), np.cos(rlon)]
+        for m in range(2, maxord + 1):
+            sp.append(sp[1] * cp[m - 1] + cp[1] * sp[m - 1])
+            cp.append(cp[1] * cp[m - 1] - sp[1] * sp[m - 1])
+        # Time adjust the Gauss coefficients
+        tc = np.array(gm.c) + dt * np.array(gm.cd)
+        # Accumulate the terms of the spherical harmonic expansions, with the
+        # unnormalized associated Legendre polynomials (and derivatives) by
+        # recursion... p[(m, n)]
+        p = {(0, 0):np.ones_like(ct)}
+        dp = {(0, 0):np.zeros_like(ct)}
+        pp = [np.ones_like(ct)] # for the geographic poles
+        aor = gm.re / r
+        ar = aor * aor
+        (br, bt, bp, bpp) = (0.0, 0.0, 0.0, 0.0)
+        for n in range(1, maxord + 1):
+            ar = ar * aor
+            for m in range(0, n + 1):
+                if (n == m):
+                    p[(m, n)] = st * p[(m - 1, n - 1)]
+                    dp[(m, n)] = st * dp[(m - 1, n - 1)] + ct * p[(m - 1, n - 1)]
+                elif (n == 1) and (m == 0):
+                    p[(m, n)] = ct * p[(m, n - 1)]
+                    dp[(m, n)] = ct * dp[(m, n - 1)] - st * p[(m, n - 1)]
+                else:
+                    (p2, dp2) = (p.get((m, n - 2), 0.0), dp.get((m, n - 2), 0.0))
+                    if (m > n - 2):
+                        (p2, dp2) = (0.0, 0.0)
+                    p[(m, n)] = ct * p[(m, n - 1)] - gm.k[m][n] * p2
+                    dp[(m, n)] = ct * dp[(m, n - 1)] - st * p[(m, n - 1)] - gm.k[m][n] * dp2
+                par = ar * p[(m, n)]
+                if (m == 0):
+                    temp1 = tc[m][n] * cp[m]
+                    temp2 = tc[m][n] * sp[m]
+                else:
+                    temp1 = tc[m][n] * cp[m] + tc[n][m - 1] * sp[m]
+                    temp2 = tc[m][n] * sp[m] - tc[n][m - 1] * cp[m]
+                bt = bt - ar * temp1 * dp[(m, n)]
+                bp = bp + (gm.fm[m] * temp2 * par)
+                br = br + (gm.fn[n] * temp1 * par)
+                if (m == 1):
+                    if (n == 1):
+                        pp.append(pp[n - 1])
+                    else:
+                        pp.append(ct * pp[n - 1] - gm.k[m][n] * pp[n - 2])
+                    bpp = bpp + (gm.fm[m] * temp2 * ar * pp[n])
+        at_pole = (st == 0.0)
+        bp = np.where(at_pole, bpp, bp / np.where(at_pole, 1.0, st))
+        # Rotate the magnetic vector components from spherical to geodetic coordinates
+        return (-bt * ca - br * sa, bp, bt * sa - br * ca)
+
+    @classmethod
+    def compute_magnetic_coordinates(cls, utc_time, lat, lon, alt):
+        """Method to compute the AACGM-v2 magnetic latitudes and longitudes (degrees, NaN where undefined) at one *naive* UTC time of latitudes, longitudes (degrees, geodetic) and altitudes (km above the WGS-84 ellipsoid)"""
+        utc_time = np.datetime64(utc_time, 'us').astype(datetime)
+        (mlat, mlon, r) = aacgmv2.convert_latlon_arr(lat, lon, alt, utc_time, method_code="G2A|ALLOWTRACE")
+        return (np.asarray(mlat, dtype=np.float64), np.asarray(mlon, dtype=np.float64))
+
+    @classmethod
+    def compute_magnetic_local_times(cls, utc_times, mlon):
+        """Method to compute the AACGM-v2 magnetic local times (hours) of magnetic longitudes (degrees) at *naive* UTC times (numpy datetime64 array)"""
+        # The magnetic local time is the magnetic local time of magnetic
+        # longitude 0 at the time plus the magnetic longitude (in hours)...
+        # for more times than minutes, the one at magnetic longitude 0 is
+        # computed every minute and interpolated
+        times = np.asarray(utc_times, dtype='datetime64[us]')
+        mlt = np.full(len(mlon), np.nan)
+        defined = np.isfinite(mlon)
+        if (not np.any(defined)):
+            return mlt
+        times = times[defined]
+        minutes = np.arange(np.min(times).astype('datetime64[m]'), np.max(times).astype('datetime64[m]') + 2)
+        if (len(minutes) < len(times)):
+            reference = np.unwrap(cls.__convert_mlt(np.zeros(len(minutes)), minutes) * (np.pi / 12.0)) * (12.0 / np.pi)
+            offset = (times - minutes[0]) / np.timedelta64(1, 'm')
+            mlt[defined] = (np.interp(offset, np.arange(len(minutes)), reference) + mlon[defined] / 15.0) % 24.0
+        else:
+            mlt[defined] = cls.__convert_mlt(mlon[defined], times)
+        return mlt
+
+    @classmethod
+    def __convert_mlt(cls, mlon, times):
+        """Private method to convert magnetic longitudes (degrees) at *naive* UTC times (numpy datetime64 array) to magnetic local times (hours) with the aacgmv2 module"""
+        return np.asarray(aacgmv2.convert_mlt(mlon, list(times.astype('datetime64[us]').astype(datetime)), m2a=False), dtype=np.float64)
+
+    @classmethod
+    def __get_geomag(cls):
+        """Private method to get the (shared) geomag module model, read from its coefficient file the first time"""
+        if (cls.__geomag is None):
+            cls.__geomag = geomag.geomag.GeoMag()
+        return cls.__geomag
+
+    # Class member constants
+    ExactMode = "exact"
+    GridMode = "grid"
+    Modes = [ExactMode, GridMode]
+    FieldNames = ['declination', 'inclination', 'total_intensity', 'horizontal', 'north', 'east', 'vertical', \
+                  'magnetic_latitude', 'magnetic_longitude', 'magnetic_local_time']
+    __geomag = None
+    __earth_radius = 6371.2 # km, the World Magnetic Model reference radius
+    __maximum_grids = 4
+    __grids = {} # (latitudes, longitudes, altitudes, values) by (date, grid spacing)
@@ -36,7 +36,7 @@ def main():
     print("  Date:       %s" % args.date)
     print("  Satellite:  %s" % args.satellite)
 
-    gsts = ground_station_tracking_schedule.GroundStationTrackingSchedule(join(gssd.get_dir_name(),fname))
+    gsts = ground_station_tracking_schedule.GroundStationTrackingSchedule.for_file(join(gssd.get_dir_name(),fname))
     if (thedate is None):
         thedate = gsts.get_week()
 
@@ -1,28 +1,34 @@
 #!/usr/bin/env python
 
+import os
 import argparse
 from argvalidator import ArgValidator
-import math
 from satellite_tle import SatelliteTle
 from ground_station import GroundStation
 from inview_calculator import InviewCalculator
+from ephemeris_writer import EphemerisWriter
+from iirv_writer import IirvWriter
+from geomagnetic_field import GeomagneticField
 from datetime import datetime
 from pytz import timezone
-from pyorbital.orbital import astronomy
+from reference_frames import ReferenceFrames
 import geomag
 import aacgmv2
 
 ###############################################################################
 # Script to use the satellite_tle module to compute
 # an ephemeris point at a time (default is now) for a satellite number
-# (default is 43852, which is STF-1)
+# (default is 43852, which is STF-1)... or, with an end time, tables for
+# one or more satellite numbers, computed in chunks and written as they are
+# computed (as text, CSV, newline delimited JSON, .npy or .npz, see
+# ephemeris_writer.py) to stdout or an output file
 ###############################################################################
 
 def main():
     """Main function... makes 'forward declarations' of helper functions unnecessary"""
     parser = argparse.ArgumentParser()
-    parser.add_argument("-s", "--satnum", help="Specify satellite number (e.g. 25544=ISS, 43852=STF-1)", \
-            type=int, metavar="[1-99999]", choices=range(1,99999), default=43852)
+    parser.add_argument("-s", "--satnum", help="Specify satellite number(s) (e.g. 25544=ISS, 43852=STF-1)", \
+            type=int, metavar="[1-99999]", choices=range(1,99999), nargs="+", default=[43852])
     parser.add_argument("-t", "--time", help="Specify date/time (UTC)", type=ArgValidator.validate_datetime, metavar="YYYY-MM-DDTHH:MM:SS", default=datetime.now())
     parser.add_argument("-r", "--endtime", help="Specify date time range with this end date/time (UTC)", \
             type=ArgValidator.validate_datetime, metavar="YYYY-MM-DDTHH:MM:SS", default=None)
@@ -35,6 +41,7 @@ def main():
     parser.add_argument("-l", "--lla", help="Print latitude, longitude, altitude (geodetic degrees, altitude in km above WGS-84 ellipsoid) ephemeris", action="store_true")
     parser.add_argument("-f", "--file", help="TLE file to use (instead of looking up the TLE on CelesTrak)", type=ArgValidator.validate_file, default=None)
     parser.add_argument("-m", "--mag", help="Print geomagnetic data", action="store_true")
+    parser.add_argument("-g", "--maggrid", help="Interpolate the geomagnetic data tables from a grid computed once per date (faster for long tables at small time steps, less accurate)", action="store_true")
     parser.add_argument("-a", "--aer", help="Print az/el/range from ground station", action="store_true")
     parser.add_argument("-x", "--longitude", help="Specify longitude (degrees) of ground station", \
             type=float, default=-79.825518056)
@@ -43,58 +50,68 @@ def main():
     parser.add_argument("-z", "--elevation", help="Specify elevation (meters) of ground station", \
             type=float, default=842.0)
     parser.add_argument("-v", "--iirv", help="Print improved interrange vector (IIRV) format", action="store_true")
+    parser.add_argument("-o", "--output", help="Write the ECI/ECEF/LLA/MAG/AER tables to this file instead of printing them (with more than one, the table name is added, e.g. out_eci.csv)", \
+            default=None)
+    parser.add_argument("-k", "--format", help="Specify the format of the ECI/ECEF/LLA/MAG/AER tables", \
+            choices=EphemerisWriter.Formats, default=EphemerisWriter.TextFormat)
+    parser.add_argument("-n", "--chunk", help="Specify the most table points computed (and held in memory) at once", \
+            type=int, metavar="[1-...]", default=86400)
     args = parser.parse_args()
 
-    if (args.file is not None):
-        st = SatelliteTle(args.satnum, tle_file=args.file)
-    else:
-        saturl = None
-        st = SatelliteTle(args.satnum, tle_url=saturl)
+    st_list = []
+    for satnum in args.satnum:
+        if (args.file is not None):
+            st_list.append(SatelliteTle(satnum, tle_file=args.file))
+        else:
+            saturl = None
+            st_list.append(SatelliteTle(satnum, tle_url=saturl))
 
     if (args.tle):
-        print_tle_data(st)
-
-    if (args.eci):
-        if (args.endtime is None):
+        for st in st_list:
+            print_tle_data(st)
+    if (args.endtime is not None):
+        write_tables(args, st_list)
+    for st in st_list:
+        print_satellite(args, st)
+
+def write_tables(args, st_list):
+    """Function to write the requested ECI/ECEF/LLA/MAG/AER tables of every satellite with an EphemerisWriter"""
+    products = [product for (product, requested) in \
+                [(EphemerisWriter.EciProduct, args.eci), (EphemerisWriter.EcefProduct, args.ecef), \
+                 (EphemerisWriter.LlaProduct, args.lla), (EphemerisWriter.MagProduct, args.mag), \
+                 (EphemerisWriter.AerProduct, args.aer)] if requested]
+    mag_mode = None
+    if (args.maggrid):
+        mag_mode = GeomagneticField.GridMode
+    writer = EphemerisWriter(args.format, args.chunk, mag_mode)
+    gs = GroundStation(lat=args.latitude, lon=args.longitude, el_meters=args.elevation)
+    for product in products:
+        output = args.output
+        if (output is not None) and (len(products) > 1):
+            (root, ext) = os.path.splitext(output)
+            output = "%s_%s%s" % (root, product, ext)
+        writer.write(output, product, st_list, args.time, args.endtime, args.timestep, gs)
+
+def print_satellite(args, st):
+    """Function to print the points, sun and IIRV data requested for a satellite (the tables are written by write_tables)"""
+    if (args.endtime is None):
+        if (args.eci):
             point = st.compute_ephemeris_point(args.time)
             print_ephemeris_point(st, point)
-        else:
-            table = st.compute_ephemeris_table(args.time, args.endtime, args.timestep)
-            print_ephemeris_table(st, table)
-
-    if (args.ecef):
-        #print "ECEF is not implemented"
-        if (args.endtime is None):
+        if (args.ecef):
             point = st.compute_ephemeris_point(args.time)
             print_ephemeris_point(st, point, False)
-        else:
-            table = st.compute_ephemeris_table(args.time, args.endtime, args.timestep)
-            print_ephemeris_table(st, table, False)
-
-
-    if (args.lla):
-        if (args.endtime is None):
+        if (args.lla):
             llap = st.compute_lonlatalt_point(args.time)
             print_lonlatalt(st, llap)
-        else:
-            table = st.compute_lonlatalt_table(args.time, args.endtime, args.timestep)
-            print_lonlatalt_table(st, table)
-
-    if (args.mag):
-        if (args.endtime is None):
+        if (args.mag):
             llap = st.compute_lonlatalt_point(args.time)
             print_mag(st, llap)
-        else:
-            table = st.compute_lonlatalt_table(args.time, args.endtime, args.timestep)
-            print_mag_table(st, table)
-
-    if (args.aer):
-        gs = GroundStation(lat=args.latitude, lon=args.longitude, el_meters=args.elevation)
-        ic = InviewCalculator(gs, st)
-        if (args.endtime is None):
-            args.endtime = args.time
-        azels = ic.compute_azels(args.time, args.endtime, args.timestep)
-        print_azelrange_table(azels)
+        if (args.aer):
+            gs = GroundStation(lat=args.latitude, lon=args.longitude, el_meters=args.elevation)
+            ic = InviewCalculator(gs, st)
+            azels = ic.compute_azels(args.time, args.time, args.timestep)
+            print_azelrange_table(azels)
 
     if (args.sun):
         if (args.endtime is None):
@@ -113,11 +130,9 @@ def main():
             
     if (args.iirv):
         if (args.endtime is None):
-            point = st.compute_ephemeris_point(args.time)
-            print_iirv_point(st, point)
+            IirvWriter(args.chunk).write_point(None, st, args.time)
         else:
-            table = st.compute_ephemeris_table(args.time, args.endtime, args.timestep)
-            print_iirv_points(st, table)
+            IirvWriter(args.chunk).write(None, st, args.time, args.endtime, args.timestep)
 
 def print_tle_data(st):
     print("===== TLE =====")
@@ -136,23 +151,14 @@ def print_ephemeris_point(st, point, inertial=True):
         coords = "ECEF"
     print("===== %s =====" % coords)
 
+    (pos, vel) = (point[1], point[2])
     if (not inertial):
-        gmst_radians = astronomy.gmst(point[0])
+        (pos, vel) = ReferenceFrames.eci_to_ecef(point[0], pos, vel)
     print("Date/Time: %s  Satellite Number: %s" % \
           (point[0], st.get_satellite_number()))
-    (x, y, z) = (point[1][0], point[1][1], point[1][2])
-    if (not inertial):
-        r = math.sqrt(x*x + y*y)
-        theta = math.atan2(y, x)
-        x = r*math.cos(-1.0*gmst_radians+theta)
-        y = r*math.sin(-1.0*gmst_radians+theta)
+    (x, y, z) = (pos[0], pos[1], pos[2])
     print("Position (km,   x/y/z %s): %s/%s/%s" % (coords, x, y, z))
-    (x, y, z) = (point[2][0], point[2][1], point[2][2])
-    if (not inertial):
-        r = math.sqrt(x*x + y*y)
-        theta = math.atan2(y, x)
-        x = r*math.cos(-1.0*gmst_radians+theta)
-        y = r*math.sin(-1.0*gmst_radians+theta)
+    (x, y, z) = (vel[0], vel[1], vel[2])
     print("Velocity (km/s, x/y/z %s): %s/%s/%s" % (coords, x, y, z))
 
 def print_lonlatalt(st, llap):
@@ -174,74 +180,6 @@ def print_mag(st, llap):
     print("Geodetic Latitude (degrees)/Geodetic Longitude (degrees)/Altitude (km above WGS-84 ellipsoid)/Declination (degrees)/Inclination (degrees)/Total Intensity (nT)/Horizontal (nT)/North (nT)/East (nT)/Vertical (nT)/Magnetic Latitude (degrees)/Magnetic Longitude(degrees)/Magnetic Local Time (hours):  %s/%s/%s/%s/%s/%s/%s/%s/%s/%s/%s/%s/%s" % \
     	(llap[2], llap[1], llap[3], mag.dec, mag.dip, mag.ti, mag.bh, mag.bx, mag.by, mag.bz, aacgm[0], aacgm[1], aacgm[2]))
 
-def print_iirv_point(st, point):
-    print("GIIRV MANY\r\r\n")
-    tt = point[0].timetuple()
-    string = "1211800001000%3.3d%2.2d%2.2d%2.2d%3.3d" % (tt.tm_yday, tt.tm_hour, tt.tm_min, tt.tm_sec, int(point[0].microsecond/1000.0))
-    csum = checksum(string)
-    print("%s%3.3d\r\r\n" % (string, csum))
-    gmst_radians = astronomy.gmst(point[0])
-    #print("gmst_radians=%s, degrees=%s" % (gmst_radians, gmst_radians * 180.0/3.1415927))
-    (x, y, z) = (point[1][0], point[1][1], point[1][2])
-    r = math.sqrt(x*x + y*y)
-    theta = math.atan2(y, x)
-    x = r*math.cos(-1.0*gmst_radians+theta)
-    y = r*math.sin(-1.0*gmst_radians+theta)
-    string = "% 013.0f% 013.0f% 013.0f" % (x*1000.0, y*1000.0, z*1000.0)
-    csum = checksum(string)
-    print("%s%3.3d\r\r\n" % (string, csum))
-    (x, y, z) = (point[2][0], point[2][1], point[2][2])
-    r = math.sqrt(x*x + y*y)
-    theta = math.atan2(y, x)
-    x = r*math.cos(-1.0*gmst_radians+theta)
-    y = r*math.sin(-1.0*gmst_radians+theta)
-    string = "% 013.0f% 013.0f% 013.0f" % (x*1000000.0, y*1000000.0, z*1000000.0)
-    csum = checksum(string)
-    print("%s%3.3d\r\r\n" % (string, csum))
-    mass = 4475570
-    cross = 99999
-    drag = 207
-    solar = 0
-    string = "%08.0f%05.0f%04.0f% 08.0f" % (mass, cross, drag, solar)
-    csum = checksum(string)
-    print("%s%3.3d\r\r\n" % (string, csum))
-    print("ITERM GAQD\r\r\n")
-    
-def checksum(s):
-    csum = 0
-    for c in s:
-        if (c == ' '):
-            pass
-        elif (c == '-'):
-            csum = csum + 1
-        else:
-            csum = csum + int(c)
-    return csum
-
-def print_ephemeris_table(st, table, inertial=True):
-    if (inertial):
-        coords = "ECI"
-    else:
-        coords = "ECEF"
-    print("===== %s =====" % coords)
-
-    print("Time, X,Y,Z in km, VX,VY,VZ in km/s (%s Coordinates)" % coords)
-    for i in range(0, len(table)):
-        ( x,  y,  z) = (table[i][1][0], table[i][1][1], table[i][1][2])
-        (vx, vy, vz) = (table[i][2][0], table[i][2][1], table[i][2][2])
-        if (not inertial):
-            gmst_radians = astronomy.gmst(table[i][0])
-            r = math.sqrt(x*x + y*y)
-            theta = math.atan2(y, x)
-            x = r*math.cos(-1.0*gmst_radians+theta)
-            y = r*math.sin(-1.0*gmst_radians+theta)
-            vr = math.sqrt(vx*vx + vy*vy)
-            vtheta = math.atan2(vy, vx)
-            vx = vr*math.cos(-1.0*gmst_radians+vtheta)
-            vy = vr*math.sin(-1.0*gmst_radians+vtheta)
-        print("%s, %16.8f,%16.8f,%16.8f, %13.9f,%13.9f,%13.9f" % \
-              (table[i][0], x, y, z, vx, vy, vz))
-
 def print_azelrange_table(table):
     print("===== AER =====")
     print("Time, azimuth (degrees), elevation (degrees), range (km)")
@@ -249,23 +187,6 @@ def print_azelrange_table(table):
         print("%s, %6.2f,%8.2f,%9.2f" % \
               (table[i][0], table[i][1], table[i][2], table[i][3]))
 
-def print_lonlatalt_table(st, table):
-    print("===== LLA =====")
-    print("Time, lat,lon,alt (geodetic degrees, km above WGS-84 ellipsoid)")
-    for i in range(0, len(table)):
-        print("%s, %6.2f,%8.2f,%9.2f" % \
-              (table[i][0], table[i][2], table[i][1], table[i][3])) 
-
-def print_mag_table(st, table):
-    gm = geomag.geomag.GeoMag()
-    print("===== MAG =====")
-    print("Time (UTC), geodetic latitude (degrees), geodetic longitude (degrees), alt (km above WGS-84 ellipsoid), magnetic declination (degrees), inclination (degrees), total intensity (nT), horizontal (nT), north (nT), east (nT), vertical (nT), magnetic latitude (degrees), magnetic longitude (degrees), magnetic local time (hours)")
-    for i in range(0, len(table)):
-        mag = gm.GeoMag(table[i][2], table[i][1], table[i][3]*KM_TO_FEET, datetime.date(table[i][0]))
-        aacgm = aacgmv2.get_aacgm_coord(table[i][2], table[i][1], table[i][3], table[i][0])
-        print("%s, %6.2f, %8.2f, %9.2f, %6.2f, %8.2f, %7.1f, %7.1f, %7.1f, %7.1f, %7.1f, %6.2f, %8.2f, %5.2f" % \
-            (table[i][0], table[i][2], table[i][1], table[i][3], mag.dec, mag.dip, mag.ti, mag.bh, mag.bx, mag.by, mag.bz, aacgm[0], aacgm[1], aacgm[2]))
-
 def print_sun_times_table(st, start, end, tables):
     print("===== SUN =====")
     table = tables[0]
@@ -292,41 +213,6 @@ def print_sun_times_table(st, start, end, tables):
         print("%s %s (%s)" % (table[i][0].isoformat(), table[i][1].isoformat(), \
                               delta.seconds))
 
-def print_iirv_points(st, table):
-    for i in range(0, len(table)):
-        print("GIIRV MANY\r\r\n")
-        tt = table[i][0].timetuple()
-        string = "1111800001%3.3d%3.3d%2.2d%2.2d%2.2d%3.3d" % (i+1, tt.tm_yday, tt.tm_hour, tt.tm_min, tt.tm_sec, int(table[i][0].microsecond/1000.0))
-        csum = checksum(string)
-        print("%s%3.3d\r\r\n" % (string, csum))
-        gmst_radians = astronomy.gmst(table[i][0])
-        #print("gmst_radians=%s, degrees=%s" % (gmst_radians, gmst_radians * 180.0/3.1415927))
-        (x, y, z) = (table[i][1][0], table[i][1][1], table[i][1][2])
-        r = math.sqrt(x*x + y*y)
-        theta = math.atan2(y, x)
-        x = r*math.cos(-1.0*gmst_radians+theta)
-        y = r*math.sin(-1.0*gmst_radians+theta)
-        string = "% 013.0f% 013.0f% 013.0f" % (x*1000.0, y*1000.0, z*1000.0)
-        csum = checksum(string)
-        print("%s%3.3d\r\r\n" % (string, csum))
-        (x, y, z) = (table[i][2][0], table[i][2][1], table[i][2][2])
-        r = math.sqrt(x*x + y*y)
-        theta = math.atan2(y, x)
-        x = r*math.cos(-1.0*gmst_radians+theta)
-        y = r*math.sin(-1.0*gmst_radians+theta)
-        string = "% 013.0f% 013.0f% 013.0f" % (x*1000000.0, y*1000000.0, z*1000000.0)
-        csum = checksum(string)
-        print("%s%3.3d\r\r\n" % (string, csum))
-        mass = 4544100
-        cross = 99999
-        drag = 200
-        solar = 1500000
-        string = "%08.0f%05.0f%04.0f% 08.0f" % (mass, cross, drag, solar)
-        csum = checksum(string)
-        print("%s%3.3d\r\r\n" % (string, csum))
-        print("ITERM GAQD\r\r\n")
-        
-
 
 # Python idiom to eliminate the need for forward declarations
 if __name__=="__main__":
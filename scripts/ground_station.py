@@ -36,10 +36,7 @@ class GroundStation:
         self.__aer_keyhole_el = aer_keyhole_el
         self.__good_sectors = good_sectors
         self.__bad_sectors = bad_sectors
-        if (contact_schedule_directory is None):
-            self.__schedule_directory = GroundStationScheduleDirectory()
-        else:
-            self.__schedule_directory = GroundStationScheduleDirectory(contact_schedule_directory)
+        self.__schedule_directory = GroundStationScheduleDirectory.for_directory(contact_schedule_directory)
         
     # Class Methods to construct in alternative ways
     @classmethod
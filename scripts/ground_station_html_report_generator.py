@@ -4,7 +4,9 @@ from datetime import datetime, timedelta
 from datetime import datetime, timedelta
 from satellite_tle import SatelliteTle
 from inview_calculator import InviewCalculator
+from sgp4_batch_propagator import Sgp4BatchPropagator
 from az_el_range_report import AzElRangeReportGenerator
+from report_days import ReportDays
 from pytz import UTC
 
 ###############################################################################
@@ -30,6 +32,10 @@ class GroundStationHtmlReportGenerator:
         self.__start_day = start_day
         self.__end_day = end_day
         self.__html_out = sys.stdout
+        self.__propagator = Sgp4BatchPropagator(satellite_tle_list)
+        self.__report_days = None
+        self.__satellite_inviews = [] # inviews over the whole report window for each satellite
+        self.__day_satellite_inviews = [] # ... split into the report days
 
     # Member functions
     def generate_report(self):
@@ -50,6 +56,10 @@ class GroundStationHtmlReportGenerator:
         filename = "%s/%4.4d-%2.2d-%2.2d.html" % (directory, today.year, today.month, today.day)
         #sys.stderr.write("Generating report: %s\n" % filename)
 
+        # Compute the inviews over the whole report window at once, then split them into the days
+        self.__report_days = ReportDays(self.__tz, self.__start_day, self.__end_day, today)
+        self.__compute_report_window()
+
         with open(filename, "w") as self.__html_out:
 
             self.__html_out.write("<html>\n")
@@ -76,10 +86,29 @@ class GroundStationHtmlReportGenerator:
 
         if (self.__aer_days > 0):
             #print self.__aer_days # debug
-            for sat in self.__satellite_tle_list:
+            # Reuse the inviews when the report window covers the AER days
+            reuse = (self.__create_inviews) and (self.__start_day <= 0) and (self.__aer_days - 1 <= self.__end_day)
+            for (i, sat) in enumerate(self.__satellite_tle_list):
+                inviews = None
+                if (reuse):
+                    inviews = self.__satellite_inviews[i]
                 aerg = AzElRangeReportGenerator(self.__base_output_dir, self.__ground_station, 0, sat, \
-                        self.__tz, self.__aer_days)
+                        self.__tz, self.__aer_days, inviews=inviews, report_days=self.__report_days)
                 aerg.generate_report()
+
+    def __compute_report_window(self):
+        """Private method to propagate all of the satellites at once over the whole report window, compute the inviews of each from the ground station and split them into the report days"""
+        self.__satellite_inviews = []
+        self.__day_satellite_inviews = []
+        if (self.__create_inviews):
+            start_time = self.__report_days.get_start_time()
+            end_time = self.__report_days.get_end_time()
+            ephemerides = self.__propagator.compute_ephemerides(start_time, end_time)
+            for (sat, ephemeris) in zip(self.__satellite_tle_list, ephemerides):
+                ic = InviewCalculator(self.__ground_station, sat)
+                inviews = ic.compute_inviews_from_ephemeris(start_time, end_time, ephemeris)
+                self.__satellite_inviews.append(inviews)
+                self.__day_satellite_inviews.append(self.__report_days.split_periods(inviews))
         
     def __generate_html_head(self):
         if (self.__ground_station.get_name() != ""):
@@ -158,14 +187,11 @@ class GroundStationHtmlReportGenerator:
     def __generate_chart_for_day(self, day):
         # ALL TIMES ARE IN THE TIMEZONE self.__tz !!
         # Determine the time range for the requested day
-        day_date = datetime.now() + timedelta(days=day)
+        day_date = self.__report_days.get_day_date(day)
         day_year = day_date.year
         day_month = day_date.month
         day_day = day_date.day
-        start_time = self.__tz.localize(
-            datetime(day_year, day_month, day_day, 0, 0, 0))
-        end_time = self.__tz.localize(
-            datetime(day_year, day_month, day_day, 23, 59, 59))
+        (start_time, end_time) = self.__report_days.get_day_period(day)
         
         self.__html_out.write(("        var container = " + \
               "document.getElementById('timeline%s');\n") % \
@@ -194,10 +220,11 @@ class GroundStationHtmlReportGenerator:
             row = row + 1
         i = 0
         if (self.__create_inviews):
-            for sat in self.__satellite_tle_list:
+            # Already computed for all of the satellites over the whole report window
+            for (sat, day_inviews) in zip(self.__satellite_tle_list, self.__day_satellite_inviews):
                 satnums.append(sat.get_satellite_number())
                 iv.append(row)
-                row = row + self.__generate_inview_bars_for_day(sat, day, start_time, end_time)
+                row = row + self.__generate_inview_bars_for_day(sat, day, day_inviews[day])
                 i = i + 1
             iv.append(row)
         self.__html_out.write("        function selectChart%d(e) {\n" % (day+200)) # 200 is a hack to not have - in names
@@ -318,32 +345,25 @@ class GroundStationHtmlReportGenerator:
                local_day_end.minute, local_day_end.second))
         self.__html_out.write("        ]);\n")
 
-    def __generate_inview_bars_for_day(self, sat, day, \
-                                       start_time, end_time):
-        # Time bars for inviews
+    def __generate_inview_bars_for_day(self, sat, day, inviews):
+        # Time bars for inviews (already computed for the satellite)
         gsname = self.__ground_station.get_name()        
         helptext = ""
         if ((day >= 0) and (day < self.__aer_days)): 
             helptext = " (CLICK BAR FOR AZ/EL REPORT AND GRAPH)"
 
-        # Get the InviewCalculator and compute the inviews
-        ic = InviewCalculator(self.__ground_station, \
-                              sat)
-        inviews = []
-        inviews = ic.compute_inviews(start_time, end_time)
-
         self.__html_out.write("        dataTable.addRows([\n")
         for i in range(0, len(inviews)):
             riselocal = inviews[i][0].astimezone(self.__tz)
             setlocal = inviews[i][1].astimezone(self.__tz)
             self.__html_out.write(("          ['%s - S/C %s Inviews', ' ', 'blue', " + \
-                   "'%02d:%02d:%02d - %02d:%02d:%02d, Max Elev %02.1f degrees%s', " + \
+                   "'%02d:%02d:%02d - %02d:%02d:%02d, Max Elev %02.1f degrees%s%s', " + \
                    "new Date(%s, %s, %s, %s, %s, %s), " + \
                    "new Date(%s, %s, %s, %s, %s, %s)],\n") % \
                    (gsname, sat.get_satellite_name(), \
                     riselocal.hour, riselocal.minute, riselocal.second, \
                     setlocal.hour, setlocal.minute, setlocal.second, \
-                    inviews[i][2], helptext, \
+                    inviews[i][2], ReportDays.split_text(inviews[i][3]), helptext, \
                     riselocal.year, riselocal.month-1, riselocal.day, \
                     riselocal.hour, riselocal.minute, riselocal.second, \
                     setlocal.year, setlocal.month-1, setlocal.day, \
@@ -15,6 +15,16 @@ class GroundStationScheduleDirectory:
         self.__files = None
         self.__latest_files = None
     
+    # Class Methods to construct in alternative ways
+    @classmethod
+    def for_directory(cls, dir_name=None):
+        """Method to get the (process wide) GroundStationScheduleDirectory for a directory, so every ground station using a directory shares its cached schedule files"""
+        if (dir_name is None):
+            dir_name = cls.__default_dir_name
+        if (dir_name not in cls.__directories):
+            cls.__directories[dir_name] = cls(dir_name)
+        return cls.__directories[dir_name]
+
     def get_dir_name(self):
         return self.__dir_name
     
@@ -50,15 +60,25 @@ class GroundStationScheduleDirectory:
 
         return None
 
+    def get_latest_schedule_full_filenames_for_dates(self, dates):
+        """Method to get the (distinct) full filenames of the latest schedules for a list of dates, in date order"""
+        fnames = []
+        for dt in dates:
+            fname = self.get_latest_schedule_full_filename_for_date(dt)
+            if (fname is not None) and (fname not in fnames):
+                fnames.append(fname)
+        return fnames
+
     def get_latest_files(self):
         if (self.__latest_files is None):
             self.__process_all_files()
         return self.__latest_files
 
     def __process_all_files(self):
+        # The week and revision come from the filename and last modified time... no workbook is opened here
         self.__latest_files = [] 
         for f in self.get_schedule_file_list():
-            gsts = ground_station_tracking_schedule.GroundStationTrackingSchedule(join(self.__dir_name, f))
+            gsts = ground_station_tracking_schedule.GroundStationTrackingSchedule.for_file(join(self.__dir_name, f))
             week = gsts.get_week()
             #print("Week:  %s, 0 processing file: %s" % (week, f))
             l = self.find_entry_for_date(week)
@@ -83,3 +103,6 @@ class GroundStationScheduleDirectory:
         for l in self.get_latest_files():
             print("Week: %s, Latest Rev: %s, Filename: %s" % (l[0], l[1], l[2]))
 
+    # Class member constants
+    __default_dir_name = "C:/Users/msuder/Google Drive/STF1/WFF-Schedule"
+    __directories = {} # GroundStationScheduleDirectory by directory name
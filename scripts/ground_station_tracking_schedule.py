@@ -9,14 +9,29 @@ from dateutil import parser
 
 ###############################################################################
 # Python module to make it easy to work with a ground station tracking
-# schedule excel spreadsheet 
+# schedule excel spreadsheet.  The week (from the filename) and revision
+# (from the last modified time) never open the spreadsheet... it is only
+# loaded the first time its contacts are requested, and the schedules are
+# shared process wide by file name (see for_file), so each workbook is
+# opened at most once.
 ###############################################################################
 
 class GroundStationTrackingSchedule:
     def __init__(self, file_name="schedule.xlsm"):
         self.__file_name = file_name
-        self.__worksheet = load_workbook(file_name).worksheets[0]
-    
+        self.__worksheet = None # loaded when first needed
+        self.__contacts = {} # contacts by satellite name
+
+    # Class Methods to construct in alternative ways
+    @classmethod
+    def for_file(cls, file_name):
+        """Method to get the (process wide) GroundStationTrackingSchedule for a file, so its workbook is loaded at most once"""
+        schedule = cls.__schedules.get(file_name, None)
+        if (schedule is None):
+            schedule = cls(file_name)
+            cls.__schedules[file_name] = schedule # kept for the whole process (never evicted)
+        return schedule
+
     # Alternative based on data in the spreadsheet
     #def get_week(self):
     #    try:
@@ -82,18 +97,36 @@ class GroundStationTrackingSchedule:
         else:
             return 1
 
+    def load(self):
+        """Method to load the workbook now (e.g. in a prefetch thread) instead of when contacts are first requested"""
+        self.__get_worksheet()
+
     def get_satellite_contacts(self, sat_name):
+        """Method to get the supported contacts (UTC start, UTC end, maximum elevation) of a satellite, loading the workbook the first time contacts are requested"""
+        if (sat_name in self.__contacts):
+            return list(self.__contacts[sat_name])
+        worksheet = self.__get_worksheet()
         contacts = []
-        for i in range(self.__worksheet.max_row):
-            sat = self.__worksheet.cell(row=i+1, column=2)         # Satellite names found in column B
-            support = self.__worksheet.cell(row=i+1, column=9)     # Y in column I means this satellite inview row is supported
-            s = self.__worksheet.cell(row=i+1, column=3).value     # Column C - GMT start time of inview
-            e = self.__worksheet.cell(row=i+1, column=4).value     # Column D - GMT end time of inview
-            maxel = self.__worksheet.cell(row=i+1, column=5).value # Column E - maximum elevation of inview
+        for i in range(worksheet.max_row):
+            sat = worksheet.cell(row=i+1, column=2)         # Satellite names found in column B
+            support = worksheet.cell(row=i+1, column=9)     # Y in column I means this satellite inview row is supported
+            s = worksheet.cell(row=i+1, column=3).value     # Column C - GMT start time of inview
+            e = worksheet.cell(row=i+1, column=4).value     # Column D - GMT end time of inview
+            maxel = worksheet.cell(row=i+1, column=5).value # Column E - maximum elevation of inview
             if ((sat.value == sat_name) and (support.value == 'Y')):
                 start = pytz.UTC.localize(s)
                 end   = pytz.UTC.localize(e)
                 contacts.append((start, end, maxel))
         
-        return contacts
+        self.__contacts[sat_name] = contacts
+        return list(contacts)
+
+    def __get_worksheet(self):
+        """Private method to get the (first) worksheet of the workbook, loading it the first time"""
+        if (self.__worksheet is None):
+            self.__worksheet = load_workbook(self.__file_name).worksheets[0]
+        return self.__worksheet
+
+    # Class member constants
+    __schedules = {} # shared schedules by file name
 
@@ -0,0 +1,135 @@
+import sys
+import numpy as np
+from reference_frames import ReferenceFrames
+from ephemeris_writer import EphemerisWriter
+
+###############################################################################
+# Python module to write improved interrange vector (IIRV) messages for a
+# satellite:  one message per ephemeris point (the earth fixed position in
+# meters and velocity in millimeters/second), for a point in time or every
+# time step of a time period.  The ephemeris comes from the satellite's
+# propagator (either backend) as arrays, in chunks of a bounded number of
+# points, and each chunk is converted to ECEF at once (reference_frames.py),
+# checksummed at once (the checksum of a line is the sum of its digits plus
+# one for each minus sign, so it is the sum of the digits of its numbers),
+# formatted at once, and written before the next chunk is computed... so
+# a week of vectors takes no more memory than one chunk.
+#
+# Each line of a message is followed by "\r\r\n" and a newline, as the
+# scripts have always printed them.
+###############################################################################
+
+class IirvWriter:
+    """Class to write IIRV messages for a satellite (SatelliteTle) to a file (or stdout)"""
+    # Constructor
+    def __init__(self, chunk_points=86400):
+        """Constructor:  chunk_points is the most points computed (and held) at once"""
+        self.__chunk_points = max(1, int(chunk_points))
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'IIRV Writer:\n' \
+              'chunk points=%d' % \
+              (self.__chunk_points)
+        return out
+
+    def get_chunk_points(self):
+        return self.__chunk_points
+
+    def write(self, output, satellite_tle, in_start_time, in_end_time, time_step_seconds):
+        """Method to write the IIRV messages of a satellite (SatelliteTle) at every time step from the start time through the end time (like SatelliteTle.compute_ephemeris_table), numbered from 1, to output (a file name, None for stdout).  Returns the number of messages written."""
+        chunks = EphemerisWriter.split_table_times(in_start_time, in_end_time, time_step_seconds, self.__chunk_points)
+        return self.__write(output, satellite_tle, chunks, time_step_seconds, self.VectorTable)
+
+    def write_point(self, output, satellite_tle, in_time):
+        """Method to write the IIRV message of a satellite (SatelliteTle) at a time to output (a file name, None for stdout).  Returns the number of messages written."""
+        chunks = EphemerisWriter.split_table_times(in_time, in_time, 60, 1)
+        return self.__write(output, satellite_tle, chunks, 60, self.VectorPoint)
+
+    def format_messages(self, utc_times, pos, vel, vector=None, first_sequence_number=1):
+        """Method to format IIRV messages for *naive* UTC times (numpy datetime64 array) and ECI positions (km) and velocities (km/s), 3 x number of times arrays.  vector is VectorTable (the default, numbered messages) or VectorPoint (one message, numbered 0).  Points that could not be propagated (NaN) are left out.  Returns the messages as one string."""
+        return self.__format_messages(utc_times, pos, vel, vector, first_sequence_number)[0]
+
+    def __format_messages(self, utc_times, pos, vel, vector, first_sequence_number):
+        """Private method to format IIRV messages (see format_messages).  Returns (messages, number of messages)."""
+        if (vector is None):
+            vector = self.VectorTable
+        (type_code, constants) = self.__vectors[vector]
+        times = np.asarray(utc_times, dtype='datetime64[us]')
+        (pos, vel) = ReferenceFrames.eci_to_ecef(times, pos, vel)
+        valid = np.all(np.isfinite(pos), axis=0) & np.all(np.isfinite(vel), axis=0)
+        (times, pos, vel) = (times[valid], pos[:, valid], vel[:, valid])
+        count = len(times)
+        if (count == 0):
+            return ("", 0)
+        if (vector == self.VectorPoint):
+            sequence = np.zeros(count, dtype=np.int64)
+        else:
+            sequence = first_sequence_number + np.arange(count, dtype=np.int64)
+        # Time:  day of the year, hour, minute, second, millisecond
+        days = times.astype('datetime64[D]')
+        day_of_year = (days - times.astype('datetime64[Y]')).astype(np.int64) + 1
+        microseconds = (times - days).astype(np.int64)
+        (hour, minute, second) = (microseconds // 3600000000, (microseconds // 60000000) % 60, (microseconds // 1000000) % 60)
+        millisecond = (microseconds // 1000) % 1000
+        # Earth fixed position (meters) and velocity (millimeters/second), rounded as formatted
+        position = np.rint(pos * 1000.0)
+        velocity = np.rint(vel * 1000000.0)
+        columns = [sequence, day_of_year, hour, minute, second, millisecond]
+        columns.append(self.__checksum(type_code) + sum([self.__digit_sums(column) for column in columns]))
+        for state in (position, velocity):
+            columns.extend([state[0], state[1], state[2]])
+            columns.append(sum([self.__digit_sums(np.abs(component)) + np.signbit(component) for component in state]))
+        template = self.__message_template % (type_code, constants, self.__checksum(constants))
+        values = np.column_stack(columns).astype(np.float64)
+        return ((template * count) % tuple(values.ravel().tolist()), count)
+
+    def __write(self, output, satellite_tle, chunks, time_step_seconds, vector):
+        """Private method to compute and write the messages of the chunks of a table (see EphemerisWriter.split_table_times) one chunk at a time"""
+        if (output is None):
+            return self.__write_chunks(sys.stdout, satellite_tle, chunks, time_step_seconds, vector)
+        with open(output, "w", newline="") as out:
+            return self.__write_chunks(out, satellite_tle, chunks, time_step_seconds, vector)
+
+    def __write_chunks(self, out, satellite_tle, chunks, time_step_seconds, vector):
+        """Private method to write the messages of the chunks to an open file"""
+        first_sequence_number = 1
+        for (chunk_start, chunk_end, npoints) in chunks:
+            (seconds, pos, vel) = satellite_tle.compute_ephemeris_arrays(chunk_start, chunk_end, time_step_seconds)
+            times = np.datetime64(0, 'us') + np.round(seconds * 1e6).astype(np.int64).astype('timedelta64[us]')
+            (messages, count) = self.__format_messages(times, pos.T, vel.T, vector, first_sequence_number)
+            first_sequence_number = first_sequence_number + count
+            out.write(messages)
+            out.flush()
+        return first_sequence_number - 1
+
+    @classmethod
+    def __checksum(cls, line):
+        """Private method to compute the checksum of a line (the sum of the digits, each minus sign counting as 1)"""
+        return sum([int(c) for c in line if c.isdigit()]) + line.count('-')
+
+    @classmethod
+    def __digit_sums(cls, numbers):
+        """Private method to sum the (decimal) digits of each of an array of non-negative whole numbers"""
+        numbers = np.asarray(numbers).astype(np.int64)
+        sums = np.zeros(numbers.shape, dtype=np.int64)
+        while (np.any(numbers > 0)):
+            sums = sums + numbers % 10
+            numbers = numbers // 10
+        return sums
+
+    # Class member constants
+    VectorTable = "table"
+    VectorPoint = "point"
+    # Line 1 is the message type code, the sequence number and the time (line 4's constants are fixed)
+    __message_template = "GIIRV MANY\r\r\n\n" \
+                         "%s%%3.3d%%3.3d%%2.2d%%2.2d%%2.2d%%3.3d%%3.3d\r\r\n\n" \
+                         "%% 013.0f%% 013.0f%% 013.0f%%3.3d\r\r\n\n" \
+                         "%% 013.0f%% 013.0f%% 013.0f%%3.3d\r\r\n\n" \
+                         "%s%3.3d\r\r\n\n" \
+                         "ITERM GAQD\r\r\n\n"
+    # (message type code, mass/cross section/drag/solar pressure line) by vector
+    __vectors = {VectorTable:("1111800001", "%08.0f%05.0f%04.0f% 08.0f" % (4544100, 99999, 200, 1500000)), \
+                 VectorPoint:("1211800001", "%08.0f%05.0f%04.0f% 08.0f" % (4475570, 99999, 207, 0))}
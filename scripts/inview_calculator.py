@@ -3,7 +3,8 @@ import math
 from satellite_tle import SatelliteTle
 from datetime import datetime, timedelta
 from pytz import UTC
-from pyorbital.orbital import Orbital, astronomy
+from reference_frames import ReferenceFrames
+from station_frame import StationFrame
 import numpy as np
 
 ###############################################################################
@@ -25,13 +26,17 @@ import numpy as np
 class InviewCalculator:
     """Class to compute inviews above a specified elevation angle from a latitude, longitude, elevation to a satellite (number) """
     # Constructor
-    def __init__(self, ground_station, satellite_tle):
-        """Constructor:  ground station as GroundStation, satellite TLE as TleManipulator"""
+    def __init__(self, ground_station, satellite_tle, vectorized=True, tolerance_seconds=1.0, minimum_pass_seconds=60):
+        """Constructor:  ground station as GroundStation, satellite TLE as TleManipulator, vectorized selects sampling the whole time period at once (True) or stepping through it (False), tolerance_seconds is how closely rise/set/maximum elevation times are refined (may be less than a second), minimum_pass_seconds is the sampling step near the horizon (no inview at least this long is missed)"""
         self.__ground_station = ground_station
         self.__satellite_tle = satellite_tle
-        self.__orb = Orbital(str(self.__satellite_tle.get_satellite_number()), \
-                             line1=self.__satellite_tle.get_line1(), \
-                             line2=self.__satellite_tle.get_line2())
+        self.__vectorized = vectorized
+        self.__tolerance = max(timedelta(seconds=tolerance_seconds), self.__onemicrosecond)
+        self.__step = max(timedelta(seconds=minimum_pass_seconds), self.__onesecond)
+        self.__orb = self.__satellite_tle.get_propagator() # shared with the SatelliteTle
+        self.__station_frame = StationFrame.for_ground_station(ground_station) # shared with every calculator for the station
+        self.__ephemeris = None # set while computing inviews from a shared SatelliteEphemeris
+        self.__init_horizon_skip()
 
     # Member functions
         
@@ -40,12 +45,12 @@ class InviewCalculator:
         out = 'Inview Calculator:\n' \
               'latitude=%f, longitude=%f, elevation=%f, ' \
               'minimum elevation angle=%s, satellite TLE=\n%s' % \
-              (self.__ground_station.get_latitude(), self.__ground_station.get_longitude(), self.__ground_station.get_minimum_elevation_angle(), \
+              (self.__ground_station.get_latitude(), self.__ground_station.get_longitude(), self.__ground_station.get_elevation_in_meters(), \
                self.__ground_station.get_minimum_elevation_angle(), self.__satellite_tle)
         return out
 
     def compute_inviews(self, in_start_time, in_end_time):
-        """Method to compute inviews (in UTC) for the initialized location, elevation angle, and satellite over a specified time period.  Returns a list of inview start/stop times, accurate to the nearest second and using the latest available TLE when the method is called."""
+        """Method to compute inviews (in UTC) for the initialized location, elevation angle, and satellite over a specified time period.  Returns a list of inview start/stop times, accurate to the tolerance (default one second) and using the latest available TLE when the method is called."""
         # NOTE:  pyorbital EXPECTS naive date/times and interprets them
         # as UTC... so we need to satisfy it; however, we are making this
         # module DATETIME AWARE, so RETURN VALUES are DATETIME AWARE!!
@@ -64,48 +69,62 @@ class InviewCalculator:
         else:
             end_time = in_end_time
         # start_time, end_time are now naive
+        if (self.__vectorized):
+            return self.__compute_inviews_vectorized(start_time, end_time)
         inviews = []
         time = start_time
+        previous = before_previous = start_time - self.__step
         up = 0
         el_increasing = 0
         maxel = 0
+        peak_before = peak_after = None # samples around the highest elevation so far, above LEO
+        station_frame = self.__station_frame # its masks hold the minimum elevation angle
         try:
-            (az, el) = self.__orb.get_observer_look(time, self.__ground_station.get_longitude(), \
-                                                    self.__ground_station.get_latitude(), \
-                                                    self.__ground_station.get_minimum_elevation_angle())
-            if (el > self.__ground_station.get_minimum_elevation_angle()):
+            (az, el) = self.__look(time)
+            if (station_frame.is_above_minimum_elevation(el)):
                 # start the first inview at the input start_time
                 up = 1
                 el_increasing = 1
                 rising = time
-            # Step through time, looking for inview starts and ends
+            # Step through time, looking for inview starts and ends... skipping ahead while the satellite cannot rise
             while (time < end_time):
-                (az, el) = self.__orb.get_observer_look(time, self.__ground_station.get_longitude(), \
-                                                        self.__ground_station.get_latitude(), \
-                                                        self.__ground_station.get_minimum_elevation_angle())
-                if (el > self.__ground_station.get_minimum_elevation_angle()) and (up == 0):
-                    rising = self.__find_exact_crossing(time, up)
+                (az, el) = self.__look(time)
+                if (station_frame.is_above_minimum_elevation(el)) and (up == 0):
+                    rising = self.__find_exact_crossing(previous, time, up)
                     el_increasing = 1
                     up = 1
-                if (el < self.__ground_station.get_minimum_elevation_angle()) and (up == 1):
+                if (station_frame.is_below_minimum_elevation(el)) and (up == 1):
                     # make sure to append AWARE datetimes
-                    crossing = self.__find_exact_crossing(time, up)
+                    crossing = self.__find_exact_crossing(previous, time, up)
+                    if (self.__orbit_regime != self.LowEarthOrbit):
+                        maxel = self.__find_exact_maxel(peak_before, crossing if (peak_after is None) else peak_after, maxel)
                     inviews.append((rising.replace(tzinfo=UTC), \
                                     crossing.replace(tzinfo=UTC), \
                                     maxel))
                     el_increasing = 0
                     up = 0
                     maxel = 0
-                if (el > self.__ground_station.get_minimum_elevation_angle()):
+                if (station_frame.is_above_minimum_elevation(el)):
                     if (el > maxel):
                         maxel = el
-                    elif (el_increasing): # First point after el starts decreasing... find the exact max el
+                        peak_before = previous
+                        peak_after = None
+                    elif (el_increasing) and (self.__orbit_regime == self.LowEarthOrbit): # First point after el starts decreasing... find the exact max el
                         el_increasing = 0
-                        maxel = self.__find_exact_maxel(time, maxel)
-                time += self.__oneminute
+                        maxel = self.__find_exact_maxel(before_previous, time, maxel)
+                    elif (peak_after is None):
+                        peak_after = time
+                before_previous = previous
+                previous = time
+                skip = float(self.__horizon_skip_seconds(el))
+                if (up == 1): # keep sampling often enough to find the max el, like the vectorized search does
+                    skip = min(skip, self.__coarse_factor * self.__step.total_seconds())
+                time += max(self.__step, timedelta(seconds=skip))
             if (up == 1):
                 # end the last inview at the input end_time
                 # make sure to append AWARE datetimes
+                if (self.__orbit_regime != self.LowEarthOrbit):
+                    maxel = self.__find_exact_maxel(peak_before, end_time if (peak_after is None) else peak_after, maxel)
                 inviews.append((rising.replace(tzinfo=UTC), \
                                 end_time.replace(tzinfo=UTC), \
                                 maxel))
@@ -122,6 +141,221 @@ class InviewCalculator:
             sys.stdout.flush()
             raise
     
+    def compute_inviews_from_ephemeris(self, in_start_time, in_end_time, ephemeris):
+        """Method to compute inviews like compute_inviews (always vectorized), but from a SatelliteEphemeris of the satellite (e.g. shared by several ground stations) instead of propagating the satellite again.  The ephemeris grid times in the time period are the samples, and the rise/set/maximum elevation times are refined from the interpolated ephemeris."""
+        start_time = self.__time_to_naiveUTC(in_start_time)
+        end_time = self.__time_to_naiveUTC(in_end_time)
+        self.__ephemeris = ephemeris
+        try:
+            return self.__compute_inviews_vectorized(start_time, end_time)
+        finally:
+            self.__ephemeris = None
+
+    def __compute_inviews_vectorized(self, start_time, end_time):
+        """Private method to compute inviews by sampling the whole time period (at the minimum pass steps, skipping the stretches where the satellite cannot rise) in a couple of propagations and only refining the samples where the elevation crosses the minimum elevation angle."""
+        station_frame = self.__station_frame # its masks hold the minimum elevation angle
+        # Samples at start_time, start_time + step, ... while < end_time
+        span_us = (end_time - start_time) // self.__onemicrosecond
+        nsamples = max(0, -(-span_us // (self.__step // self.__onemicrosecond)))
+        if (nsamples == 0):
+            (az, el) = self.__look(start_time)
+            if (station_frame.is_above_minimum_elevation(el)):
+                return [(start_time.replace(tzinfo=UTC), end_time.replace(tzinfo=UTC), 0)]
+            return []
+        if (self.__ephemeris is None):
+            times = np.datetime64(start_time, 'us') + np.arange(nsamples) * np.timedelta64(self.__step)
+            (times, el) = self.__sample_skipping_horizon(times)
+        else:
+            # Every grid time of the shared ephemeris in the time period... already propagated (and the GMSTs
+            # already computed, for any ground station), just rotate them
+            (first, last) = self.__ephemeris.get_time_grid().get_period_indices(start_time, end_time)
+            time_grid = self.__ephemeris.get_time_grid().get_subgrid(first, last)
+            times = time_grid.get_times()
+            (az, el) = self.__observer_look(time_grid, self.__ephemeris.get_positions()[:, first:last])
+        nsamples = len(times)
+
+        # up/down state after each sample... samples exactly at the minimum elevation angle keep the previous state
+        above = station_frame.is_above_minimum_elevation(el)
+        known = above | station_frame.is_below_minimum_elevation(el)
+        initially_up = bool(above[0])
+        last_known = np.maximum.accumulate(np.where(known, np.arange(nsamples), -1))
+        up = np.where(last_known >= 0, above[last_known], initially_up)
+        was_up = np.concatenate(([initially_up], up[:-1]))
+        rises = list(np.nonzero(up & ~was_up)[0])
+        sets = list(np.nonzero(~up & was_up)[0])
+        if (initially_up):
+            rises.insert(0, None) # the first inview starts at the input start_time
+        if (len(sets) < len(rises)):
+            sets.append(None) # the last inview ends at the input end_time
+
+        inviews = []
+        for (rise_index, set_index) in zip(rises, sets):
+            if (rise_index is None):
+                rising = start_time
+                first = 0
+            else:
+                rising = self.__find_exact_crossing(times[rise_index - 1].astype(datetime), times[rise_index].astype(datetime), 0)
+                first = rise_index
+            if (set_index is None):
+                crossing = end_time
+                last = nsamples
+            else:
+                crossing = self.__find_exact_crossing(times[set_index - 1].astype(datetime), times[set_index].astype(datetime), 1)
+                last = set_index
+            # Track the maximum elevation exactly like the stepped search does
+            maxel = 0
+            el_increasing = 1
+            for k in range(first, last):
+                if (above[k]):
+                    if (el[k] > maxel):
+                        maxel = el[k]
+                    elif (el_increasing) and (self.__orbit_regime == self.LowEarthOrbit): # First point after el starts decreasing... find the exact max el
+                        el_increasing = 0
+                        time = times[k].astype(datetime)
+                        if (k >= 2):
+                            maxel = self.__find_exact_maxel(times[k - 2].astype(datetime), time, maxel)
+                        else:
+                            maxel = self.__find_exact_maxel(times[0].astype(datetime) - self.__step, time, maxel)
+            if (self.__orbit_regime != self.LowEarthOrbit) and (last > first):
+                # Above LEO the samples can be far apart and the elevation can peak more than once... find the exact max el around the highest sample
+                k = first + int(np.argmax(el[first:last]))
+                after = times[k + 1].astype(datetime) if (k + 1 < nsamples) else end_time
+                before = times[k - 1].astype(datetime) if (k >= 1) else times[0].astype(datetime) - self.__step
+                maxel = self.__find_exact_maxel(before, after, maxel)
+            # make sure to append AWARE datetimes
+            inviews.append((rising.replace(tzinfo=UTC), crossing.replace(tzinfo=UTC), maxel))
+
+        return inviews
+
+    def __sample_skipping_horizon(self, times):
+        """Private method to compute the elevations at the sample times (numpy datetime64), except where the satellite cannot rise (or, above LEO, cannot set).  Every __coarse_factor-th sample is computed first; the samples in between two of those are skipped when both ends are on the same side of the minimum elevation angle and the horizon skip from both ends covers the whole gap.  Returns the sample times that were computed and their elevations."""
+        nsamples = len(times)
+        coarse = np.zeros(nsamples, dtype=bool)
+        coarse[::self.__coarse_factor] = True
+        coarse[-1] = True
+        coarse_indices = np.nonzero(coarse)[0]
+        el = np.empty(nsamples)
+        (az, el[coarse]) = self.__look(times[coarse])
+        if (self.__orbit_regime == self.HighlyEllipticalOrbit) and (len(coarse_indices) > 1):
+            # Perigee-aware:  bound the radius in each gap by where the satellite really is instead of by perigee/apogee
+            (radius_low, radius_high) = self.__radius_bounds(times[coarse])
+        else:
+            radius_low = radius_high = None
+        coarse_el = el[coarse]
+        left = self.__horizon_skip_seconds(coarse_el[:-1], radius_low, radius_high)
+        right = self.__horizon_skip_seconds(coarse_el[1:], radius_low, radius_high)
+        coarse_above = self.__station_frame.is_above_minimum_elevation(coarse_el)
+        same_side = coarse_above[:-1] == coarse_above[1:]
+        gap = np.diff(coarse_indices) * self.__step.total_seconds()
+        skipped = same_side & ((left + right) > gap)
+        # Samples between coarse sample i and i+1 belong to gap i
+        gap_of_sample = np.minimum(np.arange(nsamples) // self.__coarse_factor, max(len(gap) - 1, 0))
+        computed = coarse.copy()
+        if (len(gap) > 0):
+            computed |= ~skipped[gap_of_sample]
+        fill = computed & ~coarse
+        if (np.any(fill)):
+            (az, el[fill]) = self.__look(times[fill])
+        return (times[computed], el[computed])
+
+    def __init_horizon_skip(self):
+        """Private method to classify the orbit and set up the bounds used by __horizon_skip_seconds from the TLE mean motion, eccentricity, and inclination and the ground station location"""
+        elements = self.__satellite_tle.get_elements()
+        mean_motion_revs = float(elements['mean_motion']) # revs/day
+        mean_motion = mean_motion_revs * 2 * math.pi / 86400.0 # radians/second
+        eccentricity = float(elements['eccentricity'])
+        semi_major_axis = (self.__earth_mu / (mean_motion * mean_motion)) ** (1.0 / 3.0) # km
+        if (eccentricity >= self.__heo_minimum_eccentricity):
+            self.__orbit_regime = self.HighlyEllipticalOrbit
+        elif (abs(mean_motion_revs - 1.0) <= self.__geo_mean_motion_tolerance):
+            self.__orbit_regime = self.GeosynchronousOrbit
+        elif (mean_motion_revs >= self.__leo_minimum_mean_motion):
+            self.__orbit_regime = self.LowEarthOrbit
+        else:
+            self.__orbit_regime = self.MediumEarthOrbit
+        self.__coarse_factor = self.__coarse_factors[self.__orbit_regime]
+        self.__half_period = math.pi / mean_motion # seconds
+        self.__perigee_radius = semi_major_axis * (1 - eccentricity)
+        self.__apogee_radius = semi_major_axis * (1 + eccentricity)
+        self.__angular_momentum = math.sqrt(self.__earth_mu * semi_major_axis * (1 - eccentricity * eccentricity)) # km^2/s
+        self.__cos_inclination = math.cos(math.radians(float(elements['inclination'])))
+        # Largest and smallest possible station radius...
+        self.__skip_station_radius = self.__earth_equatorial_radius + self.__ground_station.get_elevation_in_meters() / 1000.0
+        self.__skip_station_radius_low = self.__earth_polar_radius
+        self.__skip_min_el = math.radians(self.__station_frame.get_minimum_elevation_angle())
+
+    def __horizon_skip_seconds(self, el, radius_low=None, radius_high=None):
+        """Private method to compute how many seconds the satellite is certain to stay below (or, above LEO, above) the minimum elevation angle, given its current elevation(s) el in degrees and the smallest/largest radius in km it can have meanwhile (default perigee/apogee).  0 when it may be about to rise (set)."""
+        if (radius_low is None):
+            radius_low = self.__perigee_radius
+        if (radius_high is None):
+            radius_high = self.__apogee_radius
+        el = np.radians(el)
+        min_el = self.__skip_min_el
+        margin = math.radians(self.__skip_angle_margin)
+        # Fastest the geocentric angle between station and satellite can change:  the satellite angular rate relative to the
+        # earth turning under it... largest at one end of the possible satellite angular rates
+        rate = np.maximum(self.__relative_angular_rate(self.__skip_rate_margin * self.__angular_momentum / (radius_low * radius_low)), \
+                          self.__relative_angular_rate(self.__angular_momentum / (radius_high * radius_high) / self.__skip_rate_margin))
+        # Geocentric angle between station and satellite from the slant geometry (earth center, station, satellite triangle)...
+        # smallest when the satellite is lowest and the station highest, compared to the largest angle at which the
+        # satellite can be at the minimum elevation angle
+        angle = np.arccos(np.clip(self.__skip_station_radius * np.cos(el) / radius_low, -1.0, 1.0)) - el
+        max_inview_angle = np.arccos(np.clip(self.__skip_station_radius_low * math.cos(min_el) / radius_high, -1.0, 1.0)) - min_el + margin
+        skip = np.where(radius_low > self.__skip_station_radius, np.fmax((angle - max_inview_angle) / rate, 0.0), 0.0)
+        if (self.__orbit_regime != self.LowEarthOrbit):
+            # ...and largest when the satellite is highest and the station lowest, compared to the smallest such angle
+            angle = np.arccos(np.clip(self.__skip_station_radius_low * np.cos(el) / radius_high, -1.0, 1.0)) - el
+            min_inview_angle = np.arccos(np.clip(self.__skip_station_radius * math.cos(min_el) / radius_low, -1.0, 1.0)) - min_el - margin
+            skip = np.maximum(skip, np.fmax((min_inview_angle - angle) / rate, 0.0))
+        return skip
+
+    def __relative_angular_rate(self, angular_rate):
+        """Private method to bound the angular rate (radians/second) of the satellite direction as seen from the turning earth, given its inertial angular rate(s)"""
+        return np.sqrt(angular_rate * angular_rate + self.__earth_rotation_rate * self.__earth_rotation_rate - \
+                       2 * angular_rate * self.__earth_rotation_rate * self.__cos_inclination)
+
+    def __radius_bounds(self, times):
+        """Private method to bound the satellite radius in km between each pair of consecutive times (numpy datetime64) by the propagated radius at the times, using the radial velocity to tell when perigee or apogee is in between"""
+        (pos, vel) = self.__orb.get_position(times)
+        pos = np.array(pos)
+        vel = np.array(vel)
+        radius = np.sqrt(np.sum(pos * pos, axis=0))
+        radial_velocity = np.sum(pos * vel, axis=0) / radius
+        radius_low = np.minimum(radius[:-1], radius[1:]) * (1 - self.__skip_radius_margin)
+        radius_high = np.maximum(radius[:-1], radius[1:]) * (1 + self.__skip_radius_margin)
+        whole_orbit = (np.diff(times) / np.timedelta64(1, 's')) >= self.__half_period
+        perigee = whole_orbit | ((radial_velocity[:-1] <= 0) & (radial_velocity[1:] >= 0))
+        apogee = whole_orbit | ((radial_velocity[:-1] >= 0) & (radial_velocity[1:] <= 0))
+        radius_low = np.where(perigee, np.minimum(radius_low, self.__perigee_radius * (1 - self.__skip_radius_margin)), radius_low)
+        radius_high = np.where(apogee, np.maximum(radius_high, self.__apogee_radius * (1 + self.__skip_radius_margin)), radius_high)
+        return (radius_low, radius_high)
+
+    def __look(self, utc_time):
+        """Private method to compute az/el at *naive* UTC time(s) utc_time (a datetime or an array of numpy datetime64)"""
+        if (self.__ephemeris is not None):
+            return self.__observer_look(utc_time, self.__ephemeris.interpolate_positions(utc_time))
+        (pos, vel) = self.__orb.get_position(utc_time)
+        return self.__observer_look(utc_time, pos)
+
+    def __observer_look(self, utc_time, pos):
+        """Private method to compute az/el at *naive* UTC time(s) utc_time by rotating the satellite ECI position(s) pos (km) into ECEF and the ground station topocentric frame (StationFrame)... the same angles as pyorbital's get_observer_look, without propagating the satellite"""
+        (az, el, range_km) = self.__station_frame.look(ReferenceFrames.eci_to_ecef_position(utc_time, pos))
+        return (az, el)
+
+    def __time_to_naiveUTC(self, in_time):
+        """Private method to convert (if necessary) a time (potentially with timezone) to a naive time that is UTC."""
+        # NOTE:  pyorbital EXPECTS naive date/times and interprets them
+        # as UTC... so we need to satisfy it; however, we are making this
+        # module DATETIME AWARE, so RETURN VALUES are DATETIME AWARE!!
+        if (in_time.tzinfo is not None):
+            temp = in_time.astimezone(UTC)
+            time = datetime(temp.year, temp.month, temp.day, \
+                            temp.hour, temp.minute, temp.second)
+        else:
+            time = in_time
+        return time
+
     def print_inviews(self, inviews):
         """Method to print a table of inviews... assumes that inviews contains the data for such a table"""
         for iv in inviews:
@@ -129,87 +363,112 @@ class InviewCalculator:
 
     def compute_azels(self, in_start_time, in_end_time, time_step_seconds):
         """Method to compute az/el angles at time_step intervals during the input time period, INDEPENDENT of whether the satellite is actually in view """
-        # NOTE:  pyorbital EXPECTS naive date/times and interprets them
-        # as UTC... so we need to satisfy it; however, we are making this
-        # module DATETIME AWARE, so RETURN VALUES are DATETIME AWARE!!
-        # Also, all naive inputs are assumed to be UTC and all aware inputs
+        # NOTE:  RETURN VALUES are DATETIME AWARE (UTC)... see compute_azel_array
+        return self.azels_from_array(self.compute_azel_array(in_start_time, in_end_time, time_step_seconds))
+
+    def compute_azel_array(self, in_start_time, in_end_time, time_step_seconds):
+        """Method to compute az/el angles, ranges and range rates at time_step intervals during the input time period (the times of compute_azels), INDEPENDENT of whether the satellite is actually in view, with one propagation.  Returns a NumPy structured array of AzElRecordType:  time (*naive* UTC datetime64), azimuth and elevation (degrees), range (km), and range rate (km/s, positive while the range grows) from the relative velocity."""
+        times = self.__azel_times(in_start_time, in_end_time, time_step_seconds)
+        records = np.zeros(len(times), dtype=self.AzElRecordType)
+        records['time'] = times
+        if (len(times) == 0):
+            return records
+        # N.B. the propagators work in kilometers
+        (pos, vel) = ReferenceFrames.eci_to_ecef(times, *self.__orb.get_position(times))
+        (records['azimuth'], records['elevation'], records['range']) = self.__station_frame.look(pos)
+        records['range_rate'] = self.__station_frame.range_rates(pos, vel)
+        return records
+
+    def compute_azels_from_ephemeris(self, in_start_time, in_end_time, time_step_seconds, ephemeris):
+        """Method to compute az/el angles like compute_azels, but all at once from a SatelliteEphemeris of the satellite (interpolated at the time steps) instead of propagating the satellite again"""
+        times = self.__azel_times(in_start_time, in_end_time, time_step_seconds)
+        # N.B. the propagators work in kilometers
+        pos = ReferenceFrames.eci_to_ecef_position(times, ephemeris.interpolate_positions(times))
+        (az, el, range_km) = self.__station_frame.look(pos)
+        azels = []
+        for (time, time_az, time_el, time_range_km) in zip(times.astype(datetime), az, el, range_km):
+            azels.append((time.replace(tzinfo=UTC), time_az, time_el, time_range_km))
+        return azels
+
+    def __azel_times(self, in_start_time, in_end_time, time_step_seconds):
+        """Private method to get the times of an az/el table as a *naive* UTC numpy datetime64 array:  start_time, start_time + delta, ... while < end_time + delta"""
+        # NOTE:  all naive inputs are assumed to be UTC and all aware inputs
         # are converted to UTC (and then made naive)
-        if (in_start_time.tzinfo is not None):
-            temp = in_start_time.astimezone(UTC)
-            start_time = datetime(temp.year, temp.month, temp.day, \
-                                  temp.hour, temp.minute, temp.second)
-        else:
-            start_time = in_start_time
-        if (in_end_time.tzinfo is not None):
-            temp = in_end_time.astimezone(UTC)
-            end_time = datetime(temp.year, temp.month, temp.day, \
-                                temp.hour, temp.minute, temp.second)
-        else:
-            end_time = in_end_time
-        # start_time, end_time are now naive
+        start_time = self.__time_to_naiveUTC(in_start_time)
+        end_time = self.__time_to_naiveUTC(in_end_time)
         try:
             delta = timedelta(seconds=time_step_seconds)
         except:
             delta = timedelta(seconds=60)
-        azels = []
-        time = start_time
-        # Naively compute the table... i.e. compute time, az, el for the
-        # input duration at each time step... no matter whether the satellite
-        # is really inview or not!
-        while (time < end_time + delta):
-            (az, el) = self.__orb.get_observer_look(time, self.__ground_station.get_longitude(), \
-                                                    self.__ground_station.get_latitude(), \
-                                                    self.__ground_station.get_minimum_elevation_angle())
-            range_km = self.__compute_range(time)
-            outtime = time.replace(tzinfo=UTC) # time is unmodified!
-            azels.append((outtime, az, el, range_km))
-            time += delta
-            
-        return azels
-
-    def __compute_range(self, utc_time):
-        """Method to compute range in kilometers from observer to satellite at *naive* UTC time utc_time"""
-        # N.B. pyorbital works in kilometers
-        (pos_x, pos_y, pos_z), (vel_x, vel_y, vel_z) = self.__orb.get_position(utc_time, normalize=False)
-        (opos_x, opos_y, opos_z), (ovel_x, ovel_y, ovel_z) = astronomy.observer_position(utc_time, \
-                self.__ground_station.get_longitude(), self.__ground_station.get_latitude(), self.__ground_station.get_elevation_in_meters()/1000.0)
-        dx = pos_x - opos_x
-        dy = pos_y - opos_y
-        dz = pos_z - opos_z
-        return math.sqrt(dx*dx + dy*dy + dz*dz) # km
+        nsteps = -(-((end_time + delta - start_time) // self.__onemicrosecond) // (delta // self.__onemicrosecond))
+        return np.datetime64(start_time, 'us') + np.arange(max(nsteps, 0)) * np.timedelta64(delta)
 
     # up is what it is **before** the crossing
-    def __find_exact_crossing(self, time, up): 
-        """Private method to refine an in view/out of view crossing time from the nearest minute to the nearest second."""
-        exacttime = time
-        # The crossing occurred in the minute before now... search backwards
-        # for the exact second of crossing
-        for j in range(0, 60):
-            exacttime -= self.__onesecond
-            (az, el) = self.__orb.get_observer_look(exacttime, \
-                                                    self.__ground_station.get_longitude(), \
-                                                    self.__ground_station.get_latitude(), \
-                                                    self.__ground_station.get_minimum_elevation_angle())
-            if ((el > self.__ground_station.get_minimum_elevation_angle()) and (up == 1)) or \
-               ((el < self.__ground_station.get_minimum_elevation_angle()) and (up == 0)):
-                break
-        return exacttime
-
-    def __find_exact_maxel(self, time, maxel):
-        """Private method to refine the maximum elevation from occuring at the nearest minute to the nearest second."""
-        exacttime = time
-        # The maximum elevation occurred in the **two** minutes before now... search backwards
-        # for the exact second of maximum elevation
-        for j in range(0, 120):
-            exacttime -= self.__onesecond
-            (az, el) = self.__orb.get_observer_look(exacttime, \
-                                                    self.__ground_station.get_longitude(), \
-                                                    self.__ground_station.get_latitude(), \
-                                                    self.__ground_station.get_minimum_elevation_angle())
-            if (el > maxel):
-                maxel = el
-        return maxel        
-    
+    def __find_exact_crossing(self, before, after, up):
+        """Private method to refine an in view/out of view crossing time, bracketed by the *naive* UTC times before and after, by bisection to within the tolerance.  Returns the latest time found that is still on the before side of the crossing."""
+        while (after - before > self.__tolerance):
+            middle = before + (after - before) / 2
+            (az, el) = self.__look(middle)
+            if ((self.__station_frame.is_above_minimum_elevation(el)) and (up == 1)) or \
+               ((self.__station_frame.is_below_minimum_elevation(el)) and (up == 0)):
+                before = middle
+            else:
+                after = middle
+        return before
+
+    def __find_exact_maxel(self, before, after, maxel):
+        """Private method to refine the maximum elevation, bracketed by the *naive* UTC times before and after, by golden-section search to within the tolerance."""
+        tolerance = self.__tolerance.total_seconds()
+        a = 0.0
+        b = (after - before).total_seconds()
+        c = b - self.__inverse_golden_ratio * (b - a)
+        d = a + self.__inverse_golden_ratio * (b - a)
+        (az, elc) = self.__look(before + timedelta(seconds=c))
+        (az, eld) = self.__look(before + timedelta(seconds=d))
+        while (b - a > tolerance):
+            if (elc > eld):
+                # The maximum is in [a, d]
+                b = d
+                d = c
+                eld = elc
+                c = b - self.__inverse_golden_ratio * (b - a)
+                (az, elc) = self.__look(before + timedelta(seconds=c))
+            else:
+                # The maximum is in [c, b]
+                a = c
+                c = d
+                elc = eld
+                d = a + self.__inverse_golden_ratio * (b - a)
+                (az, eld) = self.__look(before + timedelta(seconds=d))
+        return max(maxel, elc, eld)
+
+    # Class Methods
+    @classmethod
+    def azels_from_array(cls, records):
+        """Method to convert a structured array of AzElRecordType (see compute_azel_array) to the list of (DATETIME AWARE UTC time, azimuth, elevation, range) that compute_azels returns"""
+        return [(time.replace(tzinfo=UTC), az, el, range_km) for (time, az, el, range_km) in \
+                zip(records['time'].astype(datetime), records['azimuth'].tolist(), records['elevation'].tolist(), records['range'].tolist())]
+
     # Class member constants
+    AzElRecordType = np.dtype([('time', 'datetime64[us]'), ('azimuth', np.float64), ('elevation', np.float64), \
+                               ('range', np.float64), ('range_rate', np.float64)])
+    __onemicrosecond = timedelta(microseconds=1)
     __onesecond = timedelta(seconds=1)
     __oneminute = timedelta(minutes=1)
+    __inverse_golden_ratio = (math.sqrt(5) - 1) / 2
+    __earth_mu = 398600.4418 # km^3/s^2, http://earth-info.nga.mil/GandG/publications/tr8350.2/wgs84fin.pdf
+    __earth_equatorial_radius = 6378.137 # km, ditto
+    __earth_polar_radius = 6356.752 # km, ditto
+    __earth_rotation_rate = 7.292115e-5 # radians/second, ditto
+    __skip_rate_margin = 1.1 # SGP4 perturbations make the real mean motion differ a little from the TLE
+    __skip_angle_margin = 1.0 # degrees, geodetic vs. geocentric horizon
+    __skip_radius_margin = 0.01 # SGP4 short periodic perturbations of the radius between samples
+    __leo_minimum_mean_motion = 11.25 # revs/day, period of 128 minutes (2000 km altitude)
+    __geo_mean_motion_tolerance = 0.1 # revs/day, geosynchronous
+    __heo_minimum_eccentricity = 0.25
+    LowEarthOrbit = 0
+    MediumEarthOrbit = 1
+    GeosynchronousOrbit = 2
+    HighlyEllipticalOrbit = 3
+    # Every n-th sample is used to decide where to skip... the slower the satellite moves across the sky, the sparser
+    __coarse_factors = {LowEarthOrbit: 10, MediumEarthOrbit: 30, GeosynchronousOrbit: 60, HighlyEllipticalOrbit: 10}
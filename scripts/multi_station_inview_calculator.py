@@ -0,0 +1,48 @@
+from datetime import timedelta
+from satellite_ephemeris import SatelliteEphemeris
+from inview_calculator import InviewCalculator
+
+###############################################################################
+# Python module to compute the inview times from several ground stations to
+# a spacecraft at once.  The spacecraft is propagated once over a time grid
+# (see satellite_ephemeris) and the shared ECI positions are rotated into
+# each ground station's topocentric frame, so the cost scales with the
+# propagation rather than with the propagation times the number of ground
+# stations.
+###############################################################################
+
+class MultiStationInviewCalculator:
+    """Class to compute inviews above each ground station's minimum elevation angle from a list of ground stations to a satellite"""
+    # Constructor
+    def __init__(self, ground_station_list, satellite_tle, tolerance_seconds=1.0, minimum_pass_seconds=60):
+        """Constructor:  list of GroundStation, satellite TLE as SatelliteTle, tolerance_seconds and minimum_pass_seconds as for InviewCalculator (minimum_pass_seconds is also the propagation time step)"""
+        self.__ground_station_list = ground_station_list
+        self.__satellite_tle = satellite_tle
+        self.__step = timedelta(seconds=max(minimum_pass_seconds, 1))
+        self.__inview_calculators = [InviewCalculator(gs, satellite_tle, tolerance_seconds=tolerance_seconds, \
+                                                      minimum_pass_seconds=minimum_pass_seconds) \
+                                     for gs in ground_station_list]
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'Multi Station Inview Calculator:\n' \
+              'ground stations=%s, satellite TLE=\n%s' % \
+              (", ".join([gs.get_name() for gs in self.__ground_station_list]), self.__satellite_tle)
+        return out
+
+    def get_ground_station_list(self):
+        return self.__ground_station_list
+
+    def compute_inviews(self, in_start_time, in_end_time):
+        """Method to compute inviews (in UTC) for every ground station over a specified time period, propagating the satellite only once.  Returns a list with the list of inviews for each ground station, in the order of the ground station list (see InviewCalculator.compute_inviews)."""
+        ephemeris = SatelliteEphemeris.from_tle(self.__satellite_tle, in_start_time, in_end_time, self.__step.total_seconds())
+        return [ic.compute_inviews_from_ephemeris(in_start_time, in_end_time, ephemeris) \
+                for ic in self.__inview_calculators]
+
+    def print_inviews(self, inviews):
+        """Method to print a table of inviews for each ground station... assumes that inviews contains the data for such tables"""
+        for (gs, ic, station_inviews) in zip(self.__ground_station_list, self.__inview_calculators, inviews):
+            print("%s:" % gs.get_name())
+            ic.print_inviews(station_inviews)
@@ -13,10 +13,9 @@ import tempfile
 from argvalidator import ArgValidator
 import os
 import sys
-import glob
 from configuration import Configuration
-from pyorbital.orbital import Orbital
 from satellite_tle import SatelliteTle
+from tle_archive import TleArchive
 from ground_station import GroundStation
 from az_el_range_report import AzElRangeReportGenerator
 from datetime import datetime
@@ -66,6 +65,7 @@ def create_azel_cmd_telemetry_report(base_output_dir, tz, start_day, end_day, ti
 def process_file(filename, eltdir, pngname, tzone, satnum, gs, data):
 
   tle_dir = data.get('tle_dir', "")
+  archive = TleArchive(tle_dir, selection=data.get('tle_selection', None)) # the dated directories (YYYY-MM-DD/*.tle) of TLEs
   lyear = lmonth = lday = 0
   ax = generate_azelrange_plot()
   tle = SatelliteTle.from_config(data.get('satellite',[]))
@@ -94,26 +94,21 @@ def process_file(filename, eltdir, pngname, tzone, satnum, gs, data):
           generate_azelrange_subplot(date, ax, azels, i, data)# as the number of days progresses... i grows... and the color becomes closer to white
         azels = []
         i = i + 1
-
-        elglob = tle_dir + "%s-%s-%s/*.tle" % (year, month, day)
-        elfile = glob.glob(elglob)
-
-        if (debug):
-          print("New date found:  %s-%s-%s.  From glob %s found TLE file:  %s." % (year, month, day, elglob, elfile[0]))
-
-        tle = SatelliteTle(satnum, tle_file=elfile[0])
         if (debug):
-          print("TLE:")
-          print(tle)
-        orb = Orbital(str(tle.get_satellite_number()), \
-                          line1=tle.get_line1(), \
-                          line2=tle.get_line2())
-
+          print("New date found:  %s-%s-%s." % (year, month, day))
 
       instant = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
       temp = tzone.localize(instant).astimezone(UTC)
       time = datetime(temp.year, temp.month, temp.day, temp.hour, temp.minute, temp.second)
-      (az, el) = orb.get_observer_look(time, gs.get_longitude(), gs.get_latitude(), gs.get_elevation_in_meters())
+      # The best TLE for the time (binary search of the archive index)... it can change within a day
+      time_tle = archive.get_satellite_tle(satnum, time)
+      if (time_tle is not tle):
+        tle = time_tle
+        if (debug):
+          print("TLE for %s:" % time)
+          print(tle)
+        orb = tle.get_propagator()
+      (az, el) = orb.get_observer_look(time, gs.get_longitude(), gs.get_latitude(), gs.get_elevation_in_meters() / 1000.0)
       azels.append((time, az, el))
       #print("%s%s, %s, %s-%s-%s %s:%s:%s, %d, %d" % (tle.get_epoch_year(), tle.get_epoch_day(), \
       #    time, year, month, day, hour, minute, second, el, az))
@@ -0,0 +1,111 @@
+import numpy as np
+from pyorbital import astronomy
+from time_grid import TimeGrid
+
+###############################################################################
+# Python module to convert whole arrays of satellite states between the
+# inertial frame the propagators work in (TEME, called ECI throughout these
+# scripts) and the earth fixed frame (ECEF... strictly the pseudo earth
+# fixed frame, as polar motion is ignored).  The frames differ by a rotation
+# about z by the Greenwich mean sidereal time (GMST), which is evaluated
+# once for a whole array of times (and remembered for the last few time
+# arrays, since the same time grid is usually converted more than once,
+# e.g. for the satellite and for the ground station, or kept with a shared
+# TimeGrid for every satellite and ground station using it), and earth fixed
+# velocities include the earth rotation term (the velocity of the earth
+# fixed frame, omega x r).  Ground station (observer) positions
+# are converted the same way.
+#
+# Positions (km) and velocities (km/s) are 3 values for one time or
+# 3 x number of times arrays (like the propagators return), and the times
+# can be a TimeGrid.
+#
+# Here are some reference URLs:
+# https://www.celestrak.org/publications/AIAA/2006-6753/
+# http://celestrak.com/columns/v02n01/
+# http://celestrak.com/columns/v02n03/
+###############################################################################
+
+class ReferenceFrames:
+    """Class (of class methods only) to convert positions and velocities between ECI (TEME) and ECEF for arrays of times"""
+
+    # Class Methods
+    @classmethod
+    def gmst(cls, utc_time):
+        """Method to get the Greenwich mean sidereal time (radians) at *naive* UTC time(s) utc_time (a datetime, a numpy datetime64, an array of them, or a TimeGrid)... computed once per time array (the same as pyorbital's astronomy.gmst)"""
+        if (isinstance(utc_time, TimeGrid)):
+            return utc_time.get_gmst()
+        times = np.asarray(utc_time, dtype='datetime64[us]')
+        if (times.ndim == 0):
+            return float(astronomy.gmst(times)) # one time (e.g. refining an inview) is not worth remembering
+        key = (times.shape, times.tobytes())
+        gmst_radians = cls.__gmst_cache.get(key, None)
+        if (gmst_radians is None):
+            gmst_radians = astronomy.gmst(times)
+            if (times.size <= cls.__gmst_cache_points):
+                gmst_radians.setflags(write=False) # shared by everything that converts the same times
+                if (len(cls.__gmst_cache) >= cls.__gmst_cache_size):
+                    del cls.__gmst_cache[next(iter(cls.__gmst_cache))] # forget the oldest
+                cls.__gmst_cache[key] = gmst_radians
+        return gmst_radians
+
+    @classmethod
+    def eci_to_ecef_position(cls, utc_time, pos):
+        """Method to rotate ECI position(s) pos (km) at *naive* UTC time(s) utc_time into ECEF"""
+        (cos_gmst, sin_gmst) = cls.__cos_sin_gmst(utc_time)
+        return np.array([cos_gmst * pos[0] + sin_gmst * pos[1], \
+                         cos_gmst * pos[1] - sin_gmst * pos[0], \
+                         pos[2] * np.ones_like(cos_gmst)])
+
+    @classmethod
+    def eci_to_ecef(cls, utc_time, pos, vel):
+        """Method to convert ECI position(s) pos (km) and velocity(ies) vel (km/s) at *naive* UTC time(s) utc_time to ECEF.  Returns (position, velocity)... the velocity is relative to the rotating earth."""
+        ecef_pos = cls.eci_to_ecef_position(utc_time, pos)
+        (cos_gmst, sin_gmst) = cls.__cos_sin_gmst(utc_time)
+        ecef_vel = np.array([cos_gmst * vel[0] + sin_gmst * vel[1] + cls.EarthRotationRate * ecef_pos[1], \
+                             cos_gmst * vel[1] - sin_gmst * vel[0] - cls.EarthRotationRate * ecef_pos[0], \
+                             vel[2] * np.ones_like(cos_gmst)])
+        return (ecef_pos, ecef_vel)
+
+    @classmethod
+    def ecef_to_eci_position(cls, utc_time, pos):
+        """Method to rotate ECEF position(s) pos (km) at *naive* UTC time(s) utc_time into ECI"""
+        (cos_gmst, sin_gmst) = cls.__cos_sin_gmst(utc_time)
+        return np.array([cos_gmst * pos[0] - sin_gmst * pos[1], \
+                         sin_gmst * pos[0] + cos_gmst * pos[1], \
+                         pos[2] * np.ones_like(cos_gmst)])
+
+    @classmethod
+    def ecef_to_eci(cls, utc_time, pos, vel):
+        """Method to convert ECEF position(s) pos (km) and velocity(ies) vel (km/s, relative to the rotating earth) at *naive* UTC time(s) utc_time to ECI.  Returns (position, velocity)."""
+        inertial_vel = [vel[0] - cls.EarthRotationRate * pos[1], vel[1] + cls.EarthRotationRate * pos[0], vel[2]]
+        return (cls.ecef_to_eci_position(utc_time, pos), cls.ecef_to_eci_position(utc_time, inertial_vel))
+
+    @classmethod
+    def geodetic_to_ecef(cls, lon, lat, alt):
+        """Method to get the ECEF position (km) of a longitude, latitude (degrees, geodetic) and altitude (km above the WGS-84 ellipsoid)"""
+        lon = np.deg2rad(lon)
+        lat = np.deg2rad(lat)
+        c = 1 / np.sqrt(1 + cls.__earth_flattening * (cls.__earth_flattening - 2) * np.sin(lat) ** 2)
+        sq = c * (1 - cls.__earth_flattening) ** 2
+        achcp = (cls.__earth_radius * c + alt) * np.cos(lat)
+        return np.array([achcp * np.cos(lon), achcp * np.sin(lon), (cls.__earth_radius * sq + alt) * np.sin(lat)])
+
+    @classmethod
+    def observer_position(cls, utc_time, lon, lat, alt):
+        """Method to compute the ECI position (km) and velocity (km/s) of an observer at lon, lat (degrees) and alt (km) at *naive* UTC time(s) utc_time... the same as pyorbital's astronomy.observer_position, with the GMST computed once per time array.  Returns ((x, y, z), (vx, vy, vz))."""
+        (x, y, z) = cls.ecef_to_eci_position(utc_time, cls.geodetic_to_ecef(lon, lat, alt))
+        return (x, y, z), (-cls.EarthRotationRate * y, cls.EarthRotationRate * x, np.zeros_like(z))
+
+    @classmethod
+    def __cos_sin_gmst(cls, utc_time):
+        gmst_radians = cls.gmst(utc_time)
+        return (np.cos(gmst_radians), np.sin(gmst_radians))
+
+    # Class member constants
+    EarthRotationRate = 7.292115e-5 # radians/second (as pyorbital uses)
+    __earth_radius = 6378.137 # km, WGS-84
+    __earth_flattening = 1 / 298.257223563 # WGS-84
+    __gmst_cache = {} # GMST arrays by time array, oldest first
+    __gmst_cache_size = 8
+    __gmst_cache_points = 1000000 # larger time arrays are not remembered
@@ -0,0 +1,113 @@
+import bisect
+from datetime import datetime, timedelta
+
+###############################################################################
+# Python module to represent the local days (in the report timezone) of a
+# report, e.g. from yesterday (-1) to a week from today (7), so that the
+# inviews (and in sun times) of the whole report window can be computed
+# with one propagation and then split into the days for display.  A time
+# period that crosses midnight (e.g. an inview) is cut at the day boundary
+# and each piece is marked as continued from the previous day and/or
+# continuing into the next day, instead of being cut short by computing
+# each day on its own.
+#
+# Here are some reference URLs:
+# https://docs.python.org/3/library/datetime.html
+# http://pytz.sourceforge.net/
+###############################################################################
+
+class ReportDays:
+    """Class to represent the local days of a report and split time periods computed over the whole report window into the days"""
+    # Constructor
+    def __init__(self, tz, start_day=0, end_day=0, today=None):
+        """Constructor:  tz is the (pytz) report timezone, start_day and end_day are the first and last days (0=today, -1=yesterday, 1=tomorrow, etc.), today is the local date/time of day 0 (default is now)"""
+        self.__tz = tz
+        self.__start_day = start_day
+        self.__end_day = end_day
+        if (today is None):
+            today = datetime.now()
+        self.__today = today
+        # Local midnights from the start of the first day to the end of the last day
+        self.__boundaries = [self.__local_midnight(day) for day in range(start_day, end_day + 2)]
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'Report Days:\n' \
+              'timezone=%s, start day=%d, end day=%d, today=%s' % \
+              (self.__tz, self.__start_day, self.__end_day, self.__today)
+        return out
+
+    def get_start_day(self):
+        return self.__start_day
+
+    def get_end_day(self):
+        return self.__end_day
+
+    def get_days(self):
+        """Method to get the days of the report (e.g. range(-1, 8))"""
+        return range(self.__start_day, self.__end_day + 1)
+
+    def get_start_time(self):
+        """Method to get the start of the report window (local midnight starting the first day)"""
+        return self.__boundaries[0]
+
+    def get_end_time(self):
+        """Method to get the end of the report window (local midnight ending the last day)"""
+        return self.__boundaries[-1]
+
+    def get_day_date(self, day):
+        """Method to get the local date/time of a day (today's time of day)"""
+        return self.__today + timedelta(days=day)
+
+    def get_day_period(self, day):
+        """Method to get the displayed time period of a day:  local 00:00:00 to 23:59:59"""
+        day_date = self.get_day_date(day)
+        return (self.__tz.localize(datetime(day_date.year, day_date.month, day_date.day, 0, 0, 0)), \
+                self.__tz.localize(datetime(day_date.year, day_date.month, day_date.day, 23, 59, 59)))
+
+    def split_periods(self, periods):
+        """Method to split time periods (tuples starting with the aware start and end times, e.g. inviews) computed over the report window into the days.  Returns a dictionary with the list of pieces for every day, in the order of the periods:  each piece is the period with its start and end times cut to the day (at most to the displayed end of the day, see get_day_period) and the split flags (NotSplit, or ContinuedFromPreviousDay and/or ContinuesIntoNextDay) appended."""
+        day_periods = dict([(day, []) for day in self.get_days()])
+        for period in periods:
+            (start_time, end_time) = (period[0], period[1])
+            first = max(0, bisect.bisect_right(self.__boundaries, start_time) - 1)
+            for i in range(first, len(self.__boundaries) - 1):
+                (day_start, day_end) = (self.__boundaries[i], self.__boundaries[i + 1])
+                if (day_start >= end_time):
+                    break
+                if (day_end <= start_time):
+                    continue
+                split = self.NotSplit
+                piece_start = start_time
+                if (start_time < day_start):
+                    piece_start = day_start.astimezone(start_time.tzinfo)
+                    split |= self.ContinuedFromPreviousDay
+                piece_end = max(piece_start, min(end_time, (day_end - self.__onesecond).astimezone(end_time.tzinfo)))
+                if (end_time > day_end):
+                    split |= self.ContinuesIntoNextDay
+                day_periods[self.__start_day + i].append((piece_start, piece_end) + tuple(period[2:]) + (split,))
+        return day_periods
+
+    def __local_midnight(self, day):
+        """Private method to get the local midnight starting a day"""
+        day_date = self.get_day_date(day)
+        return self.__tz.localize(datetime(day_date.year, day_date.month, day_date.day, 0, 0, 0))
+
+    # Class Methods
+    @classmethod
+    def split_text(cls, split):
+        """Method to describe the split flags of a piece of a time period (see split_periods) for a report"""
+        text = ""
+        if (split & cls.ContinuedFromPreviousDay):
+            text += " (continued from the previous day)"
+        if (split & cls.ContinuesIntoNextDay):
+            text += " (continues into the next day)"
+        return text
+
+    # Class member constants
+    __onesecond = timedelta(seconds=1)
+    NotSplit = 0
+    ContinuedFromPreviousDay = 1
+    ContinuesIntoNextDay = 2
@@ -0,0 +1,92 @@
+from datetime import timedelta
+import numpy as np
+from time_grid import TimeGrid
+
+###############################################################################
+# Python module to propagate a satellite once over a time grid and keep the
+# ECI positions and velocities, so that they can be shared (e.g. by the
+# inview computations for several ground stations) instead of propagating
+# the satellite again for every use (see sgp4_batch_propagator to propagate
+# many satellites at once).  Positions in between the grid times
+# are interpolated (cubic Hermite, using the velocities), which is good to
+# well under a meter for a one minute grid.  The grid is a shared TimeGrid,
+# so the ephemerides of every satellite over the same time period share
+# its Julian dates, GMSTs and sun vectors.
+#
+# Here are some reference URLs:
+# https://en.wikipedia.org/wiki/Cubic_Hermite_spline
+###############################################################################
+
+class SatelliteEphemeris:
+    """Class to hold a satellite ephemeris (ECI positions and velocities in km and km/s) propagated over a time grid"""
+    # Constructor
+    def __init__(self, satellite_tle, times, positions, velocities):
+        """Constructor:  satellite TLE as SatelliteTle, the evenly spaced grid times (a TimeGrid, or naive UTC numpy datetime64, see create_time_grid), and the ECI positions (km) and velocities (km/s) at those times as 3 x number of times arrays"""
+        self.__satellite_tle = satellite_tle
+        self.__time_grid = TimeGrid.from_times(times)
+        self.__times = self.__time_grid.get_times()
+        self.__step = (self.__times[1] - self.__times[0]) if (len(self.__times) > 1) else np.timedelta64(60, 's')
+        self.__positions = positions
+        self.__velocities = velocities
+
+    # Class Methods to construct in alternative ways
+    @classmethod
+    def from_tle(cls, satellite_tle, in_start_time, in_end_time, time_step_seconds=60):
+        """Propagate the satellite (with its SatellitePropagator) over the time grid for the time period (see create_time_grid)"""
+        time_grid = TimeGrid.for_ephemeris(in_start_time, in_end_time, time_step_seconds)
+        (pos, vel) = satellite_tle.get_propagator().get_position(time_grid)
+        return cls(satellite_tle, time_grid, np.array(pos), np.array(vel))
+
+    @staticmethod
+    def create_time_grid(in_start_time, in_end_time, time_step_seconds=60):
+        """Method to create the grid times (naive UTC numpy datetime64) for a time period (naive times are UTC):  every time step from one time step before the start time to at least one time step after the end time, so that the time period can be interpolated all the way to its ends"""
+        return TimeGrid.for_ephemeris(in_start_time, in_end_time, time_step_seconds).get_times()
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'Satellite Ephemeris:\n' \
+              'start=%s, end=%s, time step=%s, satellite TLE=\n%s' % \
+              (self.__times[0], self.__times[-1], self.get_time_step(), self.__satellite_tle)
+        return out
+
+    def get_satellite_tle(self):
+        return self.__satellite_tle
+
+    def get_time_grid(self):
+        """Method to get the (shared) TimeGrid of the grid times"""
+        return self.__time_grid
+
+    def get_times(self):
+        """Method to get the grid times (naive UTC numpy datetime64)"""
+        return self.__times
+
+    def get_positions(self):
+        """Method to get the ECI positions (km) at the grid times, as a 3 x number of times array"""
+        return self.__positions
+
+    def get_velocities(self):
+        """Method to get the ECI velocities (km/s) at the grid times, as a 3 x number of times array"""
+        return self.__velocities
+
+    def get_time_step(self):
+        return self.__step.astype(timedelta)
+
+    def interpolate_positions(self, utc_time):
+        """Method to interpolate the ECI positions (km) at *naive* UTC time(s) utc_time (a datetime or an array of numpy datetime64).  Exact at the grid times."""
+        utc_time = TimeGrid.to_times(utc_time)
+        if (not isinstance(utc_time, np.ndarray)):
+            utc_time = np.datetime64(utc_time, 'us')
+        step = self.__step / np.timedelta64(1, 's')
+        offset = (utc_time - self.__times[0]) / self.__step
+        i = np.clip(np.floor(offset).astype(int), 0, len(self.__times) - 2)
+        s = offset - i
+        s2 = s * s
+        s3 = s2 * s
+        h00 = 2 * s3 - 3 * s2 + 1
+        h10 = (s3 - 2 * s2 + s) * step
+        h01 = 3 * s2 - 2 * s3
+        h11 = (s3 - s2) * step
+        return h00 * self.__positions[:, i] + h10 * self.__velocities[:, i] + \
+               h01 * self.__positions[:, i + 1] + h11 * self.__velocities[:, i + 1]
@@ -3,8 +3,9 @@ import os
 from datetime import datetime, timedelta
 from datetime import datetime, timedelta
 from satellite_tle import SatelliteTle
-from inview_calculator import InviewCalculator
+from multi_station_inview_calculator import MultiStationInviewCalculator
 from az_el_range_report import AzElRangeReportGenerator
+from report_days import ReportDays
 from pytz import UTC
 from ground_station_tracking_schedule import GroundStationTrackingSchedule
 
@@ -34,6 +35,10 @@ class SatelliteHtmlReportGenerator:
         self.__end_day = end_day
         self.__time_step_seconds = time_step_seconds
         self.__html_out = sys.stdout
+        self.__report_days = None
+        self.__station_inviews = [] # inviews over the whole report window for each ground station
+        self.__day_station_inviews = [] # ... split into the report days
+        self.__day_sun_times = [] # in sun, penumbra and umbra times split into the report days
 
 
     # Member functions
@@ -54,6 +59,10 @@ class SatelliteHtmlReportGenerator:
         filename = "%s/%4.4d-%2.2d-%2.2d.html" % (directory, today.year, today.month, today.day)
         #sys.stderr.write("Generating report: %s\n" % filename)
 
+        # Compute everything over the whole report window at once, then split it into the days
+        self.__report_days = ReportDays(self.__tz, self.__start_day, self.__end_day, today)
+        self.__compute_report_window()
+
         with open(filename, "w") as self.__html_out:
 
             self.__html_out.write("<html>\n")
@@ -86,12 +95,34 @@ class SatelliteHtmlReportGenerator:
 
         if (self.__aer_days > 0):
             #print self.__aer_days # debug
+            # Reuse the inviews when the report window covers the AER days
+            reuse = (self.__create_inviews) and (self.__start_day <= 0) and (self.__aer_days - 1 <= self.__end_day)
             i = 0
             for gs in self.__ground_station_list:
+                inviews = None
+                if (reuse):
+                    inviews = self.__station_inviews[i]
                 aerg = AzElRangeReportGenerator(self.__base_output_dir, gs, i, self.__satellite_tle, \
-                        self.__tz, self.__aer_days, self.__time_step_seconds)
+                        self.__tz, self.__aer_days, self.__time_step_seconds, inviews=inviews, report_days=self.__report_days)
                 aerg.generate_report()
                 i = i + 1
+
+    def __compute_report_window(self):
+        """Private method to compute the inviews for every ground station (propagating the satellite once) and the in sun times over the whole report window, and split them into the report days"""
+        start_time = self.__report_days.get_start_time()
+        end_time = self.__report_days.get_end_time()
+        self.__station_inviews = []
+        self.__day_station_inviews = []
+        if (self.__create_inviews):
+            msic = MultiStationInviewCalculator(self.__ground_station_list, \
+                                                self.__satellite_tle)
+            self.__station_inviews = msic.compute_inviews(start_time, end_time)
+            self.__day_station_inviews = [self.__report_days.split_periods(inviews) \
+                                          for inviews in self.__station_inviews]
+        self.__day_sun_times = []
+        if (self.__create_insun):
+            tables = self.__satellite_tle.compute_sun_times(start_time, end_time)
+            self.__day_sun_times = [self.__report_days.split_periods(table) for table in tables]
         
     def __generate_html_head(self):
         ident = self.__satellite_tle.get_satellite_name()
@@ -171,14 +202,11 @@ class SatelliteHtmlReportGenerator:
     def __generate_chart_for_day(self, day):
         # ALL TIMES ARE IN THE TIMEZONE self.__tz !!
         # Determine the time range for the requested day
-        day_date = datetime.now() + timedelta(days=day)
+        day_date = self.__report_days.get_day_date(day)
         day_year = day_date.year
         day_month = day_date.month
         day_day = day_date.day
-        start_time = self.__tz.localize(
-            datetime(day_year, day_month, day_day, 0, 0, 0))
-        end_time = self.__tz.localize(
-            datetime(day_year, day_month, day_day, 23, 59, 59))
+        (start_time, end_time) = self.__report_days.get_day_period(day)
         
         self.__html_out.write("        var container = " + \
               "document.getElementById('timeline%s');\n" % \
@@ -201,7 +229,9 @@ class SatelliteHtmlReportGenerator:
             row = row + 1
         i = 0
         if (self.__create_inviews):
-            for gs in self.__ground_station_list:
+            # Already computed for all of the ground stations over the whole report window
+            for (gs, day_inviews) in zip(self.__ground_station_list, self.__day_station_inviews):
+                inviews = day_inviews[day]
                 if (gs.get_show_operations_hours()):
                     self.__generate_dayshift_bar_for_day(gs, day, \
                                                          day_date, day_year, \
@@ -209,11 +239,11 @@ class SatelliteHtmlReportGenerator:
                     row = row + 1
                 iv.append(row)
                 row = row + self.__generate_inview_bars_for_day(gs, day, \
-                                                    start_time, end_time)
+                                                    start_time, inviews)
                 i = i + 1
             iv.append(row)
         if (self.__create_insun):
-            self.__generate_insun_bars_for_day(start_time, end_time)
+            self.__generate_insun_bars_for_day(day)
         
         self.__html_out.write("        function selectChart%d(e) {\n" % (day+200)) # 200 is a hack to not have - in names
         self.__html_out.write("          var ivrows = [")
@@ -330,25 +360,20 @@ class SatelliteHtmlReportGenerator:
         self.__html_out.write("        ]);\n")
 
     def __generate_inview_bars_for_day(self, ground_station, day, \
-                                       start_time, end_time):
-        # Time bars for inviews
+                                       start_time, inviews):
+        # Time bars for inviews (already computed for the ground station)
         gsname = ground_station.get_name()        
         helptext = ""
         if ((day >= 0) and (day < self.__aer_days)): 
             helptext = " (CLICK BAR FOR AZ/EL REPORT AND GRAPH)"
 
-        # Get the InviewCalculator and compute the inviews
-        ic = InviewCalculator(ground_station, \
-                              self.__satellite_tle)
-        inviews = []
-        inviews = ic.compute_inviews(start_time, end_time)
         contacts = []
         schedname = ""
         if (self.__create_contacts):
             fname = ground_station.get_schedule_directory().get_latest_schedule_full_filename_for_date(start_time.date())
             #print("Schedule filename: %s" % fname)
             if (fname is not None):
-                gsts = GroundStationTrackingSchedule(fname)
+                gsts = GroundStationTrackingSchedule.for_file(fname) # the workbook is loaded once for all of the days
                 contacts = gsts.get_satellite_contacts(self.__satellite_tle.get_satellite_contact_name())
                 #print(contacts)
                 schedname = " -- (Schedule File: %s)" % ground_station.get_schedule_directory().get_latest_schedule_filename_for_date(start_time.date())
@@ -359,13 +384,13 @@ class SatelliteHtmlReportGenerator:
             riselocal = inviews[i][0].astimezone(self.__tz)
             setlocal = inviews[i][1].astimezone(self.__tz)
             self.__html_out.write(("          ['%s - %s Inviews', ' ', '%s', " + \
-                   "'%s %02d:%02d:%02d - %02d:%02d:%02d, Max Elev %02.2f degrees%s %s', " + \
+                   "'%s %02d:%02d:%02d - %02d:%02d:%02d, Max Elev %02.2f degrees%s%s %s', " + \
                    "new Date(%s, %s, %s, %s, %s, %s), " + \
                    "new Date(%s, %s, %s, %s, %s, %s)],\n") % \
                    (gsname, self.__satellite_tle.get_satellite_name(), color, typetext, \
                     riselocal.hour, riselocal.minute, riselocal.second, \
                     setlocal.hour, setlocal.minute, setlocal.second, \
-                    inviews[i][2], helptext, schedname, \
+                    inviews[i][2], ReportDays.split_text(inviews[i][3]), helptext, schedname, \
                     riselocal.year, riselocal.month-1, riselocal.day, \
                     riselocal.hour, riselocal.minute, riselocal.second, \
                     setlocal.year, setlocal.month-1, setlocal.day, \
@@ -384,12 +409,9 @@ class SatelliteHtmlReportGenerator:
             # No overlap found... not on schedule
             return ('NO Contact', 'purple')
 
-    def __generate_insun_bars_for_day(self, start_time, end_time):
-        # Time bars for in sun times
-
-        # Get the SatelliteTle and compute the in sun times
-        suntimes = []
-        tables = self.__satellite_tle.compute_sun_times(start_time, end_time)
+    def __generate_insun_bars_for_day(self, day):
+        # Time bars for in sun times (already computed over the whole report window)
+        tables = [day_times[day] for day_times in self.__day_sun_times]
 
         suntimes = tables[0]
         self.__html_out.write("        dataTable.addRows([\n")
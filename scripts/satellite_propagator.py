@@ -0,0 +1,197 @@
+from sgp4.api import Satrec
+import numpy as np
+from reference_frames import ReferenceFrames
+from time_grid import TimeGrid
+
+###############################################################################
+# Python module to propagate a satellite from its two line element set with
+# a selectable backend:  pyorbital (numpy) or the sgp4 module (C, which also
+# handles the deep space and low perigee orbits that pyorbital does not).  Both backends give
+# TEME positions (km) and velocities (km/s), sub-satellite lon/lat/alt, and
+# observer look angles for *naive* UTC times (a datetime, an array of
+# numpy datetime64, or a TimeGrid, whose Julian dates and GMSTs are shared), so SatelliteTle, InviewCalculator, and the scripts can
+# use either one interchangeably.  One propagator is created per TLE (and
+# backend) and shared by everything that uses that TLE.  pyorbital's orbit
+# module (which imports scipy) is only imported when a pyorbital propagator
+# is created, so the sgp4 backend starts quickly.
+#
+# Here are some reference URLs:
+# http://pytroll.org/
+# https://pypi.org/project/sgp4/
+# http://celestrak.com/columns/v02n02/
+# http://celestrak.com/columns/v02n03/
+###############################################################################
+
+class SatellitePropagatorException(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+class SatellitePropagator:
+    """Base class for the satellite propagators... subclasses implement get_position"""
+    # Constructor
+    def __init__(self, satellite_number, line1, line2):
+        """Constructor:  satellite number according to NORAD and the two lines of the TLE"""
+        self.__satellite_number = satellite_number
+        self.__line1 = line1
+        self.__line2 = line2
+
+    # Class Methods to construct in alternative ways
+    @classmethod
+    def for_tle(cls, satellite_number, line1, line2, backend=None):
+        """Method to get the (shared) propagator for a TLE with the backend (PyorbitalBackend, the default, or Sgp4Backend).  The pyorbital backend falls back to the sgp4 backend for the orbits pyorbital cannot propagate (deep space and perigees below 220 km)."""
+        if (backend is None):
+            backend = cls.DefaultBackend
+        if (backend not in cls.Backends):
+            raise SatellitePropagatorException('Unknown propagator %s (expected one of %s)' % \
+                (backend, ", ".join(cls.Backends)))
+        key = (backend, line1, line2)
+        if (key not in cls.__propagators):
+            if (backend == cls.PyorbitalBackend):
+                try:
+                    propagator = PyorbitalPropagator(satellite_number, line1, line2)
+                except NotImplementedError:
+                    propagator = Sgp4Propagator(satellite_number, line1, line2)
+            else:
+                propagator = Sgp4Propagator(satellite_number, line1, line2)
+            cls.__propagators[key] = propagator
+        return cls.__propagators[key]
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'Satellite Propagator:\n' \
+              'backend=%s, satellite number=%s' % \
+              (self.get_backend(), self.__satellite_number)
+        return out
+
+    def get_satellite_number(self):
+        return self.__satellite_number
+
+    def get_line1(self):
+        return self.__line1
+
+    def get_line2(self):
+        return self.__line2
+
+    def get_backend(self):
+        raise NotImplementedError
+
+    def get_position(self, utc_time):
+        """Method to compute the TEME position (km) and velocity (km/s) of the satellite at *naive* UTC time(s) utc_time.  Returns (position, velocity), each 3 values or a 3 x number of times array."""
+        raise NotImplementedError
+
+    def get_lonlatalt(self, utc_time):
+        """Method to compute the sub-satellite longitude, latitude (degrees, geodetic) and altitude (km) at *naive* UTC time(s) utc_time... the same computation as pyorbital"""
+        (pos_x, pos_y, pos_z), (vel_x, vel_y, vel_z) = self.get_position(utc_time)
+        lon = (np.arctan2(pos_y, pos_x) - ReferenceFrames.gmst(utc_time)) % (2 * np.pi)
+        lon = np.where(lon > np.pi, lon - np.pi * 2, lon)
+        lon = np.where(lon <= -np.pi, lon + np.pi * 2, lon)
+        # Iterate for the geodetic latitude in earth radii
+        r = np.sqrt(pos_x * pos_x + pos_y * pos_y) / self.__sgp4_earth_radius
+        z = pos_z / self.__sgp4_earth_radius
+        lat = np.arctan2(z, r)
+        e2 = self.__earth_flattening * (2 - self.__earth_flattening)
+        while True:
+            lat2 = lat
+            c = 1 / np.sqrt(1 - e2 * np.sin(lat2) * np.sin(lat2))
+            lat = np.arctan2(z + c * e2 * np.sin(lat2), r)
+            if np.all(abs(lat - lat2) < 1e-10):
+                break
+        alt = (r / np.cos(lat) - c) * self.__earth_radius
+        return (np.rad2deg(lon), np.rad2deg(lat), alt)
+
+    def get_observer_look(self, utc_time, lon, lat, alt):
+        """Method to compute the azimuth and elevation (degrees) of the satellite from an observer at lon, lat (degrees) and alt (km) at *naive* UTC time(s) utc_time... the same computation as pyorbital"""
+        (pos_x, pos_y, pos_z), (vel_x, vel_y, vel_z) = self.get_position(utc_time)
+        (opos_x, opos_y, opos_z), (ovel_x, ovel_y, ovel_z) = ReferenceFrames.observer_position(utc_time, lon, lat, alt)
+        lon = np.deg2rad(lon)
+        lat = np.deg2rad(lat)
+        theta = (ReferenceFrames.gmst(utc_time) + lon) % (2 * np.pi)
+        rx = pos_x - opos_x
+        ry = pos_y - opos_y
+        rz = pos_z - opos_z
+        top_s = np.sin(lat) * np.cos(theta) * rx + np.sin(lat) * np.sin(theta) * ry - np.cos(lat) * rz
+        top_e = -np.sin(theta) * rx + np.cos(theta) * ry
+        top_z = np.cos(lat) * np.cos(theta) * rx + np.cos(lat) * np.sin(theta) * ry + np.sin(lat) * rz
+        az = np.arctan(-top_e / top_s)
+        az = np.where(top_s > 0, az + np.pi, az)
+        az = np.where(az < 0, az + 2 * np.pi, az)
+        el = np.arcsin(top_z / np.sqrt(rx * rx + ry * ry + rz * rz))
+        return (np.rad2deg(az), np.rad2deg(el))
+
+    # Class member constants
+    PyorbitalBackend = "pyorbital"
+    Sgp4Backend = "sgp4"
+    Backends = [PyorbitalBackend, Sgp4Backend]
+    DefaultBackend = PyorbitalBackend
+    __propagators = {} # shared propagators by (backend, line1, line2)
+    __sgp4_earth_radius = 6378.135 # km, WGS72 as in pyorbital
+    __earth_radius = 6378.137 # km, WGS84 as in pyorbital
+    __earth_flattening = 1 / 298.257223563 # WGS84 as in pyorbital
+
+class PyorbitalPropagator(SatellitePropagator):
+    """Class to propagate a satellite with pyorbital"""
+    # Constructor
+    def __init__(self, satellite_number, line1, line2):
+        """Constructor:  satellite number according to NORAD and the two lines of the TLE (raises NotImplementedError for the orbits pyorbital cannot propagate)"""
+        SatellitePropagator.__init__(self, satellite_number, line1, line2)
+        from pyorbital.orbital import Orbital
+        self.__orbital = Orbital(str(satellite_number), line1=line1, line2=line2)
+        # pyorbital only finds out that it cannot propagate an orbit when it first propagates it
+        self.__orbital.get_position(self.__orbital.tle.epoch, normalize=False)
+
+    # Member functions
+
+    def get_backend(self):
+        return self.PyorbitalBackend
+
+    def get_position(self, utc_time):
+        """Method to compute the TEME position (km) and velocity (km/s) of the satellite at *naive* UTC time(s) utc_time"""
+        return self.__orbital.get_position(TimeGrid.to_times(utc_time), normalize=False)
+
+    def get_lonlatalt(self, utc_time):
+        """Method to compute the sub-satellite longitude, latitude (degrees) and altitude (km) at *naive* UTC time(s) utc_time"""
+        return self.__orbital.get_lonlatalt(TimeGrid.to_times(utc_time))
+
+    def get_observer_look(self, utc_time, lon, lat, alt):
+        """Method to compute the azimuth and elevation (degrees) of the satellite from an observer at lon, lat (degrees) and alt (km) at *naive* UTC time(s) utc_time"""
+        return self.__orbital.get_observer_look(TimeGrid.to_times(utc_time), lon, lat, alt)
+
+class Sgp4Propagator(SatellitePropagator):
+    """Class to propagate a satellite with the sgp4 module (SGP4 and SDP4 for deep space)"""
+    # Constructor
+    def __init__(self, satellite_number, line1, line2):
+        """Constructor:  satellite number according to NORAD and the two lines of the TLE"""
+        SatellitePropagator.__init__(self, satellite_number, line1, line2)
+        self.__satrec = Satrec.twoline2rv(line1, line2)
+
+    # Member functions
+
+    def get_backend(self):
+        return self.Sgp4Backend
+
+    def get_satrec(self):
+        return self.__satrec
+
+    def get_position(self, utc_time):
+        """Method to compute the TEME position (km) and velocity (km/s) of the satellite at *naive* UTC time(s) utc_time.  Times the satellite cannot be propagated to (e.g. after it decays) give NaN."""
+        if (isinstance(utc_time, TimeGrid)):
+            times = utc_time.get_times()
+            (jd, fr) = utc_time.get_julian_dates()
+        else:
+            times = np.asarray(utc_time, dtype='datetime64[us]')
+            (jd, fr) = self.julian_dates(times.reshape(-1))
+        (errors, pos, vel) = self.__satrec.sgp4_array(jd, fr)
+        pos[errors != 0] = np.nan
+        vel[errors != 0] = np.nan
+        if (times.ndim == 0):
+            return (pos[0], vel[0])
+        return (pos.T, vel.T)
+
+    @staticmethod
+    def julian_dates(times):
+        """Method to split *naive* UTC times (numpy datetime64) into whole and fractional Julian dates, the way sgp4 wants them for full precision (see TimeGrid for a shared grid's)"""
+        return TimeGrid.julian_dates(times)
@@ -1,14 +1,14 @@
-import sys
-if sys.version_info[0] > 2:
-    from urllib.request import urlopen
-else:
-    from urllib import urlopen
-from fileinput import input
-from pyorbital.orbital import Orbital
 from pytz import UTC
 from datetime import datetime, timedelta
-from math import sqrt, sin, cos, asin, acos, pi
+from math import sqrt, asin, acos, pi, ceil
+import numpy as np
 from configuration import Configuration
+from satellite_propagator import SatellitePropagator
+from tle_catalog import TleCatalog
+from tle_element_store import TleElementStore
+from tle_fetcher import TleFetcher, TleFetchException
+from sun_ephemeris import SunEphemeris
+from time_grid import TimeGrid
 
 ###############################################################################
 # Python module to make it easy to retrieve and use a satellite two
@@ -25,7 +25,7 @@ from configuration import Configuration
 # https://docs.python.org/2/library/datetime.html
 ###############################################################################
 
-class SatelliteTleException:
+class SatelliteTleException(Exception):
     def __init__(self, value):
         self.value = value
     def __str__(self):
@@ -35,8 +35,8 @@ class SatelliteTle:
     """Class to retrieve and use a two line element set for a given satellite """
     # Constructor
     def __init__(self, satellite_number, satellite_name = None, satellite_contact_name = None, tle_url = None, tle_file = None, 
-            rx_freq = None, tx_freq = None):
-        """Constructor:  satellite number according to NORAD"""
+            rx_freq = None, tx_freq = None, propagator = None, tle_catalog = None):
+        """Constructor:  satellite number according to NORAD, propagator is the propagator backend (see SatellitePropagator, default pyorbital), tle_catalog is a TleCatalog to get the TLE from instead of the URL or file"""
         self.__satellite_number = satellite_number
         self.__tle_url = tle_url
         #sys.stderr.write("__tle_url: %s\n" % self.__tle_url)
@@ -46,8 +46,11 @@ class SatelliteTle:
         self.__satellite_contact_name = satellite_contact_name
         self.__receive_frequency = rx_freq
         self.__transmit_frequency = tx_freq
+        self.__propagator_backend = propagator
+        self.__tle_catalog = tle_catalog
         self.__line1 = None
         self.__line2 = None
+        self.__elements = None
         self.__get_tle()
 
     # Class Methods to construct in alternative ways
@@ -58,99 +61,220 @@ class SatelliteTle:
         sat_name = sat_data.get('name', None)
         sat_contact_name = sat_data.get('contact_name', None)
         sat_url = sat_data.get('url', None)
+        sat_file = sat_data.get('file', None)
         sat_rx_freq = Configuration.get_config_float(sat_data.get('receive_frequency', None), 0, 9999, None)
         sat_tx_freq = Configuration.get_config_float(sat_data.get('transmit_frequency', None), 0, 9999, None)
+        sat_propagator = sat_data.get('propagator', None)
         #sys.stderr.write("sat_url: %s\n" % sat_url)
-        return cls(sat_num, satellite_name=sat_name, satellite_contact_name=sat_contact_name, tle_url=sat_url, rx_freq=sat_rx_freq, tx_freq=sat_tx_freq)
+        return cls(sat_num, satellite_name=sat_name, satellite_contact_name=sat_contact_name, tle_url=sat_url, tle_file=sat_file, rx_freq=sat_rx_freq, tx_freq=sat_tx_freq, \
+                   propagator=sat_propagator)
     
     # Member functions
     def refetch_tle(self):
         """Method the class user can call to fetch the TLE info again, to make sure it is up to date"""
-        self.__get_tle()
+        self.__get_tle(refresh=True)
 
     def compute_ephemeris_point(self, in_time):
         """Method to compute an ephemeris point for a given time"""
         time = self.__time_to_naiveUTC(in_time)
-        (pos, vel) = self.__orbit.get_position(time, normalize=False)
+        (pos, vel) = self.__propagator.get_position(time)
         return (in_time, pos, vel)
 
     def compute_ephemeris_table(self, in_start_time, in_end_time, time_step_seconds):
-        """Method to compute a table of ephemerides for a given time span at a given time step"""
-        time = in_start_time
-        try:
-            delta = timedelta(seconds=time_step_seconds)
-        except:
-            delta = timedelta(seconds=60)
-        ephem_tbl = []
-        while (time < in_end_time + delta):
-            ephem_tbl.append(self.compute_ephemeris_point(time))
-            time += delta
-
-        return ephem_tbl
+        """Method to compute a table of ephemerides for a given time span at a given time step (propagated all at once)"""
+        times = self.__time_table(in_start_time, in_end_time, time_step_seconds)
+        (pos, vel) = self.__propagator.get_position(times)
+        (pos, vel) = (np.array(pos).T, np.array(vel).T)
+        return [(time, pos[i], vel[i]) for (i, time) in enumerate(self.__table_times(in_start_time, len(times), time_step_seconds))]
 
     def compute_lonlatalt_point(self, in_time):
         """Method to compute an ephemeris point for a given time"""
         time = self.__time_to_naiveUTC(in_time)
-        (lon, lat, alt) = self.__orbit.get_lonlatalt(time)
+        (lon, lat, alt) = self.__propagator.get_lonlatalt(time)
         return (in_time, lon, lat, alt)
 
     def compute_lonlatalt_table(self, in_start_time, in_end_time, time_step_seconds):
-        """Method to compute a table of lon/lat/alt for a given time span at a given time step"""
-        time = in_start_time
+        """Method to compute a table of lon/lat/alt for a given time span at a given time step (propagated all at once)"""
+        times = self.__time_table(in_start_time, in_end_time, time_step_seconds)
+        (lon, lat, alt) = self.__propagator.get_lonlatalt(times)
+        return [(time, lon[i], lat[i], alt[i]) for (i, time) in enumerate(self.__table_times(in_start_time, len(times), time_step_seconds))]
+
+    def compute_ephemeris_arrays(self, in_start_time, in_end_time, time_step_seconds):
+        """Method to compute the ephemerides of compute_ephemeris_table (same times) in one vectorized propagation.  Returns (UTC epoch seconds as a float array, ECI positions in km and velocities in km/s as contiguous number of times x 3 arrays)."""
+        times = self.__time_table(in_start_time, in_end_time, time_step_seconds)
+        (pos, vel) = self.__propagator.get_position(times)
+        return (self.__epoch_seconds(times), np.ascontiguousarray(np.array(pos).T), np.ascontiguousarray(np.array(vel).T))
+
+    def compute_lonlatalt_arrays(self, in_start_time, in_end_time, time_step_seconds):
+        """Method to compute the lon/lat/alts of compute_lonlatalt_table (same times) in one vectorized propagation.  Returns (UTC epoch seconds, longitudes and latitudes in geodetic degrees, altitudes in km above the WGS-84 ellipsoid) as float arrays."""
+        times = self.__time_table(in_start_time, in_end_time, time_step_seconds)
+        (lon, lat, alt) = self.__propagator.get_lonlatalt(times)
+        return (self.__epoch_seconds(times), np.asarray(lon, dtype=np.float64), np.asarray(lat, dtype=np.float64), \
+                np.asarray(alt, dtype=np.float64))
+
+    def __table_times(self, in_start_time, npoints, time_step_seconds):
+        """Private method to get the times of a table as the caller gave them (e.g. time zone aware):  npoints times every time step from the start time"""
         try:
             delta = timedelta(seconds=time_step_seconds)
         except:
             delta = timedelta(seconds=60)
-        lla_tbl = []
-        while (time < in_end_time + delta):
-            lla_tbl.append(self.compute_lonlatalt_point(time))
-            time += delta
+        return [in_start_time + i * delta for i in range(npoints)]
 
-        return lla_tbl
+    def __time_table(self, in_start_time, in_end_time, time_step_seconds):
+        """Private method to get the times of a table (compute_ephemeris_table, compute_lonlatalt_table) as a naive UTC numpy datetime64 array:  every time step from the start time through the end time"""
+        try:
+            delta = timedelta(seconds=time_step_seconds)
+        except:
+            delta = timedelta(seconds=60)
+        start_time = self.__time_to_naiveUTC(in_start_time)
+        end_time = self.__time_to_naiveUTC(in_end_time)
+        nsteps = max(0, int(ceil((end_time + delta - start_time).total_seconds() / delta.total_seconds())))
+        return np.datetime64(start_time, 'us') + np.arange(nsteps) * np.timedelta64(delta)
+
+    def __epoch_seconds(self, times):
+        """Private method to convert naive UTC numpy datetime64 times to UTC epoch (1970) seconds"""
+        return (times - np.datetime64(0, 'us')) / np.timedelta64(1, 's')
 
-    def compute_sun_times(self, in_start_time, in_end_time):
-        """Method to compute in sun times (in UTC) for the satellite over a specified time period.  Returns a list of sun entrance/exit times, accurate to the nearest second and using the latest available TLE when the method is called."""
+    def compute_sun_times(self, in_start_time, in_end_time, tolerance_seconds=0.1):
+        """Method to compute in sun times (in UTC) for the satellite over a specified time period.  Returns a list of sun entrance/exit times, accurate to within tolerance_seconds (may be less than a second) and using the latest available TLE when the method is called.  The satellite is sampled every minute all at once and only the transitions are refined (by bisection)."""
         start_time = self.__time_to_naiveUTC(in_start_time)
         end_time = self.__time_to_naiveUTC(in_end_time)
         # start_time, end_time are now naive
-        suntimes = []
-        pentimes = []
-        umtimes = []
-        time = start_time
-        state = self.get_satellite_sun_state(time)
-        if (state == self.InSun):
-            sunenter = time
-        elif (state == self.InPenumbra):
-            penenter = time
-        else:
-            umenter = time
-        # Step through time, looking for transitions from one state to another
-        while (time < end_time):
-            now_state = self.get_satellite_sun_state(time)
-            if (now_state != state):
-                if (state == self.InSun):
-                    suntimes.append((sunenter.replace(tzinfo=UTC), time.replace(tzinfo=UTC)))
-                elif (state == self.InPenumbra):
-                    pentimes.append((penenter.replace(tzinfo=UTC), time.replace(tzinfo=UTC)))
-                else:
-                    umtimes.append((umenter.replace(tzinfo=UTC), time.replace(tzinfo=UTC)))
-                if (now_state == self.InSun):
-                    sunenter = time
-                elif (now_state == self.InPenumbra):
-                    penenter = time
-                else:
-                    umenter = time
-                state = now_state
-            time += self.__onesecond
-            
-        if (state == self.InSun):
-            suntimes.append((sunenter.replace(tzinfo=UTC), time.replace(tzinfo=UTC)))
-        elif (state == self.InPenumbra):
-            pentimes.append((penenter.replace(tzinfo=UTC), time.replace(tzinfo=UTC)))
-        else:
-            umtimes.append((umenter.replace(tzinfo=UTC), time.replace(tzinfo=UTC)))
+        time_grid = TimeGrid.for_period(start_time, end_time, self.__oneminute.total_seconds())
+        return self.__compute_sun_times(start_time, end_time, time_grid.get_times(), time_grid.get_sun_vectors(), \
+                                        self.__satellite_positions, tolerance_seconds)
 
-        return [suntimes, pentimes, umtimes]            
+    def compute_sun_times_from_ephemeris(self, in_start_time, in_end_time, ephemeris, tolerance_seconds=0.1):
+        """Method to compute in sun times like compute_sun_times, but from a SatelliteEphemeris of the satellite instead of propagating the satellite:  the ephemeris grid times are the samples and the transitions are refined from the interpolated ephemeris."""
+        start_time = self.__time_to_naiveUTC(in_start_time)
+        end_time = self.__time_to_naiveUTC(in_end_time)
+        (first, last) = ephemeris.get_time_grid().get_period_indices(start_time, end_time)
+        time_grid = ephemeris.get_time_grid().get_subgrid(first, last)
+        (times, sun_vectors) = (time_grid.get_times(), time_grid.get_sun_vectors())
+        if (len(times) == 0) or (times[0] != np.datetime64(start_time, 'us')):
+            # The samples start at the start time
+            start = np.array([np.datetime64(start_time, 'us')])
+            (times, sun_vectors) = (np.concatenate((start, times)), np.hstack((SunEphemeris.compute_sun_vectors(start), sun_vectors)))
+        return self.__compute_sun_times(start_time, end_time, times, sun_vectors, ephemeris.interpolate_positions, tolerance_seconds)
+
+    def __compute_sun_times(self, start_time, end_time, times, sun_vectors, positions_at, tolerance_seconds):
+        """Private method to compute in sun times over the *naive* UTC time period from samples at times (numpy datetime64, starting at start_time) and the sun vectors at those times (from their TimeGrid), given a function that computes the satellite ECI positions (km, 3 x number of times) at an array of times.  Returns the sun, penumbra, and umbra times."""
+        # https://www.celestrak.org/columns/v03n01/
+        tolerance = np.timedelta64(max(timedelta(seconds=tolerance_seconds), self.__onemicrosecond))
+        end = np.array([np.datetime64(end_time, 'us')])
+        times = np.concatenate((times, end))
+        # The sun vectors for the samples are shared with any other satellite sampled at the same times
+        sun_vectors = np.hstack((sun_vectors, SunEphemeris.compute_sun_vectors(end)))
+        (sun_margins, umbra_margins) = self.__shadow_margins(sun_vectors, positions_at(times))
+        # A grazing pass through the penumbra (or umbra) can start and end in between two
+        # samples... find the closest approach around each sample closest to the shadow,
+        # unless the shadow angles cannot change enough in between samples to get there
+        reach = self.__shadow_angle_rate() * np.max(np.diff(times) / np.timedelta64(1, 's'))
+        grazes = [times[:0]]
+        for (index, sign) in [(0, 1), (1, -1)]:
+            outside = sign * [sun_margins, umbra_margins][index] # positive on the sun (non-umbra) side of the boundary
+            closest = np.nonzero((outside[1:-1] > 0) & (outside[1:-1] < reach) & \
+                                 (outside[1:-1] <= outside[:-2]) & (outside[1:-1] <= outside[2:]))[0] + 1
+            if (len(closest) > 0):
+                (graze_times, outside_margins) = self.__find_closest_shadow_approaches(positions_at, times[closest - 1], \
+                                                                                       times[closest + 1], index, sign, tolerance)
+                grazes.append(graze_times[outside_margins <= 0])
+        grazes = np.concatenate(grazes)
+        if (len(grazes) > 0):
+            times = np.sort(np.concatenate((times, grazes)))
+            (sun_margins, umbra_margins) = self.__shadow_margins(SunEphemeris.compute_sun_vectors(times), positions_at(times))
+        states = self.__sun_states(sun_margins, umbra_margins)
+
+        # Refine all of the transitions in between samples at once... the satellite can go through
+        # more than one (e.g. sun to penumbra to umbra) in between two samples, so repeat from each
+        # transition found until reaching the state of the later sample
+        changes = np.nonzero(states[1:] != states[:-1])[0] + 1
+        (before, from_states) = (times[changes - 1], states[changes - 1])
+        transition_times = [times[:0]]
+        transition_states = [states[:0]]
+        while (len(changes) > 0):
+            found = self.__find_sun_state_changes(positions_at, before, times[changes], from_states, tolerance)
+            found_states = self.__sun_states(*self.__shadow_margins(SunEphemeris.compute_sun_vectors(found), positions_at(found)))
+            transition_times.append(found)
+            transition_states.append(found_states)
+            more = found_states != states[changes]
+            (changes, before, from_states) = (changes[more], found[more], found_states[more])
+        transition_times = np.concatenate(transition_times)
+        transition_states = np.concatenate(transition_states)
+        order = np.argsort(transition_times, kind='stable')
+
+        tables = [[], [], []] # indexed by InSun, InPenumbra, InUmbra
+        enter = start_time
+        state = states[0]
+        for (time, now_state) in zip(transition_times[order], transition_states[order]):
+            if (time >= times[-1]):
+                break
+            time = time.astype(datetime)
+            tables[state].append((enter.replace(tzinfo=UTC), time.replace(tzinfo=UTC)))
+            enter = time
+            state = now_state
+        tables[state].append((enter.replace(tzinfo=UTC), end_time.replace(tzinfo=UTC)))
+
+        return tables
+
+    def __find_sun_state_changes(self, positions_at, before, after, states, tolerance):
+        """Private method to find (by bisection, to within the tolerance, all at once) when the satellite is no longer in states, bracketed by the times (numpy datetime64 arrays) before (in states) and after (not in states).  Returns the earliest times found that are no longer in states."""
+        while (np.max(after - before) > tolerance):
+            middle = before + (after - before) // 2
+            same = self.__sun_states(*self.__shadow_margins(SunEphemeris.compute_sun_vectors(middle), positions_at(middle))) == states
+            before = np.where(same, middle, before)
+            after = np.where(same, after, middle)
+        return after
+
+    def __find_closest_shadow_approaches(self, positions_at, before, after, index, sign, tolerance):
+        """Private method to find (by golden-section search, to within the tolerance, all at once) the times, bracketed by the times (numpy datetime64 arrays) before and after, when the satellite is closest to the penumbra (index 0, sign 1) or umbra (index 1, sign -1) boundary.  Returns the times and the margins outside the boundary then (negative if the satellite crossed it)."""
+        def outside_margins(offsets):
+            times = before + np.round(offsets).astype(np.int64).astype('timedelta64[us]')
+            return sign * self.__shadow_margins(SunEphemeris.compute_sun_vectors(times), positions_at(times))[index]
+        tolerance = tolerance / np.timedelta64(1, 'us')
+        a = np.zeros(len(before))
+        b = (after - before) / np.timedelta64(1, 'us')
+        c = b - self.__inverse_golden_ratio * (b - a)
+        d = a + self.__inverse_golden_ratio * (b - a)
+        mc = outside_margins(c)
+        md = outside_margins(d)
+        while (np.max(b - a) > tolerance):
+            # The closest approach is in [a, d] (left) or [c, b]
+            left = mc < md
+            (a, b) = (np.where(left, a, c), np.where(left, d, b))
+            (kept, mkept) = (np.where(left, c, d), np.where(left, mc, md))
+            new = np.where(left, b - self.__inverse_golden_ratio * (b - a), a + self.__inverse_golden_ratio * (b - a))
+            mnew = outside_margins(new)
+            (c, mc) = (np.where(left, new, kept), np.where(left, mnew, mkept))
+            (d, md) = (np.where(left, kept, new), np.where(left, mkept, mnew))
+        offsets = np.where(mc < md, c, d)
+        return (before + np.round(offsets).astype(np.int64).astype('timedelta64[us]'), np.minimum(mc, md))
+
+    def __shadow_angle_rate(self):
+        """Private method to bound how fast (radians/second) the shadow margins can change:  twice the fastest (perigee) angular rate of the satellite around the earth, from the TLE mean motion and eccentricity"""
+        mean_motion = float(self.__elements['mean_motion']) * 2 * pi / 86400.0
+        eccentricity = float(self.__elements['eccentricity'])
+        return 2 * mean_motion * (1 + eccentricity) * (1 + eccentricity) / (1 - eccentricity * eccentricity) ** 1.5
+
+    def __satellite_positions(self, times):
+        """Private method to propagate the satellite ECI positions (km, 3 x number of times) at the *naive* UTC times (numpy datetime64)"""
+        (pos, vel) = self.__propagator.get_position(times)
+        return np.array(pos)
+
+    def __shadow_margins(self, earth_sun, earth_sat):
+        """Private method to compute how far (radians) the satellite is outside the penumbra (the sun margin, positive in sun) and inside the umbra (the umbra margin, positive in umbra), given the sun and satellite ECI positions (km, 3 x number of times)"""
+        # https://www.celestrak.org/columns/v03n01/
+        sat_sun = earth_sun - earth_sat
+        rho_e = np.sqrt(np.sum(earth_sat * earth_sat, axis=0))
+        rho_s = np.sqrt(np.sum(sat_sun * sat_sun, axis=0))
+        theta_e = np.arcsin(np.clip(self.__earthradius / rho_e, -1.0, 1.0))
+        theta_s = np.arcsin(self.__sunradius / rho_s)
+        theta = np.arccos(np.clip(-np.sum(earth_sat * sat_sun, axis=0) / (rho_e * rho_s), -1.0, 1.0))
+        return (theta - (theta_e + theta_s), (theta_e - theta_s) - theta)
+
+    def __sun_states(self, sun_margins, umbra_margins):
+        """Private method to determine if the satellite is in sun, penumbra, or umbra (like get_satellite_sun_state) from arrays of sun and umbra margins"""
+        return np.where(sun_margins > 0, self.InSun, np.where(umbra_margins > 0, self.InUmbra, self.InPenumbra))
 
     def get_satellite_sun_state(self, in_time):
         """Method to determine if the satellite is in sun, penumbra, or umbra at the given time"""
@@ -175,26 +299,9 @@ class SatelliteTle:
             return self.InPenumbra
         
     def get_sun_vector(self, in_time):
-        """Method to determine the sun vector at a specific time."""
-        # Astronomical Algorithms, 2nd ed., Jean Meeus, Willman-Bell, 1998
-        dt = self.__time_to_naiveUTC(in_time) - datetime(2000, 1, 1, 12, 0)
-        T = (dt.days + (dt.seconds + dt.microseconds / (1000000.0)) / (24 * 3600.0)) / 36525.0 # (25.1)
-        epsilon_0 = (23.0 + 26.0/60.0 + 21.448/3600.0 - (46.8150*T + 0.00059*T*T - 0.001813*T*T*T) / 3600) * pi / 180.0 # (22.2)
-        L_0 = 280.46646 + 36000.76983*T + 0.0003032*T*T # (25.2)
-        M = (357.52911 + 35999.05029*T - 0.0001537*T*T) * pi / 180.0 # (25.3)
-        e = 0.016708634 - 0.000042037*T - 0.0000001267*T*T # (25.4)
-        C = ((1.914602 - 0.004817*T - 0.000014*T*T)*sin(M) + (0.019993 - 0.000101*T)*sin(2*M) + 0.000289*sin(3*M)) # p. 164
-        true_longitude = (L_0 + C) * pi / 180.0 # p. 164
-        nu = M + C # p. 164
-        R = (1.000001018 * (1 - e*e))/(1 + e * cos(nu)) # (25.5)
-        x = cos(true_longitude) # Set x = cos(true longitude), see (25.6)
-        y = cos(epsilon_0) * sin(true_longitude) # Then y comes from this by (25.6)
-        z = sin(epsilon_0) * sin(true_longitude) # And z comes from this by (25.7)
-        x = x * R * self.__astronomical_unit # Scale unit vector to earth/sun distance in km
-        y = y * R * self.__astronomical_unit # Scale unit vector to earth/sun distance in km
-        z = z * R * self.__astronomical_unit # Scale unit vector to earth/sun distance in km
-
-        return [x, y, z]
+        """Method to determine the sun vector at a specific time (see SunEphemeris for arrays of times)."""
+        time = np.datetime64(self.__time_to_naiveUTC(in_time), 'us')
+        return list(SunEphemeris.compute_sun_vectors(np.array([time]))[:, 0])
     
     # Getters
     def get_tle_url(self):
@@ -206,6 +313,14 @@ class SatelliteTle:
     def get_line2(self):
         return self.__line2
 
+    def get_elements(self):
+        """Method to get the parsed (numeric) elements of the current TLE as a record of TleElementStore.ElementType (e.g. get_elements()['mean_motion'] in revs/day)"""
+        return self.__elements
+
+    def get_propagator(self):
+        """Method to get the (shared) SatellitePropagator for the current TLE"""
+        return self.__propagator
+
     def get_satellite_name(self):
         if (self.__satellite_name is None):
             return self.get_satellite_number()
@@ -318,40 +433,38 @@ class SatelliteTle:
         return out0 + out1 + out2 + out3 + out4 + out5 + out6
 
     # Private method to fetch the TLE
-    def __get_tle(self):
-        """Method to retrieve the TLE for the initialized satellite number, usually from Celestrak (could be from a hardwired file).  No return value."""
-        if (self.__tle_file is not None):
-            lines = input(self.__tle_file)
+    def __get_tle(self, refresh=False):
+        """Method to retrieve the TLE for the initialized satellite number, usually from Celestrak through the TleFetcher cache (could be from a hardwired file or an already parsed TleCatalog), fetching it again if refresh.  No return value."""
+        if (self.__tle_catalog is not None):
+            catalog = self.__tle_catalog
+        elif (self.__tle_file is not None):
+            catalog = TleCatalog.from_file(self.__tle_file)
+        elif (self.__tle_url is None):
+            raise SatelliteTleException('No TLE file or URL for satellite %s' % (self.__satellite_number))
         else:
             try:
-                lines = urlopen(self.__tle_url)
-            except:
-                default_file = "C:\\Users\\msuder\\Desktop\\cubesat.txt"
-                lines = input(default_file)
-
-        last_name = ""
-        for line in lines:
-            if "1 %s" % self.__satellite_number in line:
-                self.__line1 = line[0:69]
-                if (self.__satellite_name is None):
-                    self.__satellite_name = last_name
-            if "2 %s" % self.__satellite_number in line:
-                self.__line2 = line[0:69]
-            if ("1 " != line[0:2]) and ("2 " != line[0:2]):
-                last_name = line.rstrip()
-            else:
-                last_name = None
-                
-        if ((self.__line1 is None) or (self.__line2 is None)):
-            if (self.__tle_file is not None):
+                catalog = TleFetcher.get_default().get_catalog(self.__tle_url, refresh)
+            except TleFetchException as e:
+                raise SatelliteTleException('Could not get TLE for satellite %s:  %s' % (self.__satellite_number, e.value))
+
+        tle = catalog.get_tle(self.__satellite_number)
+        if (tle is None):
+            if (self.__tle_catalog is not None):
+                raise SatelliteTleException('Could not find TLE for satellite %s in TLE catalog' % \
+                    (self.__satellite_number))
+            elif (self.__tle_file is not None):
                 raise SatelliteTleException('Could not find TLE for satellite %s in file %s' % \
                     (self.__satellite_number, self.__tle_file))
             else:
                 raise SatelliteTleException('Could not find TLE for satellite %s at URL %s' % \
                     (self.__satellite_number, self.__tle_url))
         else:
-            self.__orbit = Orbital(str(self.__satellite_number), line1=self.__line1, \
-                line2=self.__line2)
+            (name, self.__line1, self.__line2) = tle
+            self.__elements = TleElementStore.parse_tle(self.__line1, self.__line2)
+            if (self.__satellite_name is None):
+                self.__satellite_name = name
+            self.__propagator = SatellitePropagator.for_tle(self.__satellite_number, self.__line1, \
+                self.__line2, self.__propagator_backend)
 
     def __time_to_naiveUTC(self, in_time):
         """Private method to convert (if necessary) a time (potentially with timezone) to a naive time that is UTC."""
@@ -370,11 +483,12 @@ class SatelliteTle:
 
         
     # Class member constants
+    __onemicrosecond = timedelta(microseconds=1)
     __onesecond = timedelta(seconds=1)
     __oneminute = timedelta(minutes=1)
+    __inverse_golden_ratio = (sqrt(5) - 1) / 2
     __sunradius = 695700 # km, https://www.iau.org/static/resolutions/IAU2015_English.pdf
     __earthradius = 6378.137 # km, http://earth-info.nga.mil/GandG/publications/tr8350.2/wgs84fin.pdf
-    __astronomical_unit = 149597870.700 # km, https://www.iau.org/static/resolutions/IAU2012_English.pdf
     __dp_over_dsplusdp = 2 * __earthradius / (2 * __sunradius + 2 * __earthradius)
     InSun = 0
     InPenumbra = 1
@@ -0,0 +1,83 @@
+from sgp4.api import Satrec, SatrecArray
+from satellite_ephemeris import SatelliteEphemeris
+from satellite_propagator import SatellitePropagator
+from time_grid import TimeGrid
+import numpy as np
+
+###############################################################################
+# Python module to propagate many satellites at once:  all of the TLEs are
+# loaded into one sgp4 module SatrecArray and evaluated over the Julian
+# dates of a shared TimeGrid in a single vectorized (C) call.  The results are one
+# SatelliteEphemeris per satellite, which the inview, az/el, and sun
+# computations can use instead of propagating each satellite point by point.
+# Satellites configured for another propagator backend (e.g. pyorbital, the
+# default) are propagated with their own propagator over the same grid, so
+# the reports get the same positions as the satellites' SatelliteTles.
+# Given a TleElementStore, the Satrecs are built from its parsed elements
+# instead of the TLE text, and a whole store can be propagated without any
+# SatelliteTle (e.g. to find the few satellites worth a closer look).
+#
+# Here are some reference URLs:
+# https://pypi.org/project/sgp4/
+###############################################################################
+
+class Sgp4BatchPropagator:
+    """Class to propagate a list of satellites together over a shared time grid using the sgp4 module"""
+    # Constructor
+    def __init__(self, satellite_tle_list, element_store=None):
+        """Constructor:  list of satellite TLEs as SatelliteTle, element_store is a TleElementStore with the same TLEs to build the sgp4 Satrecs from.  Only the satellites whose propagator uses the sgp4 backend are propagated together... the others are propagated with their own propagator (e.g. pyorbital) over the same time grid, so every satellite gets the positions its SatelliteTle would compute."""
+        self.__satellite_tle_list = satellite_tle_list
+        self.__satellite_numbers = [st.get_satellite_number() for st in satellite_tle_list]
+        self.__sgp4_indices = [i for (i, st) in enumerate(satellite_tle_list) \
+                               if (st.get_propagator().get_backend() == SatellitePropagator.Sgp4Backend)]
+        self.__satrec_array = None
+        if (len(self.__sgp4_indices) > 0) and (element_store is not None):
+            self.__satrec_array = element_store.create_satrec_array([self.__satellite_numbers[i] for i in self.__sgp4_indices])
+        elif (len(self.__sgp4_indices) > 0):
+            self.__satrec_array = SatrecArray([Satrec.twoline2rv(satellite_tle_list[i].get_line1(), satellite_tle_list[i].get_line2()) \
+                                               for i in self.__sgp4_indices])
+
+    # Class Methods to construct in alternative ways
+    @classmethod
+    def from_element_store(cls, element_store):
+        """Method to propagate every satellite of a TleElementStore (in store order) straight from its elements, always with the sgp4 module.  There is no SatelliteTle for the satellites, so their ephemerides have None instead."""
+        propagator = cls([])
+        propagator.__satellite_numbers = [int(satellite_number) for satellite_number in element_store.get_satellite_numbers()]
+        propagator.__satellite_tle_list = [None] * len(propagator.__satellite_numbers)
+        propagator.__sgp4_indices = list(range(len(propagator.__satellite_numbers)))
+        if (len(propagator.__satellite_numbers) > 0):
+            propagator.__satrec_array = element_store.create_satrec_array()
+        return propagator
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'SGP4 Batch Propagator:\n' \
+              'satellite numbers=%s' % \
+              (", ".join([str(satellite_number) for satellite_number in self.__satellite_numbers]))
+        return out
+
+    def get_satellite_tle_list(self):
+        return self.__satellite_tle_list
+
+    def get_satellite_numbers(self):
+        return self.__satellite_numbers
+
+    def compute_ephemerides(self, in_start_time, in_end_time, time_step_seconds=60):
+        """Method to propagate every satellite over the time grid for the time period (see TimeGrid.for_ephemeris), the sgp4 backend satellites in one call.  Returns a list of SatelliteEphemeris in the order of the satellite TLE list.  Satellites that cannot be propagated at a time (e.g. decayed) get NaN positions and velocities there (with the sgp4 backend)."""
+        time_grid = TimeGrid.for_ephemeris(in_start_time, in_end_time, time_step_seconds)
+        ephemerides = [None] * len(self.__satellite_tle_list)
+        if (self.__satrec_array is not None):
+            (jd, fr) = time_grid.get_julian_dates()
+            (errors, positions, velocities) = self.__satrec_array.sgp4(jd, fr) # satellites x times x 3
+            failed = errors != 0
+            positions[failed] = np.nan
+            velocities[failed] = np.nan
+            for (k, i) in enumerate(self.__sgp4_indices):
+                ephemerides[i] = SatelliteEphemeris(self.__satellite_tle_list[i], time_grid, positions[k].T, velocities[k].T)
+        for (i, st) in enumerate(self.__satellite_tle_list):
+            if (ephemerides[i] is None):
+                (pos, vel) = st.get_propagator().get_position(time_grid)
+                ephemerides[i] = SatelliteEphemeris(st, time_grid, np.array(pos), np.array(vel))
+        return ephemerides
@@ -0,0 +1,106 @@
+import numpy as np
+from reference_frames import ReferenceFrames
+
+###############################################################################
+# Python module to hold a ground station's earth fixed geometry, computed
+# once per station:  its WGS-84 ECEF position (from the station's longitude,
+# latitude and elevation in meters), the rotation from ECEF into its
+# topocentric (south, east, zenith) frame, and its elevation masks (above
+# and below the minimum elevation angle of the inviews, which every inview
+# search and refinement uses).  The topocentric kernel then maps whole arrays of satellite
+# ECEF positions (and velocities) to azimuth, elevation, range (and range
+# rate) with one matrix product, instead of recomputing the station position
+# and trigonometry for every sample like pyorbital's get_observer_look does
+# (the same angles, to within rounding).
+#
+# Positions (km) and velocities (km/s) are 3 values for one time or
+# 3 x number of times arrays (like the propagators return).
+#
+# Here are some reference URLs:
+# https://www.celestrak.org/columns/v02n02/
+# http://celestrak.com/columns/v02n03/
+###############################################################################
+
+class StationFrame:
+    """Class to compute azimuth, elevation, range and range rate from a ground station's precomputed topocentric frame"""
+    # Constructor
+    def __init__(self, lon, lat, alt, minimum_elevation_angle=0.0):
+        """Constructor:  lon, lat (degrees, geodetic) and alt (km above the WGS-84 ellipsoid) of the station, and the minimum elevation angle (degrees) of its inviews"""
+        self.__lon = float(lon)
+        self.__lat = float(lat)
+        self.__alt = float(alt)
+        self.__position = ReferenceFrames.geodetic_to_ecef(self.__lon, self.__lat, self.__alt).reshape(3, 1)
+        (sin_lon, cos_lon) = (np.sin(np.deg2rad(self.__lon)), np.cos(np.deg2rad(self.__lon)))
+        (sin_lat, cos_lat) = (np.sin(np.deg2rad(self.__lat)), np.cos(np.deg2rad(self.__lat)))
+        # Rows are the south, east and zenith directions in ECEF
+        self.__rotation = np.array([[sin_lat * cos_lon, sin_lat * sin_lon, -cos_lat], \
+                                    [-sin_lon, cos_lon, 0.0], \
+                                    [cos_lat * cos_lon, cos_lat * sin_lon, sin_lat]])
+        self.__minimum_elevation_angle = float(minimum_elevation_angle)
+
+    # Class Methods to construct in alternative ways
+    @classmethod
+    def for_ground_station(cls, ground_station):
+        """Method to get the (shared) station frame of a GroundStation... its elevation is in meters"""
+        key = (ground_station.get_longitude(), ground_station.get_latitude(), ground_station.get_elevation_in_meters(), \
+               ground_station.get_minimum_elevation_angle())
+        station_frame = cls.__station_frames.get(key, None)
+        if (station_frame is None):
+            station_frame = cls(key[0], key[1], key[2] / 1000.0, key[3])
+            if (len(cls.__station_frames) >= cls.__station_frames_size):
+                del cls.__station_frames[next(iter(cls.__station_frames))] # forget the oldest
+            cls.__station_frames[key] = station_frame
+        return station_frame
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'Station Frame:\n' \
+              'longitude=%f, latitude=%f, altitude=%f, minimum elevation angle=%f' % \
+              (self.__lon, self.__lat, self.__alt, self.__minimum_elevation_angle)
+        return out
+
+    def get_position(self):
+        """Method to get the ECEF position (km) of the station"""
+        return self.__position[:, 0]
+
+    def get_rotation(self):
+        """Method to get the rotation from ECEF into the topocentric frame (rows are south, east, zenith)"""
+        return self.__rotation
+
+    def get_minimum_elevation_angle(self):
+        return self.__minimum_elevation_angle
+
+    def look(self, pos):
+        """Method to compute the azimuth and elevation (degrees) and range (km) of ECEF position(s) pos (km) from the station.  Returns (azimuth, elevation, range)."""
+        pos = np.asarray(pos, dtype=np.float64)
+        relative = pos.reshape(3, -1) - self.__position
+        (top_s, top_e, top_z) = np.dot(self.__rotation, relative)
+        range_km = np.sqrt(np.sum(relative * relative, axis=0))
+        az = np.rad2deg(np.arctan2(top_e, -top_s) % (2 * np.pi))
+        el = np.rad2deg(np.arcsin(top_z / range_km))
+        if (pos.ndim == 1):
+            return (az[0], el[0], range_km[0])
+        return (az, el, range_km)
+
+    def range_rates(self, pos, vel):
+        """Method to compute the range rate(s) (km/s, positive while the range grows) of ECEF position(s) pos (km) and velocity(ies) vel (km/s, relative to the rotating earth) from the station"""
+        pos = np.asarray(pos, dtype=np.float64)
+        relative = pos.reshape(3, -1) - self.__position
+        rates = np.sum(relative * np.asarray(vel, dtype=np.float64).reshape(3, -1), axis=0) / np.sqrt(np.sum(relative * relative, axis=0))
+        if (pos.ndim == 1):
+            return rates[0]
+        return rates
+
+    def is_above_minimum_elevation(self, el):
+        """Method to mask the elevation(s) el (degrees) above the minimum elevation angle of the inviews"""
+        return el > self.__minimum_elevation_angle
+
+    def is_below_minimum_elevation(self, el):
+        """Method to mask the elevation(s) el (degrees) below the minimum elevation angle of the inviews (exactly at it is neither above nor below)"""
+        return el < self.__minimum_elevation_angle
+
+    # Class member constants
+    __station_frames = {} # shared station frames by station geometry, oldest first
+    __station_frames_size = 256
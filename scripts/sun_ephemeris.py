@@ -0,0 +1,40 @@
+import numpy as np
+
+###############################################################################
+# Python module to compute the sun vector (ECI position of the sun, in km)
+# for whole arrays of times at once.  The sun does not depend on the
+# satellite, so the sun vectors for a time grid are computed once and kept
+# with the grid (see time_grid.py) for every satellite (and anything else)
+# that uses the same grid, e.g. the in sun times of all of the satellites
+# propagated together by the sgp4_batch_propagator module.
+#
+# Here are some reference URLs:
+# Astronomical Algorithms, 2nd ed., Jean Meeus, Willman-Bell, 1998
+# https://www.iau.org/static/resolutions/IAU2012_English.pdf
+###############################################################################
+
+class SunEphemeris:
+    """Class to compute (and share) sun vectors for arrays of times"""
+
+    # Class Methods
+    @classmethod
+    def compute_sun_vectors(cls, times):
+        """Method to compute the sun vectors (ECI, km) at the *naive* UTC times (numpy datetime64 array).  Returns a 3 x number of times array."""
+        # Astronomical Algorithms, 2nd ed., Jean Meeus, Willman-Bell, 1998
+        T = ((times - cls.__j2000) / np.timedelta64(1, 'D')) / 36525.0 # (25.1)
+        epsilon_0 = (23.0 + 26.0/60.0 + 21.448/3600.0 - (46.8150*T + 0.00059*T*T - 0.001813*T*T*T) / 3600) * np.pi / 180.0 # (22.2)
+        L_0 = 280.46646 + 36000.76983*T + 0.0003032*T*T # (25.2)
+        M = (357.52911 + 35999.05029*T - 0.0001537*T*T) * np.pi / 180.0 # (25.3)
+        e = 0.016708634 - 0.000042037*T - 0.0000001267*T*T # (25.4)
+        C = ((1.914602 - 0.004817*T - 0.000014*T*T)*np.sin(M) + (0.019993 - 0.000101*T)*np.sin(2*M) + 0.000289*np.sin(3*M)) # p. 164
+        true_longitude = (L_0 + C) * np.pi / 180.0 # p. 164
+        nu = M + C # p. 164
+        R = (1.000001018 * (1 - e*e))/(1 + e * np.cos(nu)) # (25.5)
+        # Unit vector from (25.6) and (25.7), scaled to the earth/sun distance in km
+        return np.array([np.cos(true_longitude), \
+                         np.cos(epsilon_0) * np.sin(true_longitude), \
+                         np.sin(epsilon_0) * np.sin(true_longitude)]) * R * cls.__astronomical_unit
+
+    # Class member constants
+    __j2000 = np.datetime64('2000-01-01T12:00:00', 'us')
+    __astronomical_unit = 149597870.700 # km, https://www.iau.org/static/resolutions/IAU2012_English.pdf
@@ -0,0 +1,175 @@
+import math
+from datetime import datetime, timedelta
+from pytz import UTC
+import numpy as np
+from pyorbital import astronomy
+from sun_ephemeris import SunEphemeris
+
+###############################################################################
+# Python module to represent a uniform grid of *naive* UTC sample times
+# (start, time step, number of times) and share everything computed from
+# the times alone:  the numpy datetime64 times, UTC epoch seconds, Julian
+# dates (for the sgp4 module), Greenwich mean sidereal times (for the
+# ECI/ECEF rotations) and sun vectors are each computed the first time they
+# are needed and kept with the grid.  The grids for a time period are shared
+# process wide, so every satellite and ground station computed over the
+# same report day uses the same grid, and a part of a grid (e.g. the grid
+# times within an inview search period) shares what its whole grid computed.
+#
+# A TimeGrid can be used wherever the propagators (satellite_propagator.py)
+# and reference_frames.py take an array of *naive* UTC times.
+#
+# Here are some reference URLs:
+# https://pypi.org/project/sgp4/
+# https://numpy.org/doc/stable/reference/arrays.datetime.html
+###############################################################################
+
+class TimeGrid:
+    """Class to represent a uniform grid of *naive* UTC times and remember the arrays computed from them"""
+    # Constructor
+    def __init__(self, start_time, time_step, npoints, parent=None, offset=0):
+        """Constructor:  the first time (*naive* UTC datetime or numpy datetime64), the time step (timedelta or numpy timedelta64) and the number of times... use the class methods to get shared grids.  A part of a grid is constructed with its parent grid and the index of its first time there (see get_subgrid)."""
+        self.__start = np.datetime64(start_time, 'us')
+        self.__step = np.timedelta64(time_step, 'us')
+        self.__npoints = max(0, int(npoints))
+        self.__parent = parent
+        self.__offset = offset
+        self.__arrays = {} # computed arrays by name
+
+    # Class Methods to construct in alternative ways
+    @classmethod
+    def for_samples(cls, start_time, time_step, npoints):
+        """Method to get the (shared) grid of npoints times every time step from the *naive* UTC start time"""
+        key = (np.datetime64(start_time, 'us'), np.timedelta64(time_step, 'us'), int(npoints))
+        time_grid = cls.__grids.get(key, None)
+        if (time_grid is None):
+            time_grid = cls(key[0], key[1], key[2])
+            if (len(cls.__grids) >= cls.__maximum_grids):
+                del cls.__grids[next(iter(cls.__grids))] # forget the oldest grid
+            cls.__grids[key] = time_grid
+        return time_grid
+
+    @classmethod
+    def for_period(cls, in_start_time, in_end_time, time_step_seconds=60):
+        """Method to get the (shared) grid of samples of a time period (naive times are UTC):  every time step from the start time while before the end time, at least the start time"""
+        (start_time, end_time) = (cls.to_naiveUTC(in_start_time), cls.to_naiveUTC(in_end_time))
+        step = max(timedelta(seconds=time_step_seconds), cls.__onesecond)
+        nsteps = max(1, int(math.ceil((end_time - start_time).total_seconds() / step.total_seconds())))
+        return cls.for_samples(start_time, step, nsteps)
+
+    @classmethod
+    def for_ephemeris(cls, in_start_time, in_end_time, time_step_seconds=60):
+        """Method to get the (shared) grid of an ephemeris for a time period (naive times are UTC):  every time step from one time step before the start time to at least one time step after the end time, so that the time period can be interpolated all the way to its ends"""
+        (start_time, end_time) = (cls.to_naiveUTC(in_start_time), cls.to_naiveUTC(in_end_time))
+        step = max(timedelta(seconds=time_step_seconds), cls.__onesecond)
+        nsteps = max(1, int(math.ceil((end_time - start_time).total_seconds() / step.total_seconds())))
+        return cls.for_samples(start_time - step, step, nsteps + 3)
+
+    @classmethod
+    def from_times(cls, times):
+        """Method to get the (shared) grid of evenly spaced *naive* UTC times (numpy datetime64 array)"""
+        if (isinstance(times, TimeGrid)):
+            return times
+        times = np.asarray(times, dtype='datetime64[us]')
+        if (len(times) > 1):
+            step = times[1] - times[0]
+        else:
+            step = np.timedelta64(cls.__oneminute)
+        if (len(times) > 2) and (np.any(np.diff(times) != step)):
+            raise ValueError('The times of a TimeGrid must be evenly spaced')
+        if (len(times) == 0):
+            return cls(np.datetime64(0, 'us'), step, 0)
+        return cls.for_samples(times[0], step, len(times))
+
+    @staticmethod
+    def to_naiveUTC(in_time):
+        """Method to convert (if necessary) a time (potentially with timezone) to a naive time that is UTC."""
+        if (in_time.tzinfo is not None):
+            temp = in_time.astimezone(UTC)
+            in_time = datetime(temp.year, temp.month, temp.day, \
+                               temp.hour, temp.minute, temp.second)
+        return in_time
+
+    @staticmethod
+    def to_times(utc_time):
+        """Method to get the times of utc_time if it is a TimeGrid (else utc_time itself)"""
+        if (isinstance(utc_time, TimeGrid)):
+            return utc_time.get_times()
+        return utc_time
+
+    @staticmethod
+    def julian_dates(times):
+        """Method to split *naive* UTC times (numpy datetime64) into whole and fractional Julian dates, the way sgp4 wants them for full precision"""
+        unix_epoch = np.datetime64('1970-01-01T00:00:00', 'us')
+        days = (times - unix_epoch) // np.timedelta64(1, 'D')
+        fraction = (times - unix_epoch - days * np.timedelta64(1, 'D')) / np.timedelta64(1, 'D')
+        return (days + 2440587.5, fraction)
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'Time Grid:\n' \
+              'start=%s, time step=%s, number of times=%d' % \
+              (self.__start, self.get_time_step(), self.__npoints)
+        return out
+
+    def get_start_time(self):
+        return self.__start
+
+    def get_time_step(self):
+        return self.__step.astype(timedelta)
+
+    def get_size(self):
+        return self.__npoints
+
+    def get_times(self):
+        """Method to get the times (*naive* UTC numpy datetime64 array, which must not be modified)"""
+        return self.__get_array(TimeGrid.get_times, lambda: self.__start + np.arange(self.__npoints) * self.__step)
+
+    def get_epoch_seconds(self):
+        """Method to get the times as UTC epoch seconds (float array, which must not be modified)"""
+        return self.__get_array(TimeGrid.get_epoch_seconds, lambda: (self.get_times() - np.datetime64(0, 'us')) / np.timedelta64(1, 's'))
+
+    def get_julian_dates(self):
+        """Method to get the times as whole and fractional Julian dates (see julian_dates).  Returns (whole, fraction) arrays, which must not be modified."""
+        return tuple(self.__get_array(TimeGrid.get_julian_dates, lambda: np.array(self.julian_dates(self.get_times()))))
+
+    def get_gmst(self):
+        """Method to get the Greenwich mean sidereal times (radians) at the times (the same as pyorbital's astronomy.gmst), an array which must not be modified"""
+        return self.__get_array(TimeGrid.get_gmst, lambda: astronomy.gmst(self.get_times()))
+
+    def get_sun_vectors(self):
+        """Method to get the sun vectors (ECI, km) at the times (see SunEphemeris), a 3 x number of times array which must not be modified"""
+        return self.__get_array(TimeGrid.get_sun_vectors, lambda: SunEphemeris.compute_sun_vectors(self.get_times()))
+
+    def get_period_indices(self, in_start_time, in_end_time):
+        """Method to get the indices (first, last + 1) of the times from the start time (inclusive) to the end time (exclusive), naive times are UTC"""
+        times = self.get_times()
+        (start_time, end_time) = [np.datetime64(self.to_naiveUTC(in_time), 'us') for in_time in [in_start_time, in_end_time]]
+        return (int(np.searchsorted(times, start_time, 'left')), int(np.searchsorted(times, end_time, 'left')))
+
+    def get_subgrid(self, first, last):
+        """Method to get the part of the grid from index first to index last (exclusive), which shares whatever this grid computes"""
+        first = min(max(0, first), self.__npoints)
+        last = min(max(first, last), self.__npoints)
+        return TimeGrid(self.__start + first * self.__step, self.__step, last - first, self, first)
+
+    def __get_array(self, getter, compute):
+        """Private method to get the array of a getter (e.g. TimeGrid.get_gmst), computing it the first time... a part of a grid slices the array of its parent grid (the last axis is time)"""
+        name = getter.__name__
+        array = self.__arrays.get(name, None)
+        if (array is None):
+            if (self.__parent is not None):
+                array = np.asarray(getter(self.__parent))[..., self.__offset:self.__offset + self.__npoints]
+            else:
+                array = compute()
+                array.setflags(write=False) # shared by everything that uses the grid
+            self.__arrays[name] = array
+        return array
+
+    # Class member constants
+    __onesecond = timedelta(seconds=1)
+    __oneminute = timedelta(minutes=1)
+    __maximum_grids = 16
+    __grids = {} # shared grids by (start time, time step, number of times), oldest first
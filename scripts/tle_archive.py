@@ -0,0 +1,216 @@
+import os
+import json
+import tempfile
+import numpy as np
+from tle_catalog import TleCatalog
+from tle_element_store import TleElementStore
+from satellite_tle import SatelliteTle
+
+###############################################################################
+# Python module to work with an archive of TLE files (like the dated
+# directories of downloaded TLEs, YYYY-MM-DD/*.tle, used to reprocess
+# telemetry).  The archive is scanned once and every TLE found is recorded
+# with its epoch in a persistent index (a JSON file in the archive
+# directory), so later runs only parse files that are new or changed.
+# Each satellite's TLEs are kept sorted by epoch, so the best TLE for a
+# satellite at a time is found by binary search, and a long time period is
+# split into spans at the times the best TLE changes.
+#
+# The best TLE at a time is either the one with the nearest epoch (the
+# default... the most accurate choice when reprocessing, the TLE changes
+# halfway between epochs) or the latest one with an epoch at or before the
+# time (what was known at the time, the TLE changes at the epochs).
+#
+# Here are some reference URLs:
+# https://www.celestrak.org/columns/v04n03/
+# https://numpy.org/doc/stable/reference/generated/numpy.searchsorted.html
+###############################################################################
+
+class TleArchiveException(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+class TleArchive:
+    """Class to index an archive of TLE files by satellite and epoch and select the best TLE for a time"""
+    # Constructor
+    def __init__(self, archive_directory, index_file=None, selection=None):
+        """Constructor:  archive_directory holds the TLE files (*.tle, in any subdirectories), index_file is the persistent index (default tle_archive_index.json in the archive directory), selection is how the best TLE is chosen (NearestEpoch, the default, or PreviousEpoch)"""
+        if (index_file is None):
+            index_file = os.path.join(archive_directory, self.__index_name)
+        if (selection is None):
+            selection = self.NearestEpoch
+        if (selection not in self.Selections):
+            raise TleArchiveException('Unknown TLE selection %s (should be one of %s)' % (selection, ", ".join(self.Selections)))
+        self.__archive_directory = archive_directory
+        self.__index_file = index_file
+        self.__selection = selection
+        self.__files = {} # index entries by file name (relative to the archive directory)
+        self.__epochs = {} # numpy datetime64 array of the TLE epochs by satellite number
+        self.__tles = {} # list of (name, line 1, line 2) in epoch order by satellite number
+        self.__satellite_tles = {} # SatelliteTle by (satellite number, epoch index), created as needed
+        self.__files_parsed = 0
+        self.__read_index()
+        self.refresh()
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'TLE Archive:\n' \
+              'directory=%s, files=%d (%d parsed), satellites=%d, TLEs=%d, selection=%s' % \
+              (self.__archive_directory, len(self.__files), self.__files_parsed, len(self.__tles), \
+               sum([len(tles) for tles in self.__tles.values()]), self.__selection)
+        return out
+
+    def get_archive_directory(self):
+        return self.__archive_directory
+
+    def get_selection(self):
+        return self.__selection
+
+    def get_files_parsed(self):
+        """Method to get how many TLE files this object parsed (rather than found in the persistent index)"""
+        return self.__files_parsed
+
+    def get_satellite_numbers(self):
+        return sorted(self.__tles.keys())
+
+    def get_epochs(self, satellite_number):
+        """Method to get the (naive UTC numpy datetime64) epochs of the TLEs of a satellite in the archive, in order (empty if there are none)"""
+        return self.__epochs.get(TleCatalog.parse_satellite_number(satellite_number), np.array([], dtype='datetime64[us]'))
+
+    def refresh(self):
+        """Method to scan the archive directory for TLE files, parsing only files that are new or changed since they were indexed (and saving the index if anything changed).  Returns the number of files parsed."""
+        found = {}
+        for (directory, subdirectories, file_names) in os.walk(self.__archive_directory):
+            subdirectories.sort()
+            for file_name in sorted(file_names):
+                if (file_name.endswith(".tle")):
+                    full_name = os.path.join(directory, file_name)
+                    found[os.path.relpath(full_name, self.__archive_directory)] = os.stat(full_name)
+        parsed = 0
+        for (file_name, stat) in found.items():
+            entry = self.__files.get(file_name, None)
+            if (entry is None) or (entry['mtime'] != stat.st_mtime) or (entry['size'] != stat.st_size):
+                self.__files[file_name] = self.__index_file_tles(file_name, stat)
+                parsed = parsed + 1
+        self.__files_parsed = self.__files_parsed + parsed
+        removed = [file_name for file_name in self.__files if (file_name not in found)]
+        for file_name in removed:
+            del self.__files[file_name]
+        if (parsed > 0) or (len(removed) > 0):
+            self.__write_index()
+        self.__build_satellite_tles()
+        return parsed
+
+    def get_tle_index(self, satellite_number, utc_time):
+        """Method to find (binary search) the index (in epoch order) of the best TLE for a satellite at a *naive* UTC time (datetime or numpy datetime64), None if the archive has no TLEs for the satellite"""
+        epochs = self.get_epochs(satellite_number)
+        if (len(epochs) == 0):
+            return None
+        time = np.datetime64(utc_time, 'us')
+        after = int(np.searchsorted(epochs, time, side='right')) # first epoch after the time
+        if (after == 0):
+            return 0 # before every epoch... the first TLE
+        if (self.__selection == self.PreviousEpoch) or (after == len(epochs)):
+            return after - 1
+        return self.__nearer(epochs, time, after - 1, after)
+
+    def get_tle(self, satellite_number, utc_time):
+        """Method to get the best TLE for a satellite at a *naive* UTC time as (name, line 1, line 2), None if the archive has no TLEs for the satellite"""
+        index = self.get_tle_index(satellite_number, utc_time)
+        if (index is None):
+            return None
+        return self.__tles[TleCatalog.parse_satellite_number(satellite_number)][index]
+
+    def get_satellite_tle(self, satellite_number, utc_time, **kwargs):
+        """Method to get a SatelliteTle with the best TLE for a satellite at a *naive* UTC time (kwargs are passed on to SatelliteTle, e.g. propagator, the first time a TLE is used... after that the same SatelliteTle is returned).  Raises a TleArchiveException if the archive has no TLEs for the satellite."""
+        index = self.get_tle_index(satellite_number, utc_time)
+        if (index is None):
+            raise TleArchiveException('No TLEs for satellite %s in the TLE archive %s' % (satellite_number, self.__archive_directory))
+        key = (TleCatalog.parse_satellite_number(satellite_number), index)
+        if (key not in self.__satellite_tles):
+            (name, line1, line2) = self.__tles[key[0]][index]
+            lines = [line1, line2]
+            if (name is not None):
+                lines.insert(0, name)
+            self.__satellite_tles[key] = SatelliteTle(satellite_number, tle_catalog=TleCatalog(lines), **kwargs)
+        return self.__satellite_tles[key]
+
+    def get_tle_spans(self, satellite_number, utc_start_time, utc_end_time):
+        """Method to split a time period (*naive* UTC times) into spans that each use one TLE of a satellite, switching where the best TLE changes.  Returns a list of (span start, span end, TLE index) with numpy datetime64 times, empty if the archive has no TLEs for the satellite."""
+        epochs = self.get_epochs(satellite_number)
+        if (len(epochs) == 0):
+            return []
+        start = np.datetime64(utc_start_time, 'us')
+        end = np.datetime64(utc_end_time, 'us')
+        if (self.__selection == self.PreviousEpoch):
+            switches = epochs[1:] # the TLE changes at each epoch...
+        else:
+            switches = epochs[:-1] + (epochs[1:] - epochs[:-1]) // 2 # ...or halfway between them
+        switches = switches[(switches > start) & (switches < end)]
+        boundaries = np.concatenate(([start], switches, [end]))
+        return [(boundaries[i], boundaries[i + 1], self.get_tle_index(satellite_number, boundaries[i])) \
+                for i in range(len(boundaries) - 1)]
+
+    def __nearer(self, epochs, time, before, after):
+        """Private method to pick the index of the epoch nearer to the time (the later one from halfway on, where get_tle_spans splits)"""
+        if (time - epochs[before] < (epochs[after] - epochs[before]) // 2):
+            return before
+        return after
+
+    def __index_file_tles(self, file_name, stat):
+        """Private method to parse a TLE file into its index entry:  its modification time and size (to notice changes) and its TLEs with their epochs"""
+        catalog = TleCatalog.from_file(os.path.join(self.__archive_directory, file_name))
+        tles = []
+        for satellite_number in catalog.get_satellite_numbers():
+            (name, line1, line2) = catalog.get_tle(satellite_number)
+            try:
+                epoch = TleElementStore.parse_tle(line1, line2)['epoch']
+            except ValueError:
+                continue # not a TLE that can be used
+            tles.append([satellite_number, str(epoch), name, line1, line2])
+        return {'mtime':stat.st_mtime, 'size':stat.st_size, 'tles':tles}
+
+    def __build_satellite_tles(self):
+        """Private method to sort the TLEs in the index by satellite and epoch (a TLE in more than one file is kept once)"""
+        by_satellite = {}
+        for file_name in sorted(self.__files.keys()):
+            for (satellite_number, epoch, name, line1, line2) in self.__files[file_name]['tles']:
+                by_satellite.setdefault(satellite_number, {}).setdefault(epoch, (name, line1, line2))
+        self.__epochs = {}
+        self.__tles = {}
+        for (satellite_number, tles) in by_satellite.items():
+            epochs = sorted(tles.keys())
+            self.__epochs[satellite_number] = np.array(epochs, dtype='datetime64[us]')
+            self.__tles[satellite_number] = [tles[epoch] for epoch in epochs]
+        self.__satellite_tles = {}
+
+    def __read_index(self):
+        """Private method to read the persistent index (starting over if there is none or it cannot be read)"""
+        try:
+            with open(self.__index_file) as f:
+                index = json.load(f)
+            if (index.get('version', None) == self.__index_version):
+                self.__files = index['files']
+        except (IOError, OSError, ValueError, KeyError):
+            self.__files = {}
+
+    def __write_index(self):
+        """Private method to write the persistent index... written to a temporary file and renamed, so a concurrent reader never sees part of it (not written if the directory is read only)"""
+        try:
+            (fd, temp_name) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.__index_file)))
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version':self.__index_version, 'files':self.__files}, f)
+            os.replace(temp_name, self.__index_file)
+        except (IOError, OSError):
+            pass
+
+    # Class member constants
+    NearestEpoch = "nearest"
+    PreviousEpoch = "previous"
+    Selections = [NearestEpoch, PreviousEpoch]
+    __index_name = "tle_archive_index.json"
+    __index_version = 1
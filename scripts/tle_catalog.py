@@ -0,0 +1,106 @@
+import sys
+if sys.version_info[0] > 2:
+    from urllib.request import urlopen
+else:
+    from urllib import urlopen
+
+###############################################################################
+# Python module to parse a file (or URL, or any stream of lines) of two line
+# element sets once into a catalog keyed by NORAD satellite number, so that
+# any number of SatelliteTle objects can be created from it without reading
+# the file again.  Line 1 and line 2 are matched by their satellite number
+# columns (not by searching the lines for the number), and the line before
+# line 1 (if it is not itself a TLE line) is the satellite name.  Alpha-5
+# satellite numbers (e.g. A0001 for 100001) are supported.
+#
+# Here are some reference URLs:
+# https://www.celestrak.org/columns/v04n03/
+# https://www.space-track.org/documentation#tle-alpha5
+###############################################################################
+
+class TleCatalog:
+    """Class to hold the two line element sets from a file, URL, or stream by satellite number"""
+    # Constructor
+    def __init__(self, lines):
+        """Constructor:  lines of a TLE file (any iterable of str or bytes lines, e.g. an open file)"""
+        self.__tles = {}
+        self.__parse(lines)
+
+    # Class Methods to construct in alternative ways
+    @classmethod
+    def from_file(cls, tle_file):
+        with open(tle_file) as lines:
+            return cls(lines)
+
+    @classmethod
+    def from_url(cls, tle_url):
+        return cls(urlopen(tle_url))
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'TLE Catalog:\n' \
+              'number of satellites=%d' % \
+              (len(self.__tles))
+        return out
+
+    def __len__(self):
+        return len(self.__tles)
+
+    def __contains__(self, satellite_number):
+        return self.__get_key(satellite_number) in self.__tles
+
+    def get_satellite_numbers(self):
+        """Method to get the satellite numbers (int) in the catalog, in the order they were first found"""
+        return list(self.__tles.keys())
+
+    def get_tle(self, satellite_number):
+        """Method to get the TLE for a satellite number (int or str, leading zeros and alpha-5 are fine) as (name, line 1, line 2).  The name is None if the TLE has no name line.  Returns None if the satellite is not in the catalog."""
+        return self.__tles.get(self.__get_key(satellite_number), None)
+
+    def create_satellite_tle(self, satellite_number, **kwargs):
+        """Method to create a SatelliteTle for a satellite number from the catalog (kwargs are passed on to SatelliteTle, e.g. propagator)"""
+        from satellite_tle import SatelliteTle # satellite_tle uses this module to parse TLEs
+        return SatelliteTle(satellite_number, tle_catalog=self, **kwargs)
+
+    def __parse(self, lines):
+        """Private method to parse the TLE lines into the catalog.  A satellite found more than once keeps its last TLE."""
+        name = None
+        line1 = None
+        for line in lines:
+            if (isinstance(line, bytes)):
+                line = line.decode('ascii', 'replace')
+            line = line.rstrip("\r\n") # some TLE lines are shorter than 69 columns
+            if (line[0:2] == "1 "):
+                line1 = line[0:69]
+            elif (line[0:2] == "2 "):
+                if (line1 is not None) and (line1[2:7] == line[2:7]):
+                    key = self.__get_key(line1[2:7])
+                    if (key is not None):
+                        self.__tles[key] = (name, line1, line[0:69])
+                line1 = None
+                name = None
+            else:
+                line1 = None
+                name = line.rstrip()
+
+    def __get_key(self, satellite_number):
+        """Private method to convert a satellite number to the catalog key (int), None if it is not a satellite number"""
+        return self.parse_satellite_number(satellite_number)
+
+    @classmethod
+    def parse_satellite_number(cls, satellite_number):
+        """Method to convert a satellite number (int, or str with leading zeros/spaces or alpha-5) to an int, None if it is not a satellite number"""
+        if (isinstance(satellite_number, int)):
+            return satellite_number
+        number = str(satellite_number).strip()
+        if (len(number) > 0) and (number[0].upper() in cls.__alpha5_digits):
+            number = str(cls.__alpha5_digits.index(number[0].upper()) + 10) + number[1:]
+        try:
+            return int(number)
+        except ValueError:
+            return None
+
+    # Class member constants
+    __alpha5_digits = "ABCDEFGHJKLMNPQRSTUVWXYZ" # alpha-5 leading "digits" for 10 to 33 (no I or O)
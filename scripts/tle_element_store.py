@@ -0,0 +1,221 @@
+import os
+import hashlib
+import tempfile
+from math import pi
+import numpy as np
+from sgp4.api import Satrec, SatrecArray, WGS72
+from tle_catalog import TleCatalog
+from tle_fetcher import TleFetcher
+
+###############################################################################
+# Python module to keep the parsed (numeric) elements of a catalog of two
+# line element sets in a compact NumPy structured array, one record per
+# satellite sorted by satellite number (about 100 bytes a satellite instead
+# of two 69 character strings and the objects around them).  The store can
+# be saved as a .npy file (by default in the user's cache directory) and
+# opened again memory mapped, so a full catalog (30,000+ objects) loads
+# instantly and only the pages used are read.  The batch propagator can
+# build its sgp4 Satrecs from the elements and prefilters (e.g. by
+# perigee/apogee altitude) work on whole columns, neither touching the TLE
+# text.
+#
+# Here are some reference URLs:
+# https://www.celestrak.org/columns/v04n03/
+# https://numpy.org/doc/stable/reference/generated/numpy.lib.format.html
+# https://pypi.org/project/sgp4/
+###############################################################################
+
+class TleElementStore:
+    """Class to hold the parsed elements of many TLEs as a (possibly memory mapped) NumPy structured array"""
+    # Constructor
+    def __init__(self, elements):
+        """Constructor:  elements as a NumPy structured array of ElementType, sorted by satellite number (see from_catalog and from_file)"""
+        self.__elements = elements
+
+    # Class Methods to construct in alternative ways
+    @classmethod
+    def from_catalog(cls, catalog):
+        """Method to parse the TLEs of a TleCatalog into a store"""
+        satellite_numbers = sorted(catalog.get_satellite_numbers())
+        elements = np.zeros(len(satellite_numbers), dtype=cls.ElementType)
+        for (i, satellite_number) in enumerate(satellite_numbers):
+            (name, line1, line2) = catalog.get_tle(satellite_number)
+            elements[i] = cls.parse_tle(line1, line2)
+        return cls(elements)
+
+    @classmethod
+    def from_file(cls, store_file):
+        """Method to open a store saved by save, memory mapped (read only)"""
+        return cls(np.load(store_file, mmap_mode='r'))
+
+    @classmethod
+    def from_tle_file(cls, tle_file, store_file=None):
+        """Method to get the store for a TLE file:  opened memory mapped from store_file (default see get_default_store_file) if that is newer than the TLE file, otherwise parsed from the TLE file and saved to store_file for next time"""
+        if (store_file is None):
+            store_file = cls.get_default_store_file(tle_file)
+        if (os.path.exists(store_file)) and (os.path.getmtime(store_file) >= os.path.getmtime(tle_file)):
+            return cls.from_file(store_file)
+        store = cls.from_catalog(TleCatalog.from_file(tle_file))
+        try:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(store_file)), 0o700)
+            except OSError:
+                pass # already there
+            store.save(store_file)
+        except (IOError, OSError):
+            pass # e.g. a read only directory... just parse the TLE file every time
+        return store
+
+    @classmethod
+    def parse_tle(cls, line1, line2):
+        """Method to parse the elements of one TLE.  Returns a record (numpy.void) of ElementType."""
+        year = int(line1[18:20])
+        if (year < 57):
+            year = year + 2000
+        else:
+            year = year + 1900
+        epoch = np.datetime64('%04d-01-01' % year, 'us') + \
+                np.timedelta64(int(round((float(line1[20:32]) - 1) * 86400e6)), 'us')
+        elements = np.zeros(1, dtype=cls.ElementType)[0]
+        elements['satellite_number'] = TleCatalog.parse_satellite_number(line1[2:7])
+        elements['epoch'] = epoch
+        elements['mean_motion_dot'] = float(line1[33:43])
+        elements['mean_motion_doubledot'] = cls.__parse_assumed_decimal(line1[44:52])
+        elements['bstar'] = cls.__parse_assumed_decimal(line1[53:61])
+        elements['element_number'] = int(line1[64:68].strip() or "0")
+        elements['inclination'] = float(line2[8:16])
+        elements['raan'] = float(line2[17:25])
+        elements['eccentricity'] = float("0." + line2[26:33].strip())
+        elements['arg_perigee'] = float(line2[34:42])
+        elements['mean_anomaly'] = float(line2[43:51])
+        elements['mean_motion'] = float(line2[52:63])
+        elements['rev_at_epoch'] = int(line2[63:68].strip() or "0")
+        return elements
+
+    @staticmethod
+    def __parse_assumed_decimal(field):
+        """Private method to parse a TLE field with an assumed decimal point and an exponent (e.g. " 12345-4" is 0.12345e-4)"""
+        field = field.strip()
+        if (len(field) == 0):
+            return 0.0
+        sign = ""
+        if (field[0] in "+-"):
+            (sign, field) = (field[0].replace("+", ""), field[1:])
+        return float("%s0.%se%s" % (sign, field[:-2].strip(), field[-2:]))
+
+    @staticmethod
+    def get_default_store_file(tle_file):
+        """Method to get the default store file for a TLE file:  in the user's cache directory (see TleFetcher.get_user_cache_directory), never next to the TLE file (e.g. in a web root), named by the TLE file name and a hash of its full path"""
+        tle_file = os.path.abspath(tle_file)
+        key = hashlib.sha1(tle_file.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(TleFetcher.get_user_cache_directory(), "%s-%s.npy" % (os.path.basename(tle_file), key))
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'TLE Element Store:\n' \
+              'number of satellites=%d, memory mapped=%s' % \
+              (len(self.__elements), isinstance(self.__elements, np.memmap))
+        return out
+
+    def __len__(self):
+        return len(self.__elements)
+
+    def __contains__(self, satellite_number):
+        return self.get_index(satellite_number) is not None
+
+    def save(self, store_file):
+        """Method to save the store as a .npy file (written to a temporary file and renamed, so a concurrent reader never sees part of it)"""
+        (fd, temp_name) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(store_file)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.ascontiguousarray(self.__elements))
+            os.replace(temp_name, store_file)
+        except:
+            os.unlink(temp_name) # do not leave a partial temporary file behind
+            raise
+
+    def get_elements(self, satellite_number=None):
+        """Method to get the elements of a satellite number (int or str, leading zeros and alpha-5 are fine) as a record, None if the satellite is not in the store... or with no satellite number, all of the elements as a structured array (columns by field name, e.g. get_elements()['mean_motion'])"""
+        if (satellite_number is None):
+            return self.__elements
+        index = self.get_index(satellite_number)
+        if (index is None):
+            return None
+        return self.__elements[index]
+
+    def get_satellite_numbers(self):
+        return self.__elements['satellite_number']
+
+    def get_index(self, satellite_number):
+        """Method to get the index (row) of a satellite number in the store by binary search, None if the satellite is not in the store"""
+        key = TleCatalog.parse_satellite_number(satellite_number)
+        if (key is None):
+            return None
+        numbers = self.__elements['satellite_number']
+        index = int(np.searchsorted(numbers, key))
+        if (index >= len(numbers)) or (numbers[index] != key):
+            return None
+        return index
+
+    def get_semi_major_axes(self):
+        """Method to get the semi-major axes (km) of every satellite from the mean motions"""
+        mean_motion = self.__elements['mean_motion'] * 2 * pi / 86400.0 # radians/second
+        return (self.__earth_mu / (mean_motion * mean_motion)) ** (1.0 / 3.0)
+
+    def get_perigee_altitudes(self):
+        """Method to get the perigee altitudes (km above the equatorial radius) of every satellite"""
+        return self.get_semi_major_axes() * (1 - self.__elements['eccentricity']) - self.__earth_equatorial_radius
+
+    def get_apogee_altitudes(self):
+        """Method to get the apogee altitudes (km above the equatorial radius) of every satellite"""
+        return self.get_semi_major_axes() * (1 + self.__elements['eccentricity']) - self.__earth_equatorial_radius
+
+    def create_satrec_array(self, satellite_numbers=None):
+        """Method to create an sgp4 module SatrecArray straight from the elements (no TLE text) for the satellite numbers (default every satellite, in store order).  Raises a KeyError for a satellite number not in the store."""
+        if (satellite_numbers is None):
+            rows = self.__elements
+        else:
+            indices = [self.get_index(satellite_number) for satellite_number in satellite_numbers]
+            if (None in indices):
+                raise KeyError('Satellite %s is not in the TLE element store' % satellite_numbers[indices.index(None)])
+            rows = self.__elements[indices]
+        return SatrecArray([self.create_satrec(elements) for elements in rows])
+
+    @classmethod
+    def create_satrec(cls, elements):
+        """Method to create an sgp4 module Satrec from the elements (record) of one satellite, equivalent to Satrec.twoline2rv for its TLE"""
+        # Satrec.twoline2rv takes the TLE units... sgp4init takes radians and minutes
+        satrec = Satrec()
+        satrec.sgp4init(WGS72, 'i', int(elements['satellite_number']), \
+                        (elements['epoch'] - cls.__sgp4_epoch) / np.timedelta64(1, 'D'), \
+                        float(elements['bstar']), \
+                        float(elements['mean_motion_dot']) / (cls.__revs_per_day * 1440.0), \
+                        float(elements['mean_motion_doubledot']) / (cls.__revs_per_day * 1440.0 * 1440.0), \
+                        float(elements['eccentricity']), \
+                        np.radians(elements['arg_perigee']), \
+                        np.radians(elements['inclination']), \
+                        np.radians(elements['mean_anomaly']), \
+                        float(elements['mean_motion']) / cls.__revs_per_day, \
+                        np.radians(elements['raan']))
+        return satrec
+
+    # Class member constants
+    ElementType = np.dtype([('satellite_number', np.int32),
+                            ('epoch', 'datetime64[us]'), # naive UTC
+                            ('mean_motion_dot', np.float64), # revs/day^2 (divided by 2, as in the TLE)
+                            ('mean_motion_doubledot', np.float64), # revs/day^3 (divided by 6, as in the TLE)
+                            ('bstar', np.float64), # 1/earth radii
+                            ('element_number', np.int32),
+                            ('inclination', np.float64), # degrees
+                            ('raan', np.float64), # degrees
+                            ('eccentricity', np.float64),
+                            ('arg_perigee', np.float64), # degrees
+                            ('mean_anomaly', np.float64), # degrees
+                            ('mean_motion', np.float64), # revs/day
+                            ('rev_at_epoch', np.int32)])
+    __sgp4_epoch = np.datetime64('1949-12-31T00:00:00', 'us') # sgp4init epochs are days since
+    __revs_per_day = 1440.0 / (2.0 * pi) # (revs/day) / (radians/minute)
+    __earth_mu = 398600.8 # km^3/s^2, WGS72 like the sgp4 propagation
+    __earth_equatorial_radius = 6378.135 # km, WGS72
@@ -0,0 +1,265 @@
+import sys
+import os
+import json
+import time
+import hashlib
+import socket
+import tempfile
+import threading
+from multiprocessing.pool import ThreadPool
+if sys.version_info[0] > 2:
+    from urllib.request import Request, urlopen, getproxies
+    from urllib.error import HTTPError
+    from urllib.parse import urlsplit, urljoin
+    from http.client import HTTPConnection, HTTPSConnection, HTTPException
+    from os import replace
+else:
+    from urllib2 import Request, urlopen, HTTPError
+    from urllib import getproxies
+    from urlparse import urlsplit, urljoin
+    from httplib import HTTPConnection, HTTPSConnection, HTTPException
+    from os import rename as replace # also replaces an existing file (POSIX)
+from configuration import Configuration
+from tle_catalog import TleCatalog
+
+###############################################################################
+# Python module to fetch TLE files from URLs (e.g. Celestrak) through an
+# on-disk cache keyed by URL:
+#  - a URL is downloaded (or read from the cache) once per run and the
+#    parsed TleCatalog is shared by every satellite that uses that URL
+#  - a cached copy younger than the time to live is used without any
+#    network round trip
+#  - an older cached copy is revalidated with a conditional request
+#    (If-None-Match with the ETag, If-Modified-Since with the Last-Modified
+#    time), so an unchanged file is not downloaded again (304 Not Modified)
+#  - if the URL cannot be fetched, a stale cached copy is used (with a
+#    warning); with no cached copy the fetch fails with a TleFetchException
+#  - a cache that cannot be written (e.g. an unwritable home directory) only
+#    gets a warning... the downloaded text is still used
+#  - http(s) requests go over kept alive connections (one per host per
+#    thread), and prefetch fetches a list of URLs in parallel threads, so a
+#    report with many satellites does not pay the sum of the latencies
+#
+# Here are some reference URLs:
+# https://developer.mozilla.org/en-US/docs/Web/HTTP/Conditional_requests
+# https://celestrak.org/NORAD/documentation/gp-data-formats.php
+###############################################################################
+
+class TleFetchException(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+class TleFetcher:
+    """Class to fetch TLE files from URLs through an on-disk cache with conditional HTTP requests"""
+    # Constructor
+    def __init__(self, cache_directory=None, ttl_seconds=3600, timeout_seconds=30):
+        """Constructor:  cache_directory for the cached TLE files (default tle_cache in the user's cache directory, see get_user_cache_directory), ttl_seconds is how long a cached file is used without revalidating it, timeout_seconds is the network timeout"""
+        if (cache_directory is None):
+            cache_directory = self.get_user_cache_directory()
+        self.__cache_directory = cache_directory
+        self.__ttl_seconds = ttl_seconds
+        self.__timeout_seconds = timeout_seconds
+        self.__catalogs = {} # TleCatalog by URL, for this run
+        self.__local = threading.local() # kept alive connections by (scheme, host), for each thread
+
+    # Class Methods to construct in alternative ways
+    @classmethod
+    def get_default(cls):
+        """Method to get the fetcher SatelliteTle uses for URLs (created with the default settings if not set)"""
+        if (cls.__default is None):
+            cls.__default = cls()
+        return cls.__default
+
+    @classmethod
+    def set_default(cls, fetcher):
+        """Method to set the fetcher SatelliteTle uses for URLs"""
+        cls.__default = fetcher
+
+    @classmethod
+    def from_config(cls, data):
+        cache_directory = data.get('tle_cache_directory', None)
+        ttl_seconds = Configuration.get_config_int(data.get('tle_cache_ttl_seconds', '3600'), 0, 31 * 86400, 3600)
+        return cls(cache_directory=cache_directory, ttl_seconds=ttl_seconds)
+
+    # Member functions
+
+    def __repr__(self):
+        """Returns a string representing an instance of this class."""
+        out = 'TLE Fetcher:\n' \
+              'cache directory=%s, time to live=%s seconds, URLs fetched=%s' % \
+              (self.__cache_directory, self.__ttl_seconds, ", ".join(self.__catalogs.keys()))
+        return out
+
+    @staticmethod
+    def get_user_cache_directory():
+        """Method to get the default cache directory:  tle_cache in $XDG_CACHE_HOME (default ~/.cache), so it is never shared with other users"""
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(cache_home, "tle_cache")
+
+    def get_cache_directory(self):
+        return self.__cache_directory
+
+    def get_ttl_seconds(self):
+        return self.__ttl_seconds
+
+    def get_catalog(self, tle_url, refresh=False):
+        """Method to get the TleCatalog for a URL, fetching it only the first time it is used in this run (or again if refresh, which also revalidates a cached copy regardless of its age)"""
+        if (refresh) or (tle_url not in self.__catalogs):
+            self.__catalogs[tle_url] = TleCatalog(self.fetch(tle_url, refresh).splitlines())
+        return self.__catalogs[tle_url]
+
+    def prefetch(self, tle_urls, threads=8):
+        """Method to get the TleCatalogs for a list of URLs in parallel threads, so that later get_catalog calls do not wait on the network.  A URL that cannot be fetched is skipped (get_catalog tries it again and raises the TleFetchException)."""
+        tle_urls = [tle_url for (i, tle_url) in enumerate(tle_urls) \
+                    if (tle_url not in self.__catalogs) and (tle_url not in tle_urls[:i])]
+        if (len(tle_urls) == 0):
+            return
+        pool = ThreadPool(min(threads, len(tle_urls)))
+        try:
+            pool.map(self.__prefetch, tle_urls)
+        finally:
+            pool.close()
+            pool.join()
+
+    def __prefetch(self, tle_url):
+        try:
+            self.get_catalog(tle_url)
+        except TleFetchException:
+            pass
+
+    def fetch(self, tle_url, refresh=False):
+        """Method to fetch the text of a URL through the on-disk cache (see the module comments).  Returns the text."""
+        (data_file, metadata_file) = self.__get_cache_files(tle_url)
+        metadata = self.__read_metadata(metadata_file)
+        cached = (metadata is not None) and os.path.exists(data_file)
+        if (cached) and (not refresh) and (time.time() - metadata.get('fetched', 0) < self.__ttl_seconds):
+            return self.__read_text(data_file)
+
+        headers = {}
+        if (cached):
+            if (metadata.get('etag') is not None):
+                headers['If-None-Match'] = metadata['etag']
+            if (metadata.get('last_modified') is not None):
+                headers['If-Modified-Since'] = metadata['last_modified']
+        try:
+            (status, response_headers, body) = self.__get(tle_url, headers)
+        except Exception as e:
+            return self.__fall_back(tle_url, data_file, cached, e)
+        if (status == 200):
+            text = body.decode('ascii', 'replace')
+            metadata = {'url':tle_url, 'etag':response_headers.get('ETag'), \
+                        'last_modified':response_headers.get('Last-Modified')}
+            if (not self.__write_text(data_file, text)):
+                return text # not cached... the metadata must not claim the new ETag for an older cached copy
+        elif (status == 304) and (cached):
+            text = self.__read_text(data_file) # Not Modified
+        else:
+            return self.__fall_back(tle_url, data_file, cached, 'HTTP Error %d' % status)
+        metadata['fetched'] = time.time()
+        self.__write_metadata(metadata_file, metadata)
+        return text
+
+    def __fall_back(self, tle_url, data_file, cached, error):
+        """Private method to use a stale cached copy of a URL that could not be fetched (raises a TleFetchException if there is none)"""
+        if (not cached):
+            raise TleFetchException('Could not fetch %s (%s) and there is no cached copy' % (tle_url, error))
+        sys.stderr.write("Could not fetch %s (%s), using the cached copy from %s\n" % \
+                         (tle_url, error, time.ctime(os.path.getmtime(data_file))))
+        return self.__read_text(data_file)
+
+    def __get(self, tle_url, headers):
+        """Private method to GET a URL (following redirects) with the request headers.  Returns (status, response headers, body)."""
+        for redirect in range(self.__maximum_redirects + 1):
+            url = urlsplit(tle_url)
+            if (url.scheme not in ('http', 'https')) or (url.scheme in getproxies()):
+                return self.__get_with_urlopen(tle_url, headers) # e.g. file: URLs and proxies
+            (status, response_headers, body) = self.__get_with_connection(url, headers)
+            if (status not in (301, 302, 303, 307, 308)) or (response_headers.get('Location') is None):
+                break
+            tle_url = urljoin(tle_url, response_headers.get('Location'))
+        return (status, response_headers, body)
+
+    def __get_with_connection(self, url, headers):
+        """Private method to GET a split http(s) URL over the kept alive connection to its host for this thread, opening a new connection if there is none or the server closed it"""
+        connections = getattr(self.__local, 'connections', None)
+        if (connections is None):
+            connections = self.__local.connections = {}
+        key = (url.scheme, url.netloc)
+        path = url.path or "/"
+        if (url.query):
+            path = path + "?" + url.query
+        while True:
+            connection = connections.pop(key, None)
+            reused = connection is not None
+            if (not reused):
+                if (url.scheme == 'https'):
+                    connection = HTTPSConnection(url.netloc, timeout=self.__timeout_seconds)
+                else:
+                    connection = HTTPConnection(url.netloc, timeout=self.__timeout_seconds)
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (HTTPException, socket.error):
+                connection.close()
+                if (reused):
+                    continue # the server closed the kept alive connection... try a new one
+                raise
+            if (response.will_close):
+                connection.close()
+            else:
+                connections[key] = connection
+            return (response.status, response.msg, body)
+
+    def __get_with_urlopen(self, tle_url, headers):
+        """Private method to GET a URL with urlopen (no kept alive connection)"""
+        try:
+            response = urlopen(Request(tle_url, headers=headers), timeout=self.__timeout_seconds)
+            return (200, response.headers, response.read())
+        except HTTPError as e:
+            return (e.code, e.headers, None)
+
+    def __get_cache_files(self, tle_url):
+        """Private method to get the cached data and metadata file names for a URL"""
+        key = hashlib.sha1(tle_url.encode('utf-8')).hexdigest()
+        return (os.path.join(self.__cache_directory, key + ".tle"), os.path.join(self.__cache_directory, key + ".json"))
+
+    def __read_metadata(self, metadata_file):
+        """Private method to read the cached metadata (None if there is none)"""
+        try:
+            with open(metadata_file) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def __write_metadata(self, metadata_file, metadata):
+        self.__write_text(metadata_file, json.dumps(metadata))
+
+    def __read_text(self, data_file):
+        with open(data_file) as f:
+            return f.read()
+
+    def __write_text(self, file_name, text):
+        """Private method to write a cache file... written to a temporary file and renamed, so a concurrent reader never sees part of it.  The cache directory is created readable and writable by its user only.  A cache that cannot be written (e.g. a read only directory) only gets a warning.  Returns True if the file was written."""
+        try:
+            os.makedirs(self.__cache_directory, 0o700)
+        except OSError:
+            pass # already there
+        temp_name = None
+        try:
+            (fd, temp_name) = tempfile.mkstemp(dir=self.__cache_directory)
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+            replace(temp_name, file_name)
+            return True
+        except (IOError, OSError) as e:
+            if (temp_name is not None) and (os.path.exists(temp_name)):
+                os.unlink(temp_name)
+            sys.stderr.write("Could not write the TLE cache file %s (%s), not caching it\n" % (file_name, e))
+            return False
+
+    # Class member constants
+    __maximum_redirects = 5
+    __default = None
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+from sgp4.api import Satrec
+from tle_catalog import TleCatalog
+from tle_element_store import TleElementStore
+from satellite_propagator import Sgp4Propagator
+
+###############################################################################
+# Script to verify the tle_element_store module using the test cases for
+# "Revisiting Spacetrack Report #3: Rev 2", AIAA 2006-6753-Rev2,
+# Vallado, Crawford, Hujsak, Kelso (like get_sgp4_verify_ephemeris.py):
+#  - the Satrecs built from the parsed elements propagate (for a day from
+#    each epoch) like the Satrecs the sgp4 module parses from the TLE text
+#  - a store saved and opened memory mapped finds the same elements
+#  - a full size catalog (the test cases copied to 30,000 satellite numbers)
+#    opens instantly once saved
+# Get sgp4-ver.tle from https://celestrak.org/software/vallado-sw.php
+#
+# Syntax:  verify_element_store.py [sgp4-ver.tle file]
+###############################################################################
+
+def main():
+    """Main function... makes 'forward declarations' of helper functions unnecessary"""
+    tle_file = "../config/sgp4-ver.tle"
+    if (len(sys.argv) > 1):
+        tle_file = sys.argv[1]
+    catalog = TleCatalog.from_file(tle_file)
+    store = TleElementStore.from_catalog(catalog)
+
+    failures = 0
+    for satnum in catalog.get_satellite_numbers():
+        (name, line1, line2) = catalog.get_tle(satnum)
+        text_satrec = Satrec.twoline2rv(line1, line2)
+        elements_satrec = TleElementStore.create_satrec(store.get_elements(satnum))
+        epoch = store.get_elements(satnum)['epoch']
+        (jd, fr) = Sgp4Propagator.julian_dates(epoch + np.arange(0, 1441, 10) * np.timedelta64(60, 's'))
+        (text_errors, text_pos, text_vel) = text_satrec.sgp4_array(jd, fr)
+        (errors, pos, vel) = elements_satrec.sgp4_array(jd, fr)
+        ok = (text_errors == 0) & (errors == 0)
+        pos_diff = np.max(np.sqrt(np.sum((pos[ok] - text_pos[ok]) ** 2, axis=1)), initial=0.0)
+        passed = np.array_equal(text_errors == 0, errors == 0) and (pos_diff < position_tolerance)
+        if (not passed):
+            failures = failures + 1
+        print("%s:  %s %d points, position %.9f km" % (satnum, "ok  " if passed else "FAIL", np.sum(ok), pos_diff))
+
+    store_directory = tempfile.mkdtemp()
+    try:
+        # Saved and memory mapped
+        store_file = os.path.join(store_directory, "sgp4-ver.npy")
+        store.save(store_file)
+        mapped = TleElementStore.from_file(store_file)
+        passed = isinstance(mapped.get_elements(), np.memmap) and \
+                 np.array_equal(mapped.get_elements(), store.get_elements()) and \
+                 (mapped.get_elements("06251") == store.get_elements(6251)) and \
+                 (mapped.get_elements(99999) is None) and ("28893" in mapped) and ("28894" not in mapped)
+        if (not passed):
+            failures = failures + 1
+        print("Saved and memory mapped:  %s %s" % ("ok  " if passed else "FAIL", mapped))
+
+        # Full size catalog
+        full_tle_file = os.path.join(store_directory, "full.tle")
+        write_full_catalog(catalog, full_tle_file, full_catalog_size)
+        start = time.time()
+        full_store = TleElementStore.from_tle_file(full_tle_file, os.path.join(store_directory, "full.npy"))
+        parse_seconds = time.time() - start
+        start = time.time()
+        full_store = TleElementStore.from_tle_file(full_tle_file, os.path.join(store_directory, "full.npy"))
+        perigees = full_store.get_perigee_altitudes()
+        load_seconds = time.time() - start
+        passed = isinstance(full_store.get_elements(), np.memmap) and (len(full_store) == full_catalog_size) and \
+                 (load_seconds < 0.1) and np.all(np.isfinite(perigees))
+        if (not passed):
+            failures = failures + 1
+        print("%d satellites:  %s parsed and saved in %.3f seconds, opened (and perigees computed) in %.4f seconds, %d bytes a satellite" % \
+              (full_catalog_size, "ok  " if passed else "FAIL", parse_seconds, load_seconds, full_store.get_elements().itemsize))
+    finally:
+        shutil.rmtree(store_directory)
+
+    if (failures > 0):
+        print("%d FAILURES" % failures)
+        sys.exit(1)
+    print("The TLE element store works as expected")
+
+def write_full_catalog(catalog, tle_file, size):
+    """Function to write a TLE file with the TLEs of a catalog copied to satellite numbers 1 to size"""
+    tles = [catalog.get_tle(satnum) for satnum in catalog.get_satellite_numbers()]
+    with open(tle_file, "w") as f:
+        for satnum in range(1, size + 1):
+            (name, line1, line2) = tles[satnum % len(tles)]
+            f.write("%s%05d%s\n%s%05d%s\n" % (line1[:2], satnum, line1[7:], line2[:2], satnum, line2[7:]))
+
+# Constants
+position_tolerance = 0.00001 # km (the elements keep the epochs to the microsecond)
+full_catalog_size = 30000
+
+# Python idiom to eliminate the need for forward declarations
+if __name__=="__main__":
+   main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+import sys
+from datetime import datetime, timedelta
+from pytz import UTC
+from pyorbital.orbital import Orbital
+from satellite_tle import SatelliteTle
+from ground_station import GroundStation
+from inview_calculator import InviewCalculator
+from multi_station_inview_calculator import MultiStationInviewCalculator
+
+###############################################################################
+# Script to verify the root finding (bisection/golden-section) refinement
+# of rise, set, and maximum elevation in the inview_calculator module
+# (for each ground station on its own and for all of them from one shared
+# propagation in the multi_station_inview_calculator module)
+# against the original brute force refinement (step one minute at a time,
+# then step backwards one second at a time) using the STF-1 first contact
+# golden TLE.
+#
+# Syntax:  verify_inview_refinement.py [golden TLE file]
+###############################################################################
+
+def main():
+    """Main function... makes 'forward declarations' of helper functions unnecessary"""
+    # Constants
+    satnum = 43852 # STF-1
+    tle_file = "../config/first_contact_20181219_golden.tle"
+    if (len(sys.argv) > 1):
+        tle_file = sys.argv[1]
+    tolerances = [1.0, 0.1] # seconds
+
+    # Times we need
+    start = datetime(2018, 12, 19, 0, 0, 0)
+    end = datetime(2018, 12, 22, 0, 0, 0)
+
+    st = SatelliteTle(satnum, tle_file=tle_file)
+    stations = [GroundStation.create_wallops(), GroundStation.create_morehead(), GroundStation.create_sri_paloalto()]
+    expected = [compute_brute_force_inviews(gs, st, start, end) for gs in stations]
+    failures = 0
+    for tolerance in tolerances:
+        # Each ground station on its own, and all of them from one shared propagation
+        shared = MultiStationInviewCalculator(stations, st, tolerance_seconds=tolerance).compute_inviews(start, end)
+        for (i, gs) in enumerate(stations):
+            ic = InviewCalculator(gs, st, tolerance_seconds=tolerance)
+            for (how, inviews) in [("", ic.compute_inviews(start, end)), (" (shared ephemeris)", shared[i])]:
+                failures = failures + compare_inviews(gs, tolerance, how, expected[i], inviews)
+
+    if (failures > 0):
+        print("%d FAILURES" % failures)
+        sys.exit(1)
+    print("All inviews agree with the brute force refinement")
+
+def compare_inviews(gs, tolerance, how, expected, inviews):
+    """Function to print and compare inviews to the brute force inviews... returns the number of failures"""
+    print("%s, tolerance %s seconds%s:  %d brute force inviews, %d inviews" % (gs.get_name(), tolerance, how, len(expected), len(inviews)))
+    if (len(expected) != len(inviews)):
+        return 1
+    failures = 0
+    # Brute force times are the last whole second before the crossing, so allow one second plus the tolerance
+    allowed = timedelta(seconds=1.0 + tolerance)
+    for (bf, iv) in zip(expected, inviews):
+        rise_diff = iv[0] - bf[0]
+        set_diff = iv[1] - bf[1]
+        maxel_diff = iv[2] - bf[2]
+        ok = (abs(rise_diff) <= allowed) and (abs(set_diff) <= allowed) and (maxel_diff > -maxel_tolerance)
+        if (not ok):
+            failures = failures + 1
+        print("  %s Rise: %s (%+.3f s), Set: %s (%+.3f s), Maximum Elevation: %f (%+.4f)" % \
+              ("ok  " if ok else "FAIL", iv[0], rise_diff.total_seconds(), iv[1], set_diff.total_seconds(), iv[2], maxel_diff))
+    return failures
+
+def compute_brute_force_inviews(gs, st, start_time, end_time):
+    """Function to compute inviews the original way... step one minute at a time, then refine crossings by stepping back up to 60 single seconds and maximum elevation by stepping back 120 single seconds"""
+    orb = Orbital(str(st.get_satellite_number()), line1=st.get_line1(), line2=st.get_line2())
+    min_el = gs.get_minimum_elevation_angle()
+    onesecond = timedelta(seconds=1)
+
+    def look(time):
+        (az, el) = orb.get_observer_look(time, gs.get_longitude(), gs.get_latitude(), gs.get_elevation_in_meters() / 1000.0)
+        return el
+
+    def find_exact_crossing(time, up):
+        exacttime = time
+        for j in range(0, 60):
+            exacttime -= onesecond
+            el = look(exacttime)
+            if ((el > min_el) and (up == 1)) or ((el < min_el) and (up == 0)):
+                break
+        return exacttime
+
+    def find_exact_maxel(time, maxel):
+        exacttime = time
+        for j in range(0, 120):
+            exacttime -= onesecond
+            maxel = max(maxel, look(exacttime))
+        return maxel
+
+    inviews = []
+    time = start_time
+    up = 0
+    el_increasing = 0
+    maxel = 0
+    if (look(time) > min_el):
+        up = 1
+        el_increasing = 1
+        rising = time
+    while (time < end_time):
+        el = look(time)
+        if (el > min_el) and (up == 0):
+            rising = find_exact_crossing(time, up)
+            el_increasing = 1
+            up = 1
+        if (el < min_el) and (up == 1):
+            inviews.append((rising.replace(tzinfo=UTC), find_exact_crossing(time, up).replace(tzinfo=UTC), maxel))
+            el_increasing = 0
+            up = 0
+            maxel = 0
+        if (el > min_el):
+            if (el > maxel):
+                maxel = el
+            elif (el_increasing):
+                el_increasing = 0
+                maxel = find_exact_maxel(time, maxel)
+        time += timedelta(minutes=1)
+    if (up == 1):
+        inviews.append((rising.replace(tzinfo=UTC), end_time.replace(tzinfo=UTC), maxel))
+    return inviews
+
+# Constants
+maxel_tolerance = 0.01 # degrees
+
+# Python idiom to eliminate the need for forward declarations
+if __name__=="__main__":
+   main()
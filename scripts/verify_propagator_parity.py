@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+import sys
+from datetime import datetime, timedelta
+import numpy as np
+from satellite_propagator import SatellitePropagator
+from fix_tle_checksum import fix
+from ground_station import GroundStation
+
+###############################################################################
+# Script to verify that the pyorbital and sgp4 SatellitePropagator backends
+# agree, using the test cases for
+# "Revisiting Spacetrack Report #3: Rev 2", AIAA 2006-6753-Rev2,
+# Vallado, Crawford, Hujsak, Kelso (like get_sgp4_verify_ephemeris.py).
+# Each satellite is propagated for a day from its epoch with both backends
+# and the ephemerides, lon/lat/alts, and look angles (from Wallops) are
+# compared.  The TLEs are repaired first (several test cases have bad
+# checksums, see fix_tle_checksum.py, or blank fields, which pyorbital
+# rejects), so every satellite is compared, except at the times a
+# satellite has decayed and for the orbits pyorbital cannot propagate
+# (deep space and perigees below 220 km, where the pyorbital backend falls
+# back to sgp4)... any other satellite that cannot be compared fails.
+# Get sgp4-ver.tle from https://celestrak.org/software/vallado-sw.php
+#
+# Syntax:  verify_propagator_parity.py [sgp4-ver.tle file]
+###############################################################################
+
+def main():
+    """Main function... makes 'forward declarations' of helper functions unnecessary"""
+    # Constants
+    tle_file = "../config/sgp4-ver.tle"
+    if (len(sys.argv) > 1):
+        tle_file = sys.argv[1]
+    gs = GroundStation.create_wallops()
+
+    failures = 0
+    for (satnum, line1, line2) in get_tles(tle_file):
+        sgp4_propagator = SatellitePropagator.for_tle(satnum, line1, line2, SatellitePropagator.Sgp4Backend)
+        satrec = sgp4_propagator.get_satrec()
+        epoch = get_epoch(line1)
+        times = np.datetime64(epoch, 'us') + np.arange(0, 1441, 10) * np.timedelta64(60, 's')
+        (sgp4_pos, sgp4_vel) = sgp4_propagator.get_position(times)
+        # Only a known decay excuses a time from the comparison (pyorbital raises an exception once a satellite decays):
+        # sgp4 fails there with one of the errors of a collapsing (or sub-orbital) orbit
+        (jd, fr) = sgp4_propagator.julian_dates(times)
+        (errors, r, v) = satrec.sgp4_array(jd, fr)
+        ok = errors == 0
+        if (not np.all(np.isin(errors[~ok], decay_errors))):
+            failures = failures + 1
+            print("%s:  FAIL sgp4 errors %s that are not a decay" % (satnum, sorted(set(errors[~ok].tolist()))))
+            continue
+        try:
+            pyorbital_propagator = SatellitePropagator.for_tle(satnum, line1, line2, SatellitePropagator.PyorbitalBackend)
+        except Exception as e:
+            failures = failures + 1
+            print("%s:  FAIL pyorbital rejects the TLE (%s: %s)" % (satnum, e.__class__.__name__, e))
+            continue
+        if (pyorbital_propagator.get_backend() != SatellitePropagator.PyorbitalBackend):
+            # pyorbital only propagates near earth orbits with perigees above 220 km (like sgp4 without the deep space and simple modes)...
+            # the pyorbital backend falls back to sgp4 for the rest, anything else is a failure
+            if ((satrec.method == 'd') or (satrec.altp * satrec.radiusearthkm < pyorbital_minimum_perigee)):
+                print("%s:  ok   pyorbital cannot propagate (%s), the backend falls back to sgp4" % \
+                      (satnum, "deep space" if (satrec.method == 'd') else "perigee below 220 km"))
+            else:
+                failures = failures + 1
+                print("%s:  FAIL pyorbital cannot propagate a near earth orbit" % satnum)
+            continue
+        try:
+            (pos, vel) = [np.array(a) for a in pyorbital_propagator.get_position(times[ok])]
+            pos_diff = np.max(np.sqrt(np.sum((pos - sgp4_pos[:, ok]) ** 2, axis=0)), initial=0.0)
+            vel_diff = np.max(np.sqrt(np.sum((vel - sgp4_vel[:, ok]) ** 2, axis=0)), initial=0.0)
+            lla_diff = max_difference(pyorbital_propagator.get_lonlatalt(times[ok]), \
+                                      sgp4_propagator.get_lonlatalt(times[ok]), [1, 2])
+            look_diff = max_difference(pyorbital_propagator.get_observer_look(times[ok], gs.get_longitude(), \
+                                                                              gs.get_latitude(), gs.get_elevation_in_meters() / 1000.0), \
+                                       sgp4_propagator.get_observer_look(times[ok], gs.get_longitude(), \
+                                                                         gs.get_latitude(), gs.get_elevation_in_meters() / 1000.0), [1])
+        except Exception as e:
+            failures = failures + 1
+            print("%s:  FAIL pyorbital cannot propagate (%s: %s)" % (satnum, e.__class__.__name__, e))
+            continue
+        passed = (pos_diff < position_tolerance) and (vel_diff < velocity_tolerance) and \
+                 (lla_diff < angle_tolerance) and (look_diff < angle_tolerance)
+        if (not passed):
+            failures = failures + 1
+        decayed = ""
+        if (not np.all(ok)):
+            decayed = " (decayed at the other %d)" % np.sum(~ok)
+        print("%s:  %s %d points%s, position %.6f km, velocity %.9f km/s, lat/alt %.6f, elevation %.6f degrees" % \
+              (satnum, "ok  " if passed else "FAIL", np.sum(ok), decayed, pos_diff, vel_diff, lla_diff, look_diff))
+
+    if (failures > 0):
+        print("%d FAILURES" % failures)
+        sys.exit(1)
+    print("The pyorbital and sgp4 propagators agree")
+
+def get_tles(tle_file):
+    """Function to get the satellite numbers (as in the file) and the two lines of the TLEs in a file, with the checksums repaired (see fix_tle_checksum.py)... some of the test cases have bad checksums (or blank fields), which pyorbital rejects"""
+    tles = []
+    line1 = None
+    for line in open(tle_file):
+        if (line[0:2] == "1 "):
+            line1 = line.rstrip()
+            if (line1[44:52].strip() == ""):
+                line1 = line1[:44] + " 00000-0" + line1[52:] # blank second derivative of the mean motion (zero), which pyorbital cannot read
+            line1 = fix(line1)
+        elif (line[0:2] == "2 ") and (line1 is not None):
+            tles.append((line1[2:7], line1, fix(line.rstrip())))
+            line1 = None
+    return tles
+
+def get_epoch(line1):
+    """Function to get the (naive UTC) epoch of a TLE from its first line"""
+    year = int(line1[18:20])
+    if (year < 57):
+        year = year + 2000
+    else:
+        year = year + 1900
+    return datetime(year, 1, 1) + timedelta(days=float(line1[20:32]) - 1)
+
+def max_difference(expected, actual, indices):
+    """Function to get the largest difference between the arrays at the indices of two tuples of arrays"""
+    return max([np.max(np.abs(np.array(expected[i]) - np.array(actual[i])), initial=0.0) for i in indices])
+
+# Constants
+position_tolerance = 0.001 # km
+velocity_tolerance = 0.000001 # km/s
+angle_tolerance = 0.0001 # degrees (and km for the altitude)
+decay_errors = [1, 3, 4, 6] # sgp4 error codes of a collapsing orbit (eccentricity out of range, negative semilatus rectum, below the surface)
+pyorbital_minimum_perigee = 220.0 # km, pyorbital (like sgp4's simplified drag equations) only propagates perigees above it
+
+# Python idiom to eliminate the need for forward declarations
+if __name__=="__main__":
+   main()
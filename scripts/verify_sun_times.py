@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+import sys
+from datetime import datetime, timedelta
+from pytz import UTC
+from satellite_tle import SatelliteTle
+from satellite_ephemeris import SatelliteEphemeris
+
+###############################################################################
+# Script to verify the in sun/penumbra/umbra times from the satellite_tle
+# module (sampled every minute with the transitions refined by bisection,
+# from the propagator and from a SatelliteEphemeris) against the original
+# brute force computation (step one second at a time) using the STF-1
+# first contact golden TLE (entering eclipse season, first just grazing the
+# penumbra) and the
+# Delta 1 debris TLE from sgp4-ver.tle (in the umbra every orbit).
+###############################################################################
+
+def main():
+    """Main function... makes 'forward declarations' of helper functions unnecessary"""
+    # Constants
+    cases = [(43852, "../config/first_contact_20181219_golden.tle", datetime(2018, 12, 25, 12, 0, 0)), # STF-1
+             ("06251", "../config/sgp4-ver.tle", datetime(2006, 6, 25, 0, 0, 0))] # Delta 1 Deb
+    tolerance = 0.1 # seconds
+
+    failures = 0
+    for (satnum, tle_file, start) in cases:
+        end = start + timedelta(days=1)
+        st = SatelliteTle(satnum, tle_file=tle_file)
+        print("Satellite %s from %s to %s" % (st.get_satellite_number(), start, end))
+        expected = compute_brute_force_sun_times(st, start, end)
+        ephemeris = SatelliteEphemeris.from_tle(st, start, end)
+        for (how, tables) in [("", st.compute_sun_times(start, end, tolerance)), \
+                              (" (ephemeris)", st.compute_sun_times_from_ephemeris(start, end, ephemeris, tolerance))]:
+            for (name, bf_table, table) in zip(["Sun", "Penumbra", "Umbra"], expected, tables):
+                failures = failures + compare_sun_times(name + how, tolerance, bf_table, table)
+
+    if (failures > 0):
+        print("%d FAILURES" % failures)
+        sys.exit(1)
+    print("All sun times agree with the brute force computation")
+
+def compare_sun_times(name, tolerance, expected, table):
+    """Function to print and compare sun times to the brute force sun times... returns the number of failures"""
+    print("%s:  %d brute force times, %d times" % (name, len(expected), len(table)))
+    if (len(expected) != len(table)):
+        return 1
+    failures = 0
+    # Brute force times are the first whole second after the transition, so allow one second plus the tolerance
+    allowed = timedelta(seconds=1.0 + tolerance)
+    for (bf, times) in zip(expected, table):
+        enter_diff = times[0] - bf[0]
+        exit_diff = times[1] - bf[1]
+        ok = (abs(enter_diff) <= allowed) and (abs(exit_diff) <= allowed)
+        if (not ok):
+            failures = failures + 1
+        print("  %s Enter: %s (%+.3f s), Exit: %s (%+.3f s)" % \
+              ("ok  " if ok else "FAIL", times[0], enter_diff.total_seconds(), times[1], exit_diff.total_seconds()))
+    return failures
+
+def compute_brute_force_sun_times(st, start_time, end_time):
+    """Function to compute sun times the original way... step one second at a time"""
+    tables = [[], [], []] # indexed by InSun, InPenumbra, InUmbra
+    time = start_time
+    state = st.get_satellite_sun_state(time)
+    enter = time
+    while (time < end_time):
+        now_state = st.get_satellite_sun_state(time)
+        if (now_state != state):
+            tables[state].append((enter.replace(tzinfo=UTC), time.replace(tzinfo=UTC)))
+            enter = time
+            state = now_state
+        time += timedelta(seconds=1)
+    tables[state].append((enter.replace(tzinfo=UTC), time.replace(tzinfo=UTC)))
+    return tables
+
+# Python idiom to eliminate the need for forward declarations
+if __name__=="__main__":
+   main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+from datetime import datetime, timedelta
+from satellite_propagator import SatellitePropagator
+from tle_archive import TleArchive
+
+###############################################################################
+# Script to verify the tle_archive module with an archive of dated
+# directories (YYYY-MM-DD/stf1.tle, like the ones received telemetry is
+# reprocessed with) made from the STF-1 first contact golden TLE with a
+# new epoch each day (and the same TLE again in a second file now and then):
+#  - the best TLE found by binary search is the one a search of every
+#    epoch finds, for both selections (nearest and previous epoch)
+#  - a time period is split where the best TLE changes
+#  - a second run uses the persistent index without parsing any file, and
+#    a new dated directory is the only file parsed
+#
+# Syntax:  verify_tle_archive.py [golden TLE file]
+###############################################################################
+
+def main():
+    """Main function... makes 'forward declarations' of helper functions unnecessary"""
+    tle_file = "../config/first_contact_20181219_golden.tle"
+    if (len(sys.argv) > 1):
+        tle_file = sys.argv[1]
+    with open(tle_file) as f:
+        lines = [line.rstrip("\r\n") for line in f if (line.strip() != "")]
+    satnum = 43852 # STF-1
+
+    archive_directory = tempfile.mkdtemp()
+    failures = 0
+    try:
+        epochs = []
+        for day in range(days):
+            epoch = first_epoch + timedelta(days=day, hours=(6 * day) % 24)
+            epochs.append(epoch)
+            write_tle(archive_directory, first_epoch.date() + timedelta(days=day + 1), "stf1.tle", lines, epoch)
+            if (day % 5 == 0):
+                write_tle(archive_directory, first_epoch.date() + timedelta(days=day + 1), "copy.tle", lines, epoch)
+        epochs = np.array(epochs, dtype='datetime64[us]')
+
+        archive = TleArchive(archive_directory)
+        failures += check("First run:  every file parsed", (archive.get_files_parsed() == days + (days + 4) // 5) and (len(archive.get_epochs(satnum)) == days) and \
+                          np.array_equal(archive.get_epochs(satnum), epochs), archive)
+        times = np.datetime64(first_epoch - timedelta(days=2), 'us') + \
+                np.arange(0, (days + 4) * 86400, 997) * np.timedelta64(1, 's')
+        for selection in TleArchive.Selections:
+            selected = TleArchive(archive_directory, selection=selection)
+            found = np.array([selected.get_tle_index(satnum, time) for time in times])
+            failures += check("%s epoch:  binary search agrees with searching every epoch" % selection, \
+                              np.array_equal(found, [search_every_epoch(epochs, time, selection) for time in times]), \
+                              "%d times" % len(times))
+            spans = selected.get_tle_spans(satnum, times[0], times[-1])
+            ok = (len(spans) == days) and (spans[0][0] == times[0]) and (spans[-1][1] == times[-1]) and \
+                 all([spans[i][1] == spans[i + 1][0] for i in range(len(spans) - 1)]) and \
+                 all([(selected.get_tle_index(satnum, start) == index) and \
+                      (selected.get_tle_index(satnum, end - np.timedelta64(1, 'us')) == index) \
+                      for (start, end, index) in spans])
+            failures += check("%s epoch:  time period split where the TLE changes" % selection, ok, "%d spans" % len(spans))
+        time = datetime.utcfromtimestamp(0) + timedelta(microseconds=int(times[1000].astype(np.int64)))
+        st = archive.get_satellite_tle(satnum, time, propagator=SatellitePropagator.Sgp4Backend)
+        failures += check("SatelliteTle for a time:  the best TLE, created once", \
+                          (st.get_elements()['epoch'] == epochs[archive.get_tle_index(satnum, time)]) and \
+                          (archive.get_satellite_tle(satnum, time) is st), st.get_satellite_name())
+
+        second_run = TleArchive(archive_directory)
+        failures += check("Second run:  no file parsed", (second_run.get_files_parsed() == 0) and \
+                          np.array_equal(second_run.get_epochs(satnum), epochs), second_run)
+        epoch = first_epoch + timedelta(days=days)
+        write_tle(archive_directory, first_epoch.date() + timedelta(days=days + 1), "stf1.tle", lines, epoch)
+        third_run = TleArchive(archive_directory)
+        failures += check("New dated directory:  only its file parsed", (third_run.get_files_parsed() == 1) and \
+                          (len(third_run.get_epochs(satnum)) == days + 1) and (second_run.refresh() == 1), third_run)
+    finally:
+        shutil.rmtree(archive_directory)
+
+    if (failures > 0):
+        print("%d FAILURES" % failures)
+        sys.exit(1)
+    print("The TLE archive works as expected")
+
+def write_tle(archive_directory, date, file_name, lines, epoch):
+    """Function to write a TLE file in a dated directory with the TLE lines changed to a new epoch"""
+    directory = os.path.join(archive_directory, date.isoformat())
+    if (not os.path.exists(directory)):
+        os.makedirs(directory)
+    day = (epoch - datetime(epoch.year, 1, 1)).total_seconds() / 86400.0 + 1
+    line1 = lines[1][:18] + "%02d%012.8f" % (epoch.year % 100, day) + lines[1][32:]
+    with open(os.path.join(directory, file_name), "w") as f:
+        f.write("%s\n%s\n%s\n" % (lines[0], line1, lines[2]))
+
+def search_every_epoch(epochs, time, selection):
+    """Function to find the best TLE the slow way"""
+    if (selection == TleArchive.PreviousEpoch):
+        before = np.nonzero(epochs <= time)[0]
+        if (len(before) == 0):
+            return 0
+        return before[-1]
+    distances = np.abs(epochs - time)
+    return np.nonzero(distances == np.min(distances))[0][-1] # the later one on a tie
+
+def check(description, ok, result):
+    """Function to print a check... returns the number of failures"""
+    print("%s %s (%s)" % ("ok  " if ok else "FAIL", description, str(result).replace("\n", " ")))
+    return 0 if ok else 1
+
+# Constants
+first_epoch = datetime(2018, 12, 20, 3, 0) # epochs on the hour every 6 hours are exact in the TLE epoch days
+days = 30
+
+# Python idiom to eliminate the need for forward declarations
+if __name__=="__main__":
+   main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import threading
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from satellite_tle import SatelliteTle
+from tle_fetcher import TleFetcher, TleFetchException
+
+###############################################################################
+# Script to verify the on-disk cache and conditional requests of the
+# tle_fetcher module against a local http.server stand-in for Celestrak
+# that serves the STF-1 first contact golden TLE (with an ETag and a
+# Last-Modified time) and counts the requests (and connections) it gets.
+#
+# Syntax:  verify_tle_fetcher.py [golden TLE file]
+###############################################################################
+
+class TleRequestHandler(BaseHTTPRequestHandler):
+    """Class to serve the current TLE text of the server, honoring If-None-Match (or else If-Modified-Since)"""
+    protocol_version = "HTTP/1.1" # kept alive connections
+
+    def do_GET(self):
+        server = self.server
+        server.connections.add(self.client_address)
+        server.requests.append((self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')))
+        if (server.status != 200):
+            self.send_error(server.status)
+        elif (self.headers.get('If-None-Match') == server.etag) or \
+             ((self.headers.get('If-None-Match') is None) and (self.headers.get('If-Modified-Since') == server.last_modified)):
+            self.send_response(304)
+            self.end_headers()
+        else:
+            body = server.text.encode('ascii')
+            self.send_response(200)
+            self.send_header('ETag', server.etag)
+            self.send_header('Last-Modified', server.last_modified)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # quiet
+
+def main():
+    """Main function... makes 'forward declarations' of helper functions unnecessary"""
+    tle_file = "../config/first_contact_20181219_golden.tle"
+    if (len(sys.argv) > 1):
+        tle_file = sys.argv[1]
+    satnum = 43852 # STF-1
+    with open(tle_file) as f:
+        text = f.read()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TleRequestHandler)
+    server.daemon_threads = True
+    set_document(server, text, '"1"')
+    server.status = 200
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%d/stf1.tle" % server.server_port
+    cache_directory = tempfile.mkdtemp()
+    failures = 0
+    try:
+        # One download shared by every satellite using the URL
+        fetcher = TleFetcher(cache_directory=cache_directory)
+        TleFetcher.set_default(fetcher)
+        satellites = [SatelliteTle(satnum, tle_url=url) for i in range(3)]
+        failures += check(server, "3 satellites, one URL:  one download", [(None, None)], \
+                          satellites[0].get_line1() in text)
+        # A fresh cached copy is used without any request
+        TleFetcher(cache_directory=cache_directory).get_catalog(url)
+        failures += check(server, "New run within the time to live:  no request", [], True)
+        # A stale cached copy is revalidated... not modified
+        catalog = TleFetcher(cache_directory=cache_directory, ttl_seconds=0).get_catalog(url)
+        failures += check(server, "Stale cached copy, not modified:  conditional request, 304", \
+                          [('"1"', server.last_modified)], catalog.get_tle(satnum) is not None)
+        # ...modified
+        last_modified = server.last_modified
+        set_document(server, text.replace("STF1", "STF-1 NEW"), '"2"')
+        catalog = TleFetcher(cache_directory=cache_directory, ttl_seconds=0).get_catalog(url)
+        failures += check(server, "Stale cached copy, modified:  conditional request, 200", \
+                          [('"1"', last_modified)], catalog.get_tle(satnum)[0] == "STF-1 NEW")
+        # refetch_tle revalidates regardless of the time to live
+        satellites[0].refetch_tle()
+        failures += check(server, "refetch_tle:  conditional request", [('"2"', server.last_modified)], True)
+        # The server is down... use the stale cached copy
+        server.status = 500
+        catalog = TleFetcher(cache_directory=cache_directory, ttl_seconds=0).get_catalog(url)
+        failures += check(server, "Server error with a cached copy:  cached copy used", \
+                          [('"2"', server.last_modified)], catalog.get_tle(satnum)[0] == "STF-1 NEW")
+        # Prefetch in parallel, with a kept alive connection for each thread
+        server.status = 200
+        urls = [url + "?%d" % i for i in range(6)]
+        fetcher = TleFetcher(cache_directory=cache_directory + "/prefetch")
+        fetcher.prefetch(urls + urls, threads=2)
+        failures += check(server, "Prefetch 6 URLs (listed twice) with 2 threads:  6 requests", [(None, None)] * 6, \
+                          (len(server.connections) <= 2) and all([fetcher.get_catalog(u).get_tle(satnum) is not None for u in urls]))
+        failures += check(server, "Prefetched URLs:  no more requests", [], True)
+        TleFetcher(cache_directory=cache_directory + "/sequential").prefetch(urls, threads=1)
+        failures += check(server, "6 URLs one after another:  one connection", [(None, None)] * 6, len(server.connections) == 1)
+        # A cache that cannot be written still returns the downloaded TLEs
+        server.status = 200
+        with open(cache_directory + "/not_a_directory", "w") as f:
+            f.write("")
+        catalog = TleFetcher(cache_directory=cache_directory + "/not_a_directory/cache").get_catalog(url)
+        failures += check(server, "Cache directory cannot be created:  downloaded, not cached", [(None, None)], \
+                          catalog.get_tle(satnum) is not None)
+        unwritable = cache_directory + "/unwritable"
+        os.makedirs(os.path.join(unwritable, hashlib.sha1(url.encode('utf-8')).hexdigest() + ".tle")) # the cached copy cannot replace a directory
+        catalog = TleFetcher(cache_directory=unwritable).get_catalog(url)
+        failures += check(server, "Cache file cannot be written:  downloaded, no temporary file left", [(None, None)], \
+                          (catalog.get_tle(satnum) is not None) and (len(os.listdir(unwritable)) == 1))
+        # ...and with no cached copy, fail
+        server.status = 500
+        try:
+            TleFetcher(cache_directory=cache_directory + "/empty").get_catalog(url)
+            failed = False
+        except TleFetchException:
+            failed = True
+        failures += check(server, "Server error with no cached copy:  TleFetchException", [(None, None)], failed)
+    finally:
+        server.shutdown()
+        shutil.rmtree(cache_directory)
+
+    if (failures > 0):
+        print("%d FAILURES" % failures)
+        sys.exit(1)
+    print("The TLE fetcher cache works as expected")
+
+def set_document(server, text, etag):
+    """Function to change the TLE text the server serves"""
+    server.text = text
+    server.etag = etag
+    server.last_modified = formatdate(usegmt=True)
+    server.requests = []
+    server.connections = set()
+
+def check(server, description, expected_requests, ok):
+    """Function to check and print the requests (If-None-Match, If-Modified-Since) the server got since the last check... returns the number of failures"""
+    ok = ok and (sorted(server.requests, key=repr) == expected_requests)
+    print("%s %s (requests: %s)" % ("ok  " if ok else "FAIL", description, server.requests))
+    server.requests = []
+    server.connections = set()
+    return 0 if ok else 1
+
+# Python idiom to eliminate the need for forward declarations
+if __name__=="__main__":
+   main()
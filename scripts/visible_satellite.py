@@ -1,12 +1,17 @@
 #!/usr/bin/env python
 
 import math
+import numpy as np
 from datetime import datetime, timedelta
 from pytz import timezone, utc
 from ephem import Observer, Sun
-from satellite_tle import SatelliteTle
+from tle_catalog import TleCatalog
+from tle_element_store import TleElementStore
 from ground_station import GroundStation
+from station_frame import StationFrame
+from reference_frames import ReferenceFrames
 from inview_calculator import InviewCalculator
+from sgp4_batch_propagator import Sgp4BatchPropagator
 from astropy.time import Time
 
 ###############################################################################
@@ -27,30 +32,46 @@ def main():
     print_span(gs_tz, nautical_night)
 
     file_path = '/var/www/html/bright/bright.tle'
-    SATS =[]
-    with open(file_path, 'r') as file:
-        for line in file:
-            # Process each line here
-            if (line[0] == "1"):
-                SATS.append(line[2:7])
+    element_store = TleElementStore.from_tle_file(file_path)
 
+    # Propagate all of the satellites at once, straight from the (usually already saved) elements
+    propagator = Sgp4BatchPropagator.from_element_store(element_store)
+    ephemerides = propagator.compute_ephemerides(gs_start, gs_end)
+
+    # Only the satellites that can be inview at night need their TLE (and a SatelliteTle)
+    catalog = None
     visibilities = []
-    for sat in SATS:
-        visibilities.extend(determine_satellite_visibility(sat, gs, gs_tz, gs_start, gs_end, civil_night, file_path))
+    for (sat, ephemeris) in zip(propagator.get_satellite_numbers(), ephemerides):
+        if (may_be_inview(ephemeris, gs, civil_night)):
+            if (catalog is None):
+                catalog = TleCatalog.from_file(file_path)
+            st = catalog.create_satellite_tle(sat)
+            visibilities.extend(determine_satellite_visibility(st, ephemeris, gs, gs_tz, gs_start, gs_end, civil_night))
 
     visibilities.sort(key=lambda entry : entry[1][0])
     print_timespans(gs_tz, visibilities)
    
     print("</body></html>")
 
-def determine_satellite_visibility(sat, gs, gs_tz, gs_start, gs_end, night, file_path):
-    satnum = sat
-    st = SatelliteTle(satnum, tle_file=file_path)
+def may_be_inview(ephemeris, gs, night):
+    # The inviews are found from the ephemeris samples above the minimum elevation angle, and
+    # an inview ends less than a sample after its last one... so no such sample from one sample
+    # before to one sample after the night means no inview at night
+    step = ephemeris.get_time_step()
+    time_grid = ephemeris.get_time_grid()
+    (first, last) = time_grid.get_period_indices(night[0] - step, night[1] + step)
+    station_frame = StationFrame.for_ground_station(gs)
+    (az, el, range_km) = station_frame.look(ReferenceFrames.eci_to_ecef_position(time_grid.get_subgrid(first, last), \
+                                                                                 ephemeris.get_positions()[:, first:last]))
+    return bool(np.any(station_frame.is_above_minimum_elevation(el)))
+
+def determine_satellite_visibility(st, ephemeris, gs, gs_tz, gs_start, gs_end, night):
+    satnum = st.get_satellite_number()
 
-    [suntimes, pentimes, umtimes] = st.compute_sun_times(gs_start, gs_end)
+    [suntimes, pentimes, umtimes] = st.compute_sun_times_from_ephemeris(gs_start, gs_end, ephemeris)
 
     ic = InviewCalculator(gs, st)
-    inviews = ic.compute_inviews(gs_start, gs_end)
+    inviews = ic.compute_inviews_from_ephemeris(gs_start, gs_end, ephemeris)
 
     intersections = []
     for inview in inviews: